@@ -4,6 +4,11 @@ import importlib.util
 import sys
 import os
 
+# Make the modules package importable by the page modules (engine imports)
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
 # Page configuration
 st.set_page_config(
     page_title="Skylark Brief: AI-Powered Drone Intelligence",
@@ -0,0 +1,29 @@
+# benchmarks/anomaly_benchmark.py - ANOMALY ENGINE BENCHMARK (1M OBSERVATIONS)
+# Run from the project root: python -m benchmarks.anomaly_benchmark
+import time
+
+from modules.anomaly import AnomalyEngine, simulate_qc_observations
+
+
+def main(n_train=200_000, n_score=1_000_000):
+    history = simulate_qc_observations(n_train, seed=1)
+    started = time.perf_counter()
+    engine = AnomalyEngine().fit(history)
+    print(f"train   {n_train:>9,} obs  {time.perf_counter() - started:6.2f} s")
+
+    observations = simulate_qc_observations(n_score, seed=2)
+    started = time.perf_counter()
+    result = engine.score(observations)
+    elapsed = time.perf_counter() - started
+    print(f"score   {n_score:>9,} obs  {elapsed:6.2f} s  ({n_score / elapsed:,.0f} obs/s)")
+
+    injected = observations["injected_anomaly"].to_numpy()
+    flagged = result["level"].to_numpy() != "green"
+    print(f"recall    {flagged[injected].mean():.3f}   false alarm rate {flagged[~injected].mean():.3f}")
+    print(result["level"].value_counts().to_string())
+    print(f"mean severity  injected {result['severity'][injected].mean():.1f}"
+          f"  normal {result['severity'][~injected].mean():.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# benchmarks/mission_query_benchmark.py - NATURAL-LANGUAGE QUERY LATENCY (PLAN CACHE COLD VS WARM)
+# Run from the project root: python -m benchmarks.mission_query_benchmark
+import time
+import tempfile
+import numpy as np
+
+from modules.mission_store import MissionStore, simulate_mission_batches
+from modules.mission_query import SAMPLE_QUESTIONS, MissionQueryEngine, normalize, parse
+
+QUESTIONS = SAMPLE_QUESTIONS + [
+    "Top 10 windiest missions at site 417 this year",
+    "Compare 2023 vs 2024 building inspection results",
+    "Show missions with score below 50 in the last 30 days",
+    "Lowest overlap last quarter",
+    "How are the crops doing?",  # no intent keyword: answered through the translator stub
+]
+
+
+def main(n_missions=10_000_000, repeats=20):
+    with tempfile.TemporaryDirectory() as path:
+        store = MissionStore(path)
+        for batch in simulate_mission_batches(n_missions, 500_000):
+            store.bulk_insert(batch)
+        store.latest()  # index build, outside the timings
+
+        started = time.perf_counter()
+        for _ in range(1_000):
+            for question in QUESTIONS:
+                parse(normalize(question))
+        print(f"grammar parse            {(time.perf_counter() - started) / (1_000 * len(QUESTIONS)) * 1e6:8.1f} µs/question")
+
+        engine = MissionQueryEngine(store)
+        print(f"{'question':<70} {'cold ms':>8} {'warm ms':>8} {'plan µs':>8}  source")
+        for question in QUESTIONS:
+            cold = engine.ask(question)
+            warm = [engine.ask(question)["timings"] for _ in range(repeats)]
+            print(f"{question[:70]:<70} {cold['timings']['total_ms']:8.2f} "
+                  f"{np.median([t['total_ms'] for t in warm]):8.2f} "
+                  f"{np.median([t['plan_ms'] for t in warm]) * 1000:8.1f}  {cold['plan']['source']}")
+            print(f"    {cold['answer']}")
+        print(f"plan cache: {engine.hits:,} hits, {engine.misses:,} misses over {n_missions:,} missions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# benchmarks/mission_store_benchmark.py - MISSION STORE BULK LOAD AND HISTORY QUERIES
+# Run from the project root: python -m benchmarks.mission_store_benchmark
+import time
+import tempfile
+import numpy as np
+
+from modules.mission_store import MissionStore, simulate_mission_batches
+
+# The DMO history questions, over the last simulated month / first half of 2024
+QUERIES = {
+    "best image quality last month": lambda store: store.top("image_quality", 5, start="2024-12-01", end="2025-01-01"),
+    "Q1 vs Q2 solar results": lambda store: store.aggregate("Q", asset_type="Solar Farm",
+                                                            start="2024-01-01", end="2024-07-01"),
+    "one site, all time": lambda store: store.query(site_id=417),
+    "score below 50 last quarter": lambda store: store.query(max_score=50, start="2024-10-01", end="2025-01-01"),
+    "missions scoring 95+": lambda store: store.query(min_score=95),
+}
+
+
+def timed(fn, repeats=20):
+    fn()  # warm-up
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return np.median(times) * 1000
+
+
+def main(n_missions=10_000_000, batch_size=500_000):
+    with tempfile.TemporaryDirectory() as path:
+        store = MissionStore(path)
+        batches = list(simulate_mission_batches(n_missions, batch_size))
+        started = time.perf_counter()
+        for batch in batches:
+            store.bulk_insert(batch)
+        elapsed = time.perf_counter() - started
+        print(f"bulk insert {n_missions:>11,} missions  {elapsed:6.2f} s  ({n_missions / elapsed:,.0f} rows/s)")
+        del batches
+
+        started = time.perf_counter()
+        store.select()
+        print(f"build indexes                       {time.perf_counter() - started:6.2f} s")
+
+        for name, query in QUERIES.items():
+            print(f"{name:<32} {timed(lambda: query(store)):8.2f} ms  ({len(query(store)):,} rows)")
+
+        started = time.perf_counter()
+        reopened = MissionStore(path)
+        reopened.select()
+        print(f"reopen from Parquet + index         {time.perf_counter() - started:6.2f} s  ({len(reopened):,} missions)")
+
+
+if __name__ == "__main__":
+    main()
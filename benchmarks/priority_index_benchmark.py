@@ -0,0 +1,61 @@
+# benchmarks/priority_index_benchmark.py - PRIORITY INDEX: BULK LOAD, UPSERTS AND PAGED QUERIES
+# Run from the project root: python -m benchmarks.priority_index_benchmark
+import time
+import numpy as np
+import pandas as pd
+
+from modules.prioritization import ACTION_BUCKETS, MISSION_THRESHOLD_SHIFTS, FindingPriorityIndex, simulate_open_findings
+
+
+def boundary_findings():
+    """Findings just below, exactly on and just above every shifted action threshold,
+    with the action a `>= threshold` rule puts them in"""
+    rows = []
+    for mission_criticality, shift in MISSION_THRESHOLD_SHIFTS.items():
+        for b, (_, threshold) in enumerate(ACTION_BUCKETS[:-1]):
+            for delta in (-0.01, 0.0, 0.01):
+                rows.append({"finding_id": f"B-{len(rows):03d}", "confidence": threshold + shift + delta,
+                             "asset_type": "Solar Farm", "criticality": "High",
+                             "mission_criticality": mission_criticality,
+                             "expected": ACTION_BUCKETS[b + (delta < 0)][0]})
+    return pd.DataFrame(rows)
+
+
+def actions(index, n):
+    return index.page(offset=0, k=n).set_index("finding_id")["action"]
+
+
+def main(n_findings=1_000_000, n_updates=20_000):
+    # The bulk path (vectorized action_for) and the scalar upsert path must bucket identically
+    boundary = boundary_findings()
+    expected = boundary.set_index("finding_id")["expected"]
+    loaded = actions(FindingPriorityIndex().load(boundary), len(boundary))
+    upserted = FindingPriorityIndex()
+    for row in boundary.itertuples(index=False):
+        upserted.upsert(row.finding_id, row.confidence, row.asset_type, row.criticality, row.mission_criticality)
+    upserted = actions(upserted, len(boundary))
+    print(f"load() buckets match >= thresholds:   {loaded.reindex(expected.index).equals(expected)}")
+    print(f"upsert() buckets match >= thresholds: {upserted.reindex(expected.index).equals(expected)}")
+
+    findings = simulate_open_findings(n_findings)
+    started = time.perf_counter()
+    index = FindingPriorityIndex().load(findings)
+    print(f"\nbulk load {n_findings:,} findings     {time.perf_counter() - started:6.2f} s")
+
+    rng = np.random.default_rng(1)
+    rows = findings.iloc[rng.integers(0, n_findings, n_updates)]
+    confidence = rng.uniform(40, 100, n_updates)
+    started = time.perf_counter()
+    for row, value in zip(rows.itertuples(index=False), confidence):
+        index.upsert(row.finding_id, value, row.asset_type, row.criticality, row.mission_criticality)
+    print(f"upsert                        {(time.perf_counter() - started) / n_updates * 1e6:6.1f} µs")
+
+    for offset in (0, 10_000):
+        started = time.perf_counter()
+        for _ in range(100):
+            index.page("REVIEW", offset=offset, k=25)
+        print(f"page of 25 at offset {offset:<8,} {(time.perf_counter() - started) * 10:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/report_index_benchmark.py - REPORT VECTOR INDEX: BRUTE FORCE VS IVF OVER 5M CHUNKS
+# Run from the project root: python -m benchmarks.report_index_benchmark
+import time
+import tempfile
+import numpy as np
+
+from modules.report_index import ReportEmbedder, ReportVectorIndex, recall_at_k, simulate_report_chunks
+
+QUERIES = [
+    "severe thermal hotspot on solar panels", "pothole repairs needed on the highway",
+    "crop stress and irrigation gap", "roof leak escalate to client", "stockpile toe erosion after rain",
+    "blurred images in gusty wind", "cracked module glass on the array", "drainage blockage on road",
+    "weed patch in the field", "facade crack needs ground inspection",
+]
+
+
+def timed_ms(fn, repeats=10):
+    fn()
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return np.median(times) * 1000, np.percentile(times, 95) * 1000
+
+
+def main(n_chunks=5_000_000, n_lists=4_096):
+    batches = simulate_report_chunks(n_chunks, 100_000)
+    first_ids, first_texts = next(batches)
+    started = time.perf_counter()
+    embedder = ReportEmbedder().fit(first_texts)
+    print(f"fit embedder on {len(first_texts):,} chunks      {time.perf_counter() - started:6.1f} s")
+
+    started = time.perf_counter()
+    ids, embeddings = [first_ids], [embedder.transform(first_texts)]
+    for chunk_ids, texts in batches:
+        ids.append(chunk_ids)
+        embeddings.append(embedder.transform(texts))
+    elapsed = time.perf_counter() - started
+    print(f"embed {n_chunks:,} chunks               {elapsed:6.1f} s  ({n_chunks / elapsed:,.0f} chunks/s)")
+
+    queries = embedder.transform(QUERIES)
+    print(f"embed one query                       {timed_ms(lambda: embedder.transform(QUERIES[:1]))[0]:6.2f} ms")
+
+    all_scores = np.concatenate([block @ queries.T for block in embeddings])
+    reference = np.sort(all_scores, axis=0)[-10:][::-1].T
+    del all_scores
+    with tempfile.TemporaryDirectory() as path:
+        for dtype, lists in [("int8", n_lists), ("float16", None)]:
+            started = time.perf_counter()
+            index = ReportVectorIndex.build(f"{path}/{dtype}", zip(ids, embeddings), dtype=dtype, n_lists=lists)
+            print(f"\n{dtype} index{' + IVF ' + str(lists) if lists else ''}: build {time.perf_counter() - started:.1f} s, "
+                  f"{index.vectors.nbytes / 2 ** 20:,.0f} MiB memory-mapped")
+
+            exact_ids, exact_scores = index.search(queries, 10, exact=True)
+            p50, p95 = timed_ms(lambda: index.search(queries[:1], 10, exact=True), 3)
+            print(f"  brute force, 1 query                {p50:8.1f} ms")
+            batch = np.repeat(queries, 4, axis=0)  # 40 queries share one scan
+            p50, _ = timed_ms(lambda: index.search(batch, 10, exact=True), 3)
+            print(f"  brute force, {len(batch)} queries per scan   {p50 / len(batch):8.1f} ms/query")
+            if lists:
+                for n_probe in (8, 32, 64):
+                    p50, p95 = timed_ms(lambda: [index.search(q, 10, n_probe=n_probe) for q in queries])
+                    ivf_ids, _ = index.search(queries, 10, n_probe=n_probe)
+                    print(f"  IVF n_probe={n_probe:<3} 1 query       {p50 / len(queries):8.2f} ms  "
+                          f"recall@10 vs brute force {recall_at_k(ivf_ids, exact_ids):.2f}")
+
+            print(f"  top-10 score error vs float32       {np.abs(exact_scores - reference).max():8.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# modules/anomaly.py - CONTEXT-AWARE ANOMALY DETECTION WITH GRADED SEVERITY
+import os
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+
+from modules.scoring import ASSET_TYPES, traffic_light
+
+# QC metric -> direction in which it gets worse (+1 higher is worse, -1 lower is worse)
+QC_METRICS = {
+    "image_quality": -1,
+    "overlap_consistency": -1,
+    "blur_fraction": 1,
+    "gsd_deviation_pct": 1,
+    "gps_error_m": 1,
+}
+
+# How much each metric matters for the mission's purpose
+PURPOSE_WEIGHTS = {
+    "Volumetrics": {"image_quality": 0.6, "overlap_consistency": 1.0, "blur_fraction": 0.4,
+                    "gsd_deviation_pct": 1.0, "gps_error_m": 1.0},
+    "Visual Inspection": {"image_quality": 1.0, "overlap_consistency": 0.5, "blur_fraction": 1.0,
+                          "gsd_deviation_pct": 0.6, "gps_error_m": 0.4},
+}
+DEFAULT_PURPOSE = {
+    "Mining Stockpile": "Volumetrics",
+    "Agricultural Field": "Volumetrics",
+    "Solar Farm": "Visual Inspection",
+    "Road Infrastructure": "Visual Inspection",
+    "Building Inspection": "Visual Inspection",
+}
+
+# Blend of the two detectors in the final severity
+Z_SHARE = 0.6
+Z_TOLERANCE = 2.0  # robust z within this band is normal variation
+Z_SCALE = 3.0      # weighted excess z at which the z-part reaches ~63%
+UNSCORED_LEVEL = "unscored"  # level for missions of an asset type with no trained detector
+
+
+def _is_private(path):
+    # Owned by this user and not writable by group / others (POSIX only)
+    if not hasattr(os, "getuid"):
+        return True
+    info = os.stat(path)
+    return info.st_uid == os.getuid() and not info.st_mode & 0o022
+
+
+class AssetDetector:
+    """Robust z-scores and an isolation forest fitted on one asset type's history"""
+
+    def __init__(self, n_estimators=64, seed=42):
+        self.n_estimators = n_estimators
+        self.seed = seed
+
+    def fit(self, missions):
+        X = missions[list(QC_METRICS)].to_numpy(dtype=np.float64)
+        self.center = np.median(X, axis=0)
+        mad = np.median(np.abs(X - self.center), axis=0) * 1.4826
+        self.scale = np.where(mad > 0, mad, X.std(axis=0) + 1e-9)
+
+        self.forest = IsolationForest(n_estimators=self.n_estimators, max_samples=256,
+                                      random_state=self.seed).fit(self._standardize(X))
+        # Training outlier-score distribution, used to turn raw scores into percentiles
+        train_scores = -self.forest.score_samples(self._standardize(X[:100_000]))
+        self.score_quantiles = np.quantile(train_scores, np.linspace(0, 1, 101))
+        return self
+
+    def _standardize(self, X):
+        return (X - self.center) / self.scale
+
+    def score(self, X, weights):
+        """Severity parts for a metric matrix: (weighted z part, forest part, worst metric index)"""
+        z = self._standardize(X) * np.array(list(QC_METRICS.values()))
+        weighted = np.clip(z - Z_TOLERANCE, 0, None) * weights
+        z_part = 1 - np.exp(-weighted.sum(axis=1) / Z_SCALE)
+
+        raw = -self.forest.score_samples(self._standardize(X))
+        forest_part = np.interp(raw, self.score_quantiles, np.linspace(0, 1, 101))
+        # Only the tail of the training distribution counts as anomalous
+        forest_part = np.clip((forest_part - 0.9) / 0.1, 0, 1)
+        # -1 when no metric is outside its normal band
+        worst = np.where(weighted.max(axis=1) > 0, weighted.argmax(axis=1), -1)
+        return z_part, forest_part, worst
+
+
+class AnomalyEngine:
+    """Per-asset-type QC anomaly detectors with graded, purpose-aware severity.
+
+    Detectors are trained offline on historical missions and cached with
+    joblib. Scoring is batched per asset type, and returns a 0-100
+    severity, the metric driving it and the Confidence Engine
+    traffic-light level for the mission's data. Missions of an asset
+    type without a detector get NaN severity and the UNSCORED_LEVEL.
+    """
+
+    def __init__(self, n_estimators=64):
+        self.n_estimators = n_estimators
+        self.detectors = {}
+
+    def fit(self, history):
+        for asset_type, group in history.groupby("asset_type", sort=False):
+            self.detectors[asset_type] = AssetDetector(self.n_estimators).fit(group)
+        return self
+
+    def save(self, path):
+        joblib.dump({"n_estimators": self.n_estimators, "detectors": self.detectors}, path)
+
+    @classmethod
+    def load(cls, path):
+        data = joblib.load(path)
+        engine = cls(data["n_estimators"])
+        engine.detectors = data["detectors"]
+        return engine
+
+    @classmethod
+    def load_or_train(cls, path, history_fn):
+        """Load cached detectors, or train on `history_fn()` and cache them.
+
+        Loading a joblib file unpickles it, so a cache file or folder that
+        another user owns or can write is neither loaded nor overwritten:
+        the detectors are retrained in memory instead.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        private = _is_private(directory) and (not os.path.exists(path) or _is_private(path))
+        if private and os.path.exists(path):
+            return cls.load(path)
+        engine = cls().fit(history_fn())
+        if private:
+            engine.save(path)
+        return engine
+
+    def score(self, missions, chunk_size=250_000):
+        """Batched severity scoring; `purpose` column optional (missing values default per asset type)"""
+        n = len(missions)
+        severity = np.full(n, np.nan)
+        worst = np.empty(n, dtype=object)
+        metric_names = np.array(list(QC_METRICS) + [None], dtype=object)
+
+        default_purposes = missions["asset_type"].map(DEFAULT_PURPOSE)
+        purposes = missions["purpose"].fillna(default_purposes) if "purpose" in missions else default_purposes
+        purpose_codes = pd.Categorical(purposes, categories=list(PURPOSE_WEIGHTS)).codes
+        unknown = (purpose_codes < 0) & purposes.notna().to_numpy()
+        if unknown.any():
+            raise ValueError(f"Unknown purpose {purposes[unknown].iloc[0]!r}; expected one of {list(PURPOSE_WEIGHTS)}")
+        weight_table = np.array([[w[m] for m in QC_METRICS] for w in PURPOSE_WEIGHTS.values()])
+        asset_codes = missions["asset_type"].to_numpy()
+        metrics = missions[list(QC_METRICS)].to_numpy(dtype=np.float64)  # once, not per detector
+
+        for asset_type, detector in self.detectors.items():
+            rows = np.flatnonzero(asset_codes == asset_type)
+            if len(rows) == 0:
+                continue
+            if (purpose_codes[rows] < 0).any():
+                raise ValueError(f"No purpose given or defaulted for {asset_type!r} missions")
+            weights = weight_table[purpose_codes[rows]]
+            X = metrics[rows]
+            for start in range(0, len(rows), chunk_size):
+                part = slice(start, start + chunk_size)
+                z_part, forest_part, worst_idx = detector.score(X[part], weights[part])
+                severity[rows[part]] = 100 * (Z_SHARE * z_part + (1 - Z_SHARE) * forest_part)
+                worst[rows[part]] = metric_names[worst_idx]
+
+        scored = ~np.isnan(severity)
+        return pd.DataFrame({
+            "severity": severity,
+            "driver": worst,
+            "level": np.where(scored, traffic_light(100 - severity), UNSCORED_LEVEL),
+        }, index=missions.index)
+
+# ================= SIMULATED QC OBSERVATIONS =================
+def simulate_qc_observations(n=1_000_000, anomaly_rate=0.03, seed=42):
+    """Synthetic per-mission QC metrics with a share of injected anomalies"""
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        "asset_type": rng.choice(ASSET_TYPES, n),
+        "image_quality": np.clip(rng.normal(85, 5, n), 0, 100),
+        "overlap_consistency": np.clip(rng.normal(88, 4, n), 0, 100),
+        "blur_fraction": np.clip(rng.beta(2, 40, n), 0, 1),
+        "gsd_deviation_pct": np.abs(rng.normal(0, 2, n)),
+        "gps_error_m": np.abs(rng.normal(0.05, 0.03, n)),
+    })
+    anomalous = rng.random(n) < anomaly_rate
+    metric = rng.integers(0, len(QC_METRICS), n)
+    shocks = {
+        "image_quality": -25, "overlap_consistency": -25, "blur_fraction": 0.3,
+        "gsd_deviation_pct": 12, "gps_error_m": 0.5,
+    }
+    for i, (name, shock) in enumerate(shocks.items()):
+        hit = anomalous & (metric == i)
+        frame.loc[hit, name] += shock * rng.uniform(0.5, 1.5, hit.sum())
+    frame["injected_anomaly"] = anomalous
+    return frame
@@ -0,0 +1,194 @@
+# modules/battery.py - BATTERY HEALTH PREDICTION OVER TELEMETRY HISTORY
+import numpy as np
+import pandas as pd
+
+from modules.telemetry import read_flight
+
+NOMINAL_CAPACITY_AH = 12.0  # the fleet's 4S packs (what a healthy simulated flight measures)
+END_OF_LIFE_SOH = 0.80      # pack retired below 80% of nominal capacity
+MAX_FORECAST_CYCLES = 2000  # reported when no measurable fade yet
+ROLLING_WINDOW_S = 30
+
+CYCLE_FEATURES = ["capacity_ah", "resistance_ohm", "voltage_sag", "temp_max", "temp_rise"]
+
+# ================= PER-CYCLE FEATURES =================
+def _rolling_sums(values, window):
+    csum = np.concatenate([[0.0], np.cumsum(values, dtype=np.float64)])
+    return csum[window:] - csum[:-window]
+
+
+def extract_cycle_features(flight, window_s=ROLLING_WINDOW_S):
+    """Capacity, internal resistance, voltage sag and temperature for one flight (cycle).
+
+    Internal resistance is the median over rolling windows of the
+    regression slope of voltage steps on current steps (differencing
+    removes the slow state-of-charge drift). Window sums come from
+    cumulative sums, so every window is evaluated in one vectorized pass.
+    """
+    t = flight["time"].to_numpy(dtype=np.float64)
+    current = flight["current"].to_numpy(dtype=np.float64)
+    voltage = flight["voltage"].to_numpy(dtype=np.float64)
+    temp = flight["battery_temp"].to_numpy(dtype=np.float64)
+    soc = flight["battery_pct"].to_numpy(dtype=np.float64)
+
+    dt = np.diff(t, prepend=t[0] - (np.median(np.diff(t)) if len(t) > 1 else 1.0))
+    charge_ah = float(np.sum(current * dt) / 3600)
+    soc_drop = float(soc[0] - soc[-1])
+    capacity = charge_ah / (soc_drop / 100) if soc_drop >= 5 else np.nan
+
+    window = max(3, int(round(window_s / max(np.median(dt), 1e-9))))
+    resistance = np.nan
+    if len(t) > window + 1:
+        d_i, d_v = np.diff(current), np.diff(voltage)
+        s_ii = _rolling_sums(d_i * d_i, window)
+        s_iv = _rolling_sums(d_i * d_v, window)
+        excited = s_ii / window > 0.25  # need load changes to see the sag
+        if excited.any():
+            resistance = float(np.median(-s_iv[excited] / s_ii[excited]))
+
+    return {
+        "capacity_ah": capacity,
+        "resistance_ohm": resistance,
+        "voltage_sag": resistance * float(current.mean()) if np.isfinite(resistance) else np.nan,
+        "temp_max": float(temp.max()),
+        "temp_rise": float(temp.max() - temp[0]),
+    }
+
+
+def cycle_features_from_files(paths):
+    """Per-flight cycle features for ingested telemetry files (battery id from file metadata)"""
+    rows = []
+    for path in paths:
+        flight = read_flight(path, columns=["time", "current", "voltage", "battery_temp", "battery_pct"])
+        rows.append({
+            "battery_id": flight.attrs.get("battery_id", ""),
+            "flight_id": flight.attrs.get("flight_id", ""),
+            **extract_cycle_features(flight),
+        })
+    return pd.DataFrame(rows)
+
+# ================= INCREMENTAL MODEL =================
+class BatteryHealthModel:
+    """Per-battery linear capacity-fade model kept as running sufficient statistics.
+
+    Each battery stores n, Σx, Σy, Σx², Σxy over (cycle, state of health),
+    so a new flight is an O(1) update and fleet-wide prediction is a few
+    array operations over all batteries at once. Cycles carrying a
+    flight_id are counted once; re-ingesting a flight is a no-op.
+    """
+
+    _STATS = ["n", "sx", "sy", "sxx", "sxy"]
+
+    def __init__(self, nominal_capacity_ah=NOMINAL_CAPACITY_AH, end_of_life_soh=END_OF_LIFE_SOH):
+        self.nominal_capacity_ah = nominal_capacity_ah
+        self.end_of_life_soh = end_of_life_soh
+        self.battery_ids = pd.Index([], dtype=object)
+        self.stats = np.zeros((len(self._STATS), 0))
+        self.cycles = np.zeros(0, dtype=np.int64)
+        self.last = {name: np.zeros(0) for name in CYCLE_FEATURES}
+        self.flight_ids = set()
+
+    def __len__(self):
+        return len(self.battery_ids)
+
+    def _encode(self, battery_ids):
+        battery_ids = np.asarray(battery_ids, dtype=object)
+        new = pd.unique(battery_ids[~pd.Index(battery_ids).isin(self.battery_ids)])
+        if len(new):
+            self.battery_ids = self.battery_ids.append(pd.Index(new, dtype=object))
+            grow = len(new)
+            self.stats = np.concatenate([self.stats, np.zeros((len(self._STATS), grow))], axis=1)
+            self.cycles = np.concatenate([self.cycles, np.zeros(grow, dtype=np.int64)])
+            for name in CYCLE_FEATURES:
+                self.last[name] = np.concatenate([self.last[name], np.full(grow, np.nan)])
+        return self.battery_ids.get_indexer(battery_ids)
+
+    def update(self, cycles):
+        """Add completed cycles (battery_id + CYCLE_FEATURES columns, in flight order).
+
+        Works for one new flight or millions of historical cycles alike.
+        """
+        if "flight_id" in cycles:
+            flight_ids = cycles["flight_id"]
+            known = flight_ids.notna() & flight_ids.ne("")
+            seen = known & (flight_ids.isin(self.flight_ids) | flight_ids.duplicated())
+            self.flight_ids.update(flight_ids[known & ~seen])
+            cycles = cycles[~seen.to_numpy()]
+        if not len(cycles):
+            return self
+        codes = self._encode(cycles["battery_id"])
+        size = len(self.battery_ids)
+
+        # Cycle number of each row = previous count for that battery + running position
+        order = np.argsort(codes, kind="stable")
+        sorted_codes = codes[order]
+        starts = np.searchsorted(sorted_codes, sorted_codes, side="left")
+        cycle_no = np.empty(len(codes), dtype=np.int64)
+        cycle_no[order] = self.cycles[sorted_codes] + (np.arange(len(codes)) - starts) + 1
+
+        soh = cycles["capacity_ah"].to_numpy(dtype=np.float64) / self.nominal_capacity_ah
+        ok = np.isfinite(soh)
+        x, y, c = cycle_no[ok].astype(np.float64), soh[ok], codes[ok]
+        for row, weights in enumerate([np.ones_like(x), x, y, x * x, x * y]):
+            self.stats[row] += np.bincount(c, weights=weights, minlength=size)
+        self.cycles += np.bincount(codes, minlength=size)
+
+        # Latest observed value per battery (last row wins)
+        last_rows = order[np.r_[sorted_codes[1:] != sorted_codes[:-1], True]]
+        for name in CYCLE_FEATURES:
+            if name in cycles:
+                self.last[name][codes[last_rows]] = cycles[name].to_numpy(dtype=np.float64)[last_rows]
+        return self
+
+    def predict(self, battery_ids=None):
+        """State of health, fade rate and remaining useful cycles per battery"""
+        idx = np.arange(len(self.battery_ids)) if battery_ids is None else self.battery_ids.get_indexer(battery_ids)
+        n, sx, sy, sxx, sxy = self.stats[:, idx]
+        cycles = self.cycles[idx].astype(np.float64)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            denom = n * sxx - sx * sx
+            slope = np.where((n >= 3) & (denom > 0), (n * sxy - sx * sy) / denom, 0.0)
+            intercept = np.where(n > 0, (sy - slope * sx) / n, np.nan)
+            soh_now = intercept + slope * cycles
+            eol_cycle = (self.end_of_life_soh - intercept) / slope
+            remaining = np.where(slope < 0, eol_cycle - cycles, MAX_FORECAST_CYCLES)
+        remaining = np.where(np.isfinite(remaining), remaining, MAX_FORECAST_CYCLES)
+        remaining = np.where(soh_now <= self.end_of_life_soh, 0, np.clip(remaining, 0, MAX_FORECAST_CYCLES))
+
+        status = np.select(
+            [remaining < 25, remaining < 100],
+            ["🔴 Replace Soon", "🟡 Plan Replacement"],
+            default="🟢 Healthy",
+        )
+        return pd.DataFrame({
+            "battery_id": self.battery_ids[idx],
+            "cycles": cycles.astype(np.int64),
+            "state_of_health": soh_now,
+            "fade_per_100_cycles": -slope * 100,
+            "resistance_ohm": self.last["resistance_ohm"][idx],
+            "temp_max": self.last["temp_max"][idx],
+            "remaining_cycles": np.floor(remaining).astype(np.int64),
+            "status": status,
+        })
+
+# ================= SIMULATED FLEET =================
+def simulate_fleet_cycles(n_batteries=10_000, max_cycles=400, seed=42):
+    """Synthetic per-cycle features for a fleet, in flight order"""
+    rng = np.random.default_rng(seed)
+    n_cycles = rng.integers(10, max_cycles, n_batteries)
+    battery = np.repeat(np.array([f"BAT-{i:05d}" for i in range(n_batteries)], dtype=object), n_cycles)
+    cycle = np.concatenate([np.arange(1, k + 1) for k in n_cycles])
+    fade = np.repeat(rng.uniform(0.0001, 0.0007, n_batteries), n_cycles)
+
+    soh = 1.0 - fade * cycle + rng.normal(0, 0.01, len(cycle))
+    resistance = 0.012 + 0.00004 * cycle * (fade / 0.0006) + rng.normal(0, 0.001, len(cycle))
+    frame = pd.DataFrame({
+        "battery_id": battery,
+        "capacity_ah": NOMINAL_CAPACITY_AH * soh,
+        "resistance_ohm": resistance,
+        "voltage_sag": resistance * 18,
+        "temp_max": 40 + 200 * resistance + rng.normal(0, 1, len(cycle)),
+        "temp_rise": 12 + 150 * resistance + rng.normal(0, 1, len(cycle)),
+    })
+    return frame
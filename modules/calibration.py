@@ -0,0 +1,152 @@
+# modules/calibration.py - SENSOR CALIBRATION REGISTRY
+import numpy as np
+import pandas as pd
+
+from modules.scoring import SENSOR_LEVELS
+
+# Share of the calibration validity window used up at which each level ends:
+# < 25% Excellent, < 60% Good, < 100% Marginal, otherwise Expired
+VALIDITY_THRESHOLDS = [0.25, 0.60, 1.0]
+DEFAULT_VALID_DAYS = 180
+
+EVENT_COLUMNS = ["sensor_id", "calibrated_at", "valid_days"]
+
+# Composite key = sensor code in the high bits, epoch seconds in the low 33 bits
+_TIME_BITS = 33
+
+
+def _epoch_seconds(timestamps):
+    ts = pd.to_datetime(np.asarray(timestamps).ravel(), utc=True).tz_localize(None)
+    return ts.to_numpy(dtype="datetime64[s]").astype(np.int64)
+
+
+class CalibrationRegistry:
+    """Per-sensor calibration events with vectorized status lookup.
+
+    Events are compiled into a single sorted int64 key array
+    (sensor code, calibration time), so the status of millions of
+    (sensor, timestamp) pairs resolves with one `searchsorted`.
+    """
+
+    def __init__(self, events=None):
+        self._events = pd.DataFrame(columns=EVENT_COLUMNS)
+        self._compiled = None
+        if events is not None:
+            self.add_events(events)
+
+    def __len__(self):
+        return len(self._events)
+
+    @property
+    def sensors(self):
+        return self._compile()["sensors"]
+
+    def add_events(self, events):
+        """Append calibration events (sensor_id, calibrated_at, optional valid_days)"""
+        events = pd.DataFrame(events).copy()
+        missing = [c for c in EVENT_COLUMNS[:2] if c not in events]
+        if missing:
+            raise ValueError(f"Calibration events missing columns: {', '.join(missing)}")
+        if "valid_days" not in events:
+            events["valid_days"] = DEFAULT_VALID_DAYS
+        events["calibrated_at"] = pd.to_datetime(events["calibrated_at"], utc=True).dt.tz_localize(None)
+        events = events[EVENT_COLUMNS]
+        self._events = events if self._events.empty else pd.concat([self._events, events], ignore_index=True)
+        self._compiled = None
+
+    def record_calibration(self, sensor_id, calibrated_at, valid_days=DEFAULT_VALID_DAYS):
+        self.add_events([{"sensor_id": sensor_id, "calibrated_at": calibrated_at, "valid_days": valid_days}])
+
+    def _compile(self):
+        if self._compiled is None:
+            codes, sensors = pd.factorize(self._events["sensor_id"], sort=True)
+            codes = codes.astype(np.int64)
+            seconds = _epoch_seconds(self._events["calibrated_at"])
+            keys = (codes << _TIME_BITS) | seconds
+            order = np.argsort(keys, kind="stable")
+            self._compiled = {
+                "sensors": pd.Index(sensors),
+                "keys": keys[order],
+                "codes": codes[order],
+                "seconds": seconds[order],
+                "valid_seconds": self._events["valid_days"].to_numpy(dtype=np.float64)[order] * 86400,
+            }
+        return self._compiled
+
+    def resolve(self, sensor_ids, timestamps):
+        """Calibration level per (sensor, mission timestamp).
+
+        Uses the latest calibration at or before the mission. Unknown
+        sensors and missions before any calibration resolve to Expired.
+        Returns a DataFrame with last calibration time, its validity window,
+        days since calibration and the level.
+        """
+        compiled = self._compile()
+        seconds = _epoch_seconds(timestamps)
+        codes = compiled["sensors"].get_indexer(np.asarray(sensor_ids).ravel()).astype(np.int64)
+        found = codes >= 0
+        pos = np.zeros(len(seconds), dtype=np.int64)
+
+        if len(compiled["keys"]):
+            query = (np.where(found, codes, 0) << _TIME_BITS) | seconds
+            pos = np.searchsorted(compiled["keys"], query, side="right") - 1
+            found &= pos >= 0
+            pos = np.clip(pos, 0, None)
+            found &= compiled["codes"][pos] == codes
+
+        last = np.where(found, compiled["seconds"][pos] if len(compiled["keys"]) else 0, 0)
+        elapsed = np.where(found, seconds - last, np.nan)
+        valid = compiled["valid_seconds"][pos] if len(compiled["keys"]) else np.ones(len(seconds))
+        used = np.where(found, elapsed / valid, np.inf)
+
+        level = np.asarray(SENSOR_LEVELS[::-1], dtype=object)[
+            np.searchsorted(VALIDITY_THRESHOLDS, used, side="right")
+        ]
+        return pd.DataFrame({
+            "last_calibrated": pd.Series(last.astype("datetime64[s]")).where(found),
+            "valid_days": np.where(found, valid / 86400, np.nan),
+            "days_since_calibration": elapsed / 86400,
+            "sensor_calibration": level,
+        })
+
+    def latest(self):
+        """Most recent calibration per sensor (indexed by sensor_id)"""
+        compiled = self._compile()
+        codes = compiled["codes"]
+        last = np.flatnonzero(np.r_[codes[1:] != codes[:-1], True]) if len(codes) else np.empty(0, dtype=np.int64)
+        return pd.DataFrame({
+            "last_calibrated": compiled["seconds"][last].astype("datetime64[s]"),
+            "valid_days": compiled["valid_seconds"][last] / 86400,
+        }, index=compiled["sensors"][codes[last]].rename("sensor_id"))
+
+    def enrich(self, missions, sensor_col="sensor_id", time_col="timestamp"):
+        """Return a copy of `missions` with sensor_calibration resolved from the registry"""
+        status = self.resolve(missions[sensor_col], missions[time_col])
+        enriched = missions.copy()
+        enriched["sensor_calibration"] = status["sensor_calibration"].to_numpy()
+        enriched["days_since_calibration"] = status["days_since_calibration"].to_numpy()
+        return enriched
+
+    def save(self, path):
+        self._events.to_parquet(path, index=False)
+
+    @classmethod
+    def load(cls, path):
+        return cls(pd.read_parquet(path))
+
+
+def simulate_calibration_events(n_sensors=500, start="2023-01-01", end="2024-12-31", seed=42):
+    """Synthetic calibration history: each sensor recalibrated every few months"""
+    rng = np.random.default_rng(seed)
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    span_days = (end - start).days
+    sensor_ids = np.array([f"SNS-{i:04d}" for i in range(n_sensors)])
+
+    counts = rng.integers(2, 8, n_sensors)
+    sensor = np.repeat(sensor_ids, counts)
+    offsets = rng.uniform(0, span_days, counts.sum())
+    return pd.DataFrame({
+        "sensor_id": sensor,
+        "calibrated_at": start + pd.to_timedelta(offsets, unit="D"),
+        "valid_days": rng.choice([90, 180, 365], counts.sum(), p=[0.2, 0.6, 0.2]),
+    })
@@ -0,0 +1,163 @@
+# modules/calibration_scheduler.py - PREDICTIVE CALIBRATION SCHEDULER
+import heapq
+import numpy as np
+import pandas as pd
+
+# QC score (0-100) below which a sensor needs recalibration
+QC_THRESHOLD = 70.0
+MIN_DRIFT_SAMPLES = 3
+
+
+class CalibrationScheduler:
+    """Fleet calibration queue ordered by predicted due date.
+
+    Drift is a per-sensor linear fit of QC score against days since the
+    last calibration, kept as running sums that reset on recalibration.
+    The queue is a heap with lazy invalidation: a new mission only
+    re-scores its own sensor and pushes one entry (O(log n)); superseded
+    entries are skipped when popped.
+    """
+
+    def __init__(self, registry, qc_threshold=QC_THRESHOLD):
+        self.registry = registry
+        self.qc_threshold = qc_threshold
+        self._sensors = {}   # sensor_id -> drift state
+        self._heap = []      # (due_seconds, version, sensor_id)
+        self._version = 0
+
+    def __len__(self):
+        return len(self._sensors)
+
+    # ================= BULK LOAD =================
+    def load_history(self, qc_history):
+        """Seed drift state from historical QC outcomes (sensor_id, timestamp, qc_score)"""
+        status = self.registry.resolve(qc_history["sensor_id"], qc_history["timestamp"])
+        history = pd.DataFrame({
+            "sensor_id": np.asarray(qc_history["sensor_id"]),
+            "last_calibrated": status["last_calibrated"].to_numpy(),
+            "valid_days": status["valid_days"].to_numpy(),
+            "x": status["days_since_calibration"].to_numpy(),
+            "y": np.asarray(qc_history["qc_score"], dtype=np.float64),
+        }).dropna(subset=["last_calibrated"])
+
+        # Only missions since each sensor's latest calibration describe its current drift
+        latest = self.registry.latest()
+        current = latest["last_calibrated"].reindex(history["sensor_id"]).to_numpy()
+        history = history[history["last_calibrated"].to_numpy() == current]
+
+        sums = history.assign(xx=history["x"] ** 2, xy=history["x"] * history["y"]).groupby("sensor_id").agg(
+            n=("x", "size"), sx=("x", "sum"), sy=("y", "sum"), sxx=("xx", "sum"), sxy=("xy", "sum"),
+        )
+        for sensor_id, last_cal, valid_days in zip(latest.index, latest["last_calibrated"], latest["valid_days"]):
+            row = sums.loc[sensor_id] if sensor_id in sums.index else None
+            self._sensors[sensor_id] = {
+                "last_calibrated": pd.Timestamp(last_cal),
+                "valid_days": float(valid_days),
+                "n": 0 if row is None else int(row["n"]),
+                "sx": 0.0 if row is None else float(row["sx"]),
+                "sy": 0.0 if row is None else float(row["sy"]),
+                "sxx": 0.0 if row is None else float(row["sxx"]),
+                "sxy": 0.0 if row is None else float(row["sxy"]),
+            }
+            self._reschedule(sensor_id)
+        return self
+
+    # ================= INCREMENTAL UPDATES =================
+    def record_mission(self, sensor_id, timestamp, qc_score):
+        """Fold one mission's QC outcome into its sensor's drift and re-queue that sensor only"""
+        state = self._sensors.get(sensor_id)
+        if state is None:
+            return
+        x = (pd.Timestamp(timestamp) - state["last_calibrated"]) / pd.Timedelta(days=1)
+        if x < 0:
+            return
+        state["n"] += 1
+        state["sx"] += x
+        state["sy"] += qc_score
+        state["sxx"] += x * x
+        state["sxy"] += x * qc_score
+        self._reschedule(sensor_id)
+
+    def record_calibration(self, sensor_id, calibrated_at, valid_days=180):
+        """Register a recalibration: drift history for the sensor starts over"""
+        self.registry.record_calibration(sensor_id, calibrated_at, valid_days)
+        self._sensors[sensor_id] = {
+            "last_calibrated": pd.Timestamp(calibrated_at), "valid_days": float(valid_days),
+            "n": 0, "sx": 0.0, "sy": 0.0, "sxx": 0.0, "sxy": 0.0,
+        }
+        self._reschedule(sensor_id)
+
+    def _predict(self, state):
+        expiry_days = state["valid_days"]
+        n = state["n"]
+        drift = np.nan
+        due_days, reason = expiry_days, "Calibration expiry"
+        if n >= MIN_DRIFT_SAMPLES:
+            denom = n * state["sxx"] - state["sx"] ** 2
+            if denom > 0:
+                drift = (n * state["sxy"] - state["sx"] * state["sy"]) / denom
+                intercept = (state["sy"] - drift * state["sx"]) / n
+                if drift < 0:
+                    predicted = (self.qc_threshold - intercept) / drift
+                    if predicted < due_days:
+                        due_days, reason = max(predicted, 0.0), "Predicted QC drift"
+        return due_days, drift, reason
+
+    def _reschedule(self, sensor_id):
+        state = self._sensors[sensor_id]
+        due_days, drift, reason = self._predict(state)
+        due = state["last_calibrated"] + pd.Timedelta(days=due_days)
+        self._version += 1
+        state.update(due=due, drift=drift, reason=reason, version=self._version)
+        heapq.heappush(self._heap, (due.value, self._version, sensor_id))
+        # Drop superseded entries once they dominate the heap
+        if len(self._heap) > 4 * len(self._sensors):
+            self._compact()
+
+    # ================= QUEUE =================
+    def queue(self, k=10, as_of=None):
+        """The k sensors due soonest, as an ordered DataFrame"""
+        as_of = pd.Timestamp.now() if as_of is None else pd.Timestamp(as_of)
+        popped, rows = [], []
+        while self._heap and len(rows) < k:
+            entry = heapq.heappop(self._heap)
+            _, version, sensor_id = entry
+            state = self._sensors.get(sensor_id)
+            if state is None or state["version"] != version:
+                continue  # superseded by a newer schedule for this sensor
+            popped.append(entry)
+            rows.append({
+                "sensor_id": sensor_id,
+                "due_date": state["due"],
+                "days_until_due": (state["due"] - as_of) / pd.Timedelta(days=1),
+                "qc_drift_per_30d": state["drift"] * 30,
+                "last_calibrated": state["last_calibrated"],
+                "reason": state["reason"],
+            })
+        for entry in popped:
+            heapq.heappush(self._heap, entry)
+        return pd.DataFrame(rows, columns=["sensor_id", "due_date", "days_until_due", "qc_drift_per_30d",
+                                           "last_calibrated", "reason"])
+
+    def _compact(self):
+        self._heap = [(s["due"].value, s["version"], sid) for sid, s in self._sensors.items()]
+        heapq.heapify(self._heap)
+
+# ================= SIMULATED QC HISTORY =================
+def simulate_qc_history(registry, n_missions=200_000, start="2023-01-01", end="2024-12-31", seed=42):
+    """Synthetic QC outcomes that degrade with time since each sensor's last calibration"""
+    rng = np.random.default_rng(seed)
+    sensors = registry.sensors.to_numpy()
+    drift_rate = pd.Series(rng.uniform(0.02, 0.25, len(sensors)), index=sensors)
+
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    sensor_ids = sensors[rng.integers(0, len(sensors), n_missions)]
+    timestamps = start + pd.to_timedelta(rng.uniform(0, (end - start).days, n_missions), unit="D")
+    status = registry.resolve(sensor_ids, timestamps)
+    days = status["days_since_calibration"].fillna(365).to_numpy()
+    qc = 95 - drift_rate.reindex(sensor_ids).to_numpy() * days + rng.normal(0, 3, n_missions)
+    return pd.DataFrame({
+        "sensor_id": sensor_ids,
+        "timestamp": timestamps,
+        "qc_score": np.clip(qc, 0, 100),
+    }).sort_values("timestamp", ignore_index=True)
@@ -0,0 +1,169 @@
+# modules/client_profiles.py - PER-CLIENT CONFIGURATION PROFILES WITH HOT RELOAD
+import os
+import glob
+import json
+import threading
+import numpy as np
+import pandas as pd
+from watchdog.observers import Observer
+from watchdog.events import EVENT_TYPE_CLOSED, EVENT_TYPE_CREATED, EVENT_TYPE_DELETED, \
+    EVENT_TYPE_MODIFIED, EVENT_TYPE_MOVED, FileSystemEventHandler
+
+from modules.scoring import ASSET_TYPES
+from modules.rules import load_rules
+from modules.prioritization import ASSET_IMPORTANCE_LEVELS, IMPORTANCE_WEIGHTS
+
+PROFILES_DIR = os.environ.get(
+    "SKYLARK_PROFILES_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "clients"),
+)
+DEFAULT_PROFILE = "default"
+# Watch events that can change a file's content (reading the files during a reload fires
+# opened / closed-no-write events, which must not trigger another reload)
+RELOAD_EVENTS = {EVENT_TYPE_CREATED, EVENT_TYPE_MODIFIED, EVENT_TYPE_DELETED, EVENT_TYPE_MOVED, EVENT_TYPE_CLOSED}
+# Sections a client file may override key by key; anything it omits comes from default.json
+# (asset_importance holds importance levels; unset assets keep ASSET_IMPORTANCE_LEVELS)
+SECTIONS = ["asset_offsets", "asset_importance", "asset_details", "insight_thresholds"]
+NUMERIC_SECTIONS = ["asset_offsets", "insight_thresholds"]
+
+
+class ClientProfile:
+    """One client's settings, resolved over the default profile and precompiled.
+
+    Asset offsets and importance become arrays in ASSET_TYPES order and
+    the insight rules are compiled with the client's thresholds once, at
+    load time, so a request only pays for a code lookup and a gather.
+    Importance is given as a level; `importance_levels` keeps the levels
+    for display and `asset_importance` their ranking weights.
+    """
+
+    def __init__(self, name, spec, rules):
+        self.name = name
+        self.label = spec.get("label", name)
+        for section in SECTIONS:
+            setattr(self, section, dict(spec.get(section, {})))
+        unknown = (set(self.asset_offsets) | set(self.asset_importance)) - set(ASSET_TYPES)
+        if unknown:
+            raise ValueError(f"Profile {name!r}: unknown asset types {sorted(unknown)}")
+        self.importance_levels = {**ASSET_IMPORTANCE_LEVELS, **self.asset_importance}
+        bad = sorted({str(level) for level in self.importance_levels.values()} - set(IMPORTANCE_WEIGHTS))
+        if bad:
+            raise ValueError(f"Profile {name!r}: unknown importance levels {bad}; expected one of {list(IMPORTANCE_WEIGHTS)}")
+        self.asset_importance = {a: IMPORTANCE_WEIGHTS[level] for a, level in self.importance_levels.items()}
+
+        self.offset_table = np.array([self.asset_offsets.get(a, 0.0) for a in ASSET_TYPES], dtype=np.float64)
+        self.importance_table = np.array([self.asset_importance[a] for a in ASSET_TYPES], dtype=np.float64)
+        self.insight_rules = rules.compile(thresholds=self.insight_thresholds)
+
+    def _codes(self, asset_types):
+        codes = pd.Categorical(np.asarray(asset_types, dtype=object), categories=ASSET_TYPES).codes
+        if (codes < 0).any():
+            raise ValueError(f"Unknown asset type; expected one of {ASSET_TYPES}")
+        return codes
+
+    def offsets(self, asset_types):
+        """Client score offset per mission, added to the engine's asset adjustment"""
+        return self.offset_table[self._codes(asset_types)]
+
+    def importance(self, asset_types):
+        return self.importance_table[self._codes(asset_types)]
+
+    def asset_adjustments(self, base):
+        """Engine asset adjustments (e.g. the learned ones) shifted by this client's offsets"""
+        return {asset: base[asset] + offset for asset, offset in zip(ASSET_TYPES, self.offset_table)}
+
+
+def _read_profiles(directory, rules):
+    specs = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        with open(path) as f:
+            specs[os.path.splitext(os.path.basename(path))[0]] = json.load(f)
+    if DEFAULT_PROFILE not in specs:
+        raise FileNotFoundError(f"No {DEFAULT_PROFILE}.json in {directory}")
+
+    for name, spec in specs.items():
+        if not isinstance(spec, dict):
+            raise ValueError(f"Profile {name!r}: expected a JSON object, got {type(spec).__name__}")
+        for section in SECTIONS:
+            values = spec.get(section, {})
+            if not isinstance(values, dict):
+                raise ValueError(f"Profile {name!r}: {section} must be a JSON object, got {type(values).__name__}")
+            if section in NUMERIC_SECTIONS:
+                bad = [key for key, value in values.items()
+                       if isinstance(value, bool) or not isinstance(value, (int, float))]
+                if bad:
+                    raise ValueError(f"Profile {name!r}: {section} values must be numbers ({', '.join(bad)})")
+
+    base = specs[DEFAULT_PROFILE]
+    profiles = {}
+    for name, spec in specs.items():
+        merged = {"label": spec.get("label", name)}
+        for section in SECTIONS:
+            merged[section] = {**base.get(section, {}), **spec.get(section, {})}
+        profiles[name] = ClientProfile(name, merged, rules)
+    return profiles
+
+
+class _ReloadHandler(FileSystemEventHandler):
+    def __init__(self, registry):
+        self.registry = registry
+
+    def on_any_event(self, event):
+        if event.event_type not in RELOAD_EVENTS or event.is_directory:
+            return
+        paths = [event.src_path, getattr(event, "dest_path", "")]
+        if any(str(p).endswith(".json") for p in paths):
+            self.registry.reload()
+
+
+class ProfileRegistry:
+    """In-process cache of client profiles, hot-reloaded when config/clients/*.json change.
+
+    Readers take the current profile map without locking; a reload
+    builds and compiles a complete new map off to the side and swaps it
+    in with one assignment. A file that fails to parse or validate
+    leaves the previous profiles in service and is reported in `error`.
+    """
+
+    def __init__(self, directory=PROFILES_DIR, rules=None, watch=True):
+        self.directory = directory
+        self.rules = rules or load_rules()
+        self.version = 0
+        self.error = None
+        self._lock = threading.Lock()  # serialises reloads, never readers
+        self._profiles = _read_profiles(directory, self.rules)
+        self._observer = None
+        if watch:
+            self._observer = Observer()
+            self._observer.schedule(_ReloadHandler(self), directory, recursive=False)
+            self._observer.daemon = True
+            self._observer.start()
+
+    @property
+    def names(self):
+        return list(self._profiles)
+
+    def get(self, name=None):
+        profiles = self._profiles
+        if name is None:
+            return profiles[DEFAULT_PROFILE]
+        if name not in profiles:
+            raise KeyError(f"Unknown client profile {name!r}; expected one of {list(profiles)}")
+        return profiles[name]
+
+    def reload(self):
+        with self._lock:
+            try:
+                profiles = _read_profiles(self.directory, self.rules)
+            except Exception as exc:  # runs on the watcher thread: any bad file must not stop it
+                self.error = f"{type(exc).__name__}: {exc}"
+                return False
+            self._profiles = profiles
+            self.version += 1
+            self.error = None
+            return True
+
+    def close(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
@@ -0,0 +1,196 @@
+# modules/context.py - WEATHER & LIGHTING CONTEXT PROVIDER
+import os
+import glob
+import numpy as np
+import pandas as pd
+
+from modules.scoring import LIGHTING_LEVELS
+
+# Weather tiles follow the common 0.25° reanalysis grid
+TILE_DEG = 0.25
+N_LAT_TILES = int(180 / TILE_DEG)
+N_LON_TILES = int(360 / TILE_DEG)
+
+# Sun elevation (degrees) at which each lighting level starts
+LIGHTING_THRESHOLDS = [10, 25, 45]
+
+# ================= SOLAR POSITION =================
+def _to_datetime64(timestamps):
+    # Naive timestamps are treated as UTC
+    ts = pd.to_datetime(np.asarray(timestamps).ravel(), utc=True)
+    return ts.tz_localize(None).to_numpy(dtype="datetime64[ns]")
+
+
+def solar_elevation(timestamps, lat, lon):
+    """Vectorized sun elevation angle (degrees) for UTC timestamps and coordinates.
+
+    Low-precision NOAA/Astronomical Almanac formulation, accurate to about
+    0.01° between 1950 and 2050, which is ample for lighting classes.
+    """
+    ts = _to_datetime64(timestamps)
+    n = (ts - np.datetime64("2000-01-01T12:00:00")) / np.timedelta64(1, "D")
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.asarray(lon, dtype=np.float64)
+
+    mean_long = np.mod(280.460 + 0.9856474 * n, 360)
+    mean_anom = np.radians(np.mod(357.528 + 0.9856003 * n, 360))
+    ecl_long = np.radians(mean_long + 1.915 * np.sin(mean_anom) + 0.020 * np.sin(2 * mean_anom))
+    obliquity = np.radians(23.439 - 0.0000004 * n)
+
+    right_asc = np.arctan2(np.cos(obliquity) * np.sin(ecl_long), np.cos(ecl_long))
+    declination = np.arcsin(np.sin(obliquity) * np.sin(ecl_long))
+
+    gmst_hours = np.mod(18.697374558 + 24.06570982441908 * n, 24)
+    hour_angle = np.radians(gmst_hours * 15 + lon) - right_asc
+
+    sin_elev = (np.sin(lat) * np.sin(declination)
+                + np.cos(lat) * np.cos(declination) * np.cos(hour_angle))
+    return np.degrees(np.arcsin(np.clip(sin_elev, -1, 1)))
+
+
+def lighting_from_elevation(elevation):
+    """Map sun elevation (degrees) to the engine's lighting levels"""
+    codes = np.searchsorted(LIGHTING_THRESHOLDS, np.asarray(elevation), side="right")
+    return np.asarray(LIGHTING_LEVELS, dtype=object)[codes]
+
+# ================= TILE / HOUR KEYS =================
+def tile_hour_keys(timestamps, lat, lon):
+    """int64 cache key per (0.25° tile, UTC hour)"""
+    hours = _to_datetime64(timestamps).astype("datetime64[h]").astype(np.int64)
+    i = np.clip(np.floor((np.asarray(lat) + 90) / TILE_DEG), 0, N_LAT_TILES - 1).astype(np.int64)
+    j = np.mod(np.floor((np.asarray(lon) + 180) / TILE_DEG), N_LON_TILES).astype(np.int64)
+    return (hours * N_LAT_TILES + i) * N_LON_TILES + j
+
+
+def _decode_keys(keys):
+    j = keys % N_LON_TILES
+    i = (keys // N_LON_TILES) % N_LAT_TILES
+    hours = keys // (N_LON_TILES * N_LAT_TILES)
+    # Tile centres
+    lat = (i + 0.5) * TILE_DEG - 90
+    lon = (j + 0.5) * TILE_DEG - 180
+    return hours.astype("datetime64[h]"), lat, lon
+
+# ================= WEATHER STORE =================
+class WeatherStore:
+    """Hourly wind per tile read from local Parquet/CSV files.
+
+    Files hold `time` (UTC hour), `lat`, `lon` and `wind_speed` (km/h).
+    Everything is loaded into one sorted key array so lookups are a
+    single `searchsorted`.
+    """
+
+    def __init__(self, path):
+        files = sorted(glob.glob(os.path.join(path, "*.parquet")) + glob.glob(os.path.join(path, "*.csv")))
+        if not files:
+            raise FileNotFoundError(f"No weather files found in {path}")
+        frames = [pd.read_parquet(f) if f.endswith(".parquet") else pd.read_csv(f, parse_dates=["time"])
+                  for f in files]
+        weather = pd.concat(frames, ignore_index=True)
+
+        keys = tile_hour_keys(weather["time"], weather["lat"], weather["lon"])
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.wind_speed = weather["wind_speed"].to_numpy(dtype=np.float32)[order]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup_wind(self, keys):
+        """Wind speed per key, NaN where the store has no observation"""
+        keys = np.asarray(keys, dtype=np.int64)
+        pos = np.clip(np.searchsorted(self.keys, keys), 0, len(self.keys) - 1)
+        found = self.keys[pos] == keys
+        return np.where(found, self.wind_speed[pos], np.nan)
+
+
+def write_synthetic_weather_store(path, lat_range=(8.0, 30.0), lon_range=(68.0, 90.0),
+                                  start="2024-01-01", days=30, seed=42):
+    """File-based weather stand-in: one Parquet file per day of hourly wind per tile"""
+    os.makedirs(path, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    lats = np.arange(lat_range[0], lat_range[1], TILE_DEG) + TILE_DEG / 2
+    lons = np.arange(lon_range[0], lon_range[1], TILE_DEG) + TILE_DEG / 2
+    grid_lat, grid_lon = [g.ravel() for g in np.meshgrid(lats, lons, indexing="ij")]
+    base_wind = rng.gamma(3, 4, len(grid_lat))
+
+    for day in pd.date_range(start, periods=days, freq="D"):
+        hours = pd.date_range(day, periods=24, freq="h").to_numpy()
+        # Afternoon winds pick up, with per-tile noise
+        diurnal = 1 + 0.4 * np.sin((np.arange(24) - 9) / 24 * 2 * np.pi)
+        wind = base_wind[None, :] * diurnal[:, None] * rng.lognormal(0, 0.2, (24, len(grid_lat)))
+        pd.DataFrame({
+            "time": np.repeat(hours, len(grid_lat)),
+            "lat": np.tile(grid_lat, 24).astype(np.float32),
+            "lon": np.tile(grid_lon, 24).astype(np.float32),
+            "wind_speed": np.clip(wind, 0, 80).ravel().astype(np.float32),
+        }).to_parquet(os.path.join(path, f"wind_{day:%Y%m%d}.parquet"), index=False)
+    return path
+
+# ================= CONTEXT PROVIDER =================
+class ContextProvider:
+    """Lighting and wind context per mission, cached by (tile, hour).
+
+    Work is done once per distinct (tile, hour) in a batch and kept in a
+    sorted-array cache, so enriching millions of missions costs a handful
+    of vectorized passes rather than per-row calls.
+    """
+
+    def __init__(self, weather_store, default_wind=np.nan):
+        self.weather_store = weather_store
+        self.default_wind = default_wind
+        self._keys = np.empty(0, dtype=np.int64)
+        self._elevation = np.empty(0, dtype=np.float32)
+        self._wind = np.empty(0, dtype=np.float32)
+        self.hits = 0
+        self.misses = 0
+
+    def cache_size(self):
+        return len(self._keys)
+
+    def _context_for_keys(self, keys):
+        pos = np.clip(np.searchsorted(self._keys, keys), 0, max(len(self._keys) - 1, 0))
+        cached = (self._keys[pos] == keys) if len(self._keys) else np.zeros(len(keys), dtype=bool)
+        self.hits += int(cached.sum())
+        self.misses += int((~cached).sum())
+
+        new_keys = keys[~cached]
+        if len(new_keys):
+            hours, lat, lon = _decode_keys(new_keys)
+            # Sun position at the middle of the hour over the tile centre
+            elevation = solar_elevation(hours + np.timedelta64(30, "m"), lat, lon).astype(np.float32)
+            wind = self.weather_store.lookup_wind(new_keys).astype(np.float32)
+
+            merged = np.concatenate([self._keys, new_keys])
+            order = np.argsort(merged, kind="stable")
+            self._keys = merged[order]
+            self._elevation = np.concatenate([self._elevation, elevation])[order]
+            self._wind = np.concatenate([self._wind, wind])[order]
+            pos = np.searchsorted(self._keys, keys)
+
+        return self._elevation[pos], self._wind[pos]
+
+    def sun_and_wind(self, timestamps, lat, lon):
+        """Sun elevation and wind speed arrays for each (timestamp, lat, lon)"""
+        keys = tile_hour_keys(timestamps, lat, lon)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        elevation, wind = self._context_for_keys(unique_keys)
+        wind = np.where(np.isnan(wind), self.default_wind, wind)
+        return elevation[inverse], wind[inverse]
+
+    def context(self, timestamps, lat, lon):
+        """Sun elevation, lighting level and wind speed for each (timestamp, lat, lon)"""
+        elevation, wind = self.sun_and_wind(timestamps, lat, lon)
+        return pd.DataFrame({
+            "sun_elevation": elevation,
+            "lighting_conditions": lighting_from_elevation(elevation),
+            "wind_speed": wind,
+        })
+
+    def enrich(self, missions, time_col="timestamp", lat_col="lat", lon_col="lon"):
+        """Return a copy of `missions` with lighting and wind columns filled from context"""
+        context = self.context(missions[time_col], missions[lat_col], missions[lon_col])
+        enriched = missions.copy()
+        for column in context:
+            enriched[column] = context[column].to_numpy()
+        return enriched
@@ -1,6 +1,77 @@
 # modules/dmo.py - DMO DEEP DIVE (POLISHED FINAL)
 import streamlit as st
 import pandas as pd
+import os
+import time
+import tempfile
+from modules.telemetry import ingest_flight_log, read_flight
+from modules.battery import BatteryHealthModel, cycle_features_from_files, simulate_fleet_cycles
+from modules.calibration import CalibrationRegistry, simulate_calibration_events
+from modules.calibration_scheduler import CalibrationScheduler, simulate_qc_history
+from modules.anomaly import AnomalyEngine, simulate_qc_observations, PURPOSE_WEIGHTS, DEFAULT_PURPOSE, UNSCORED_LEVEL
+from modules.scoring import ASSET_TYPES
+from modules.mission_store import MissionStore, simulate_mission_batches
+from modules.mission_query import MissionQueryEngine, SAMPLE_QUESTIONS
+from modules.report_index import ReportEmbedder, ReportVectorIndex, simulate_report_chunks
+
+# Per-flight columnar telemetry written by the ingester
+TELEMETRY_DIR = os.environ.get("SKYLARK_TELEMETRY_DIR", os.path.join(tempfile.gettempdir(), "skylark_telemetry"))
+
+# Offline-trained anomaly detectors (trained on first use, then loaded from cache; the folder
+# must be private to this user, since loading the cache unpickles it)
+ANOMALY_MODEL_DIR = os.environ.get("SKYLARK_MODEL_DIR", os.path.join(tempfile.gettempdir(), "skylark_models"))
+ANOMALY_MODEL_PATH = os.path.join(ANOMALY_MODEL_DIR, "anomaly_engine.joblib")
+
+# Mission history store (Parquet segments; seeded with simulated history on first use)
+MISSION_STORE_DIR = os.environ.get("SKYLARK_MISSION_STORE_DIR", os.path.join(tempfile.gettempdir(), "skylark_missions"))
+
+# Embedded vector index over mission report chunks (built from simulated reports on first use)
+REPORT_INDEX_DIR = os.environ.get("SKYLARK_REPORT_INDEX_DIR", os.path.join(tempfile.gettempdir(), "skylark_reports"))
+REPORT_CHUNKS = 200_000
+
+@st.cache_resource(show_spinner="Fitting fleet battery health model...")
+def _battery_model():
+    return BatteryHealthModel().update(simulate_fleet_cycles())
+
+@st.cache_resource(show_spinner="Building sensor calibration schedule...")
+def _calibration_scheduler():
+    registry = CalibrationRegistry(simulate_calibration_events())
+    qc_history = simulate_qc_history(registry)
+    return CalibrationScheduler(registry).load_history(qc_history), qc_history["timestamp"].max()
+
+@st.cache_resource(show_spinner="Loading anomaly detectors...")
+def _anomaly_engine():
+    return AnomalyEngine.load_or_train(ANOMALY_MODEL_PATH, lambda: simulate_qc_observations(200_000, seed=1))
+
+@st.cache_resource(show_spinner="Opening mission history store...")
+def _mission_store():
+    store = MissionStore(MISSION_STORE_DIR)
+    if not len(store):
+        for batch in simulate_mission_batches(1_000_000, 250_000):
+            store.bulk_insert(batch)
+    store.latest()  # builds the indexes once, here rather than on the first query
+    return store
+
+@st.cache_resource
+def _query_engine():
+    return MissionQueryEngine(_mission_store())
+
+@st.cache_resource(show_spinner="Loading mission report index...")
+def _report_search():
+    # Chunk texts are stored with the index, keyed by chunk id, so excerpts always match what was indexed
+    texts_path = os.path.join(REPORT_INDEX_DIR, "chunk_texts.parquet")
+    if os.path.exists(os.path.join(REPORT_INDEX_DIR, "index.json")) and os.path.exists(texts_path):
+        texts = pd.read_parquet(texts_path)["text"]
+        return ReportEmbedder.load(REPORT_INDEX_DIR), ReportVectorIndex(REPORT_INDEX_DIR), texts
+    batches = list(simulate_report_chunks(REPORT_CHUNKS, 50_000))
+    texts = pd.Series([text for _, chunk_texts in batches for text in chunk_texts],
+                      index=pd.Index([i for ids, _ in batches for i in ids], name="chunk_id"), name="text")
+    embedder = ReportEmbedder().fit(texts.iloc[:20_000].tolist())
+    index = ReportVectorIndex.build(REPORT_INDEX_DIR, ((ids, embedder.transform(chunk_texts))
+                                                       for ids, chunk_texts in batches), n_lists=512)
+    embedder.save(REPORT_INDEX_DIR)
+    texts.to_frame().to_parquet(texts_path)
+    return embedder, index, texts
 
 def show_dmo_page():
     st.title("⚙️ Drone Mission Ops (DMO): Product Deep Dive")
@@ -269,6 +340,42 @@ def show_dmo_page():
         - Reduced operational costs
         - More nuanced quality assessment
         """)
+        
+        with st.expander("🧪 Graded Severity Demo (Recent Missions)", expanded=False):
+            col1, col2 = st.columns(2)
+            with col1:
+                anomaly_asset = st.selectbox("Asset Type", ASSET_TYPES, key="anomaly_asset")
+            with col2:
+                purposes = list(PURPOSE_WEIGHTS)
+                anomaly_purpose = st.selectbox(
+                    "Mission Purpose", purposes,
+                    index=purposes.index(DEFAULT_PURPOSE[anomaly_asset]), key="anomaly_purpose"
+                )
+            
+            recent = simulate_qc_observations(500, anomaly_rate=0.08, seed=7).assign(
+                asset_type=anomaly_asset, purpose=anomaly_purpose
+            )
+            graded = recent.join(_anomaly_engine().score(recent))
+            
+            counts = graded["level"].value_counts()
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("🟢 Acceptable", int(counts.get("green", 0)))
+            with col2:
+                st.metric("🟡 Review", int(counts.get("yellow", 0)))
+            with col3:
+                st.metric("🔴 Re-fly Candidate", int(counts.get("red", 0)))
+            if counts.get(UNSCORED_LEVEL, 0):
+                st.warning(f"⚪ {counts[UNSCORED_LEVEL]} missions not graded: no detector trained for {anomaly_asset}")
+            
+            st.dataframe(
+                graded.nlargest(10, "severity")[
+                    ["severity", "level", "driver", "image_quality", "overlap_consistency",
+                     "blur_fraction", "gsd_deviation_pct", "gps_error_m"]
+                ].round(2),
+                hide_index=True,
+                use_container_width=True
+            )
     
         with enhancement_tabs[2]:
          st.markdown("""
@@ -342,39 +449,47 @@ def show_dmo_page():
         """)
         
         # Interactive LLM Demo
-        st.markdown("#### 🎮 **Interactive LLM Demo Concept**")
+        st.markdown("#### 🎮 **Interactive LLM Demo**")
+        st.caption("Answered offline: questions compile to query plans over the mission history store; "
+                   "plans are cached by normalized question text.")
         
-        demo_query = st.selectbox(
-            "Try a sample query (conceptual demo):",
-            [
-                "Which missions had the best image quality last month?",
-                "Compare solar farm inspection results from Q1 vs Q2",
-                "Generate a summary of all mining stockpile missions",
-                "What were the most common QC failures in infrastructure missions?"
-            ]
-        )
+        demo_query = st.selectbox("Try a sample query:", SAMPLE_QUESTIONS)
+        custom_query = st.text_input("...or ask your own:", placeholder="e.g. top 10 windiest missions at site 417 this year")
         
-        if st.button("🔄 Simulate LLM Response", type="secondary"):
-            st.info("""
-            **LLM Response (Simulated):**
-            
-            Based on mission data analysis:
-            
-            **Query:** "Which missions had the best image quality last month?"
-            
-            **Analysis:**
-            - 24 missions completed in March 2024
-            - Image quality scored from 65% to 95%
-            
-            **Top 5 Missions by Image Quality:**
-            1. **M-2024-078** (Solar Farm) - 95% quality score
-            2. **M-2024-082** (Mining Stockpile) - 92% quality score  
-            3. **M-2024-071** (Road Inspection) - 90% quality score
-            4. **M-2024-069** (Building Survey) - 88% quality score
-            5. **M-2024-075** (Power Line) - 87% quality score
-            
-            **Recommendation:** Review mission parameters from M-2024-078 as benchmark.
-            """)
+        if st.button("🔄 Ask Mission History", type="secondary"):
+            question = custom_query.strip() or demo_query
+            try:
+                result = _query_engine().ask(question)
+            except ValueError as exc:
+                st.error(f"Could not plan this question: {exc}")
+            else:
+                st.info(f"**Query:** \"{question}\"\n\n{result['answer']}")
+                if not result["frame"].empty:
+                    st.dataframe(result["frame"].round(3), hide_index=True, use_container_width=True)
+                timings = result["timings"]
+                st.caption(f"Plan ({result['plan']['source']}, {'cached' if result['cached'] else 'compiled'}): "
+                           f"{result['plan']} · plan {timings['plan_ms']:.2f} ms · "
+                           f"execute {timings['execute_ms']:.1f} ms · total {timings['total_ms']:.1f} ms "
+                           f"over {len(_mission_store()):,} missions")
+        
+        # Semantic search over mission reports
+        st.markdown("#### 🔎 **Semantic Search over Mission Reports**")
+        report_query = st.text_input("Describe what you are looking for:", "severe thermal hotspot on solar panels",
+                                     key="report_query")
+        exact_search = st.checkbox("Exact (brute-force) search instead of IVF", key="report_exact")
+        if st.button("Search Reports", key="report_search"):
+            embedder, index, report_texts = _report_search()
+            started = time.perf_counter()
+            chunk_ids, similarity = index.search(embedder.transform([report_query]), 10, exact=exact_search)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            found = chunk_ids[0] >= 0  # IVF pads with -1 when the probed lists hold fewer than 10 chunks
+            st.dataframe(pd.DataFrame({
+                "chunk": chunk_ids[0][found],
+                "similarity": similarity[0][found].round(3),
+                "report excerpt": report_texts.reindex(chunk_ids[0][found]).to_numpy(),
+            }), hide_index=True, use_container_width=True)
+            st.caption(f"Top 10 of {len(index):,} report chunks ({index.meta['dtype']} memory-mapped vectors, "
+                       f"{'brute force' if exact_search else 'IVF'}) in {elapsed_ms:.1f} ms, embedding included")
         
         # ROI Calculation
         st.markdown("""
@@ -424,6 +539,82 @@ def show_dmo_page():
         - Lower maintenance costs
         - Higher asset utilization
         """)
+        
+        # Telemetry ingestion feeding the predictive models
+        with st.expander("📥 Telemetry Ingestion (Flight Logs)", expanded=False):
+            st.markdown("""
+            Upload a high-rate flight log (**CSV** or fixed-record **.bin**). It is streamed in chunks,
+            downsampled to 1 Hz and stored as a per-flight columnar (Parquet) file.
+            """)
+            log_file = st.file_uploader("Flight log", type=["csv", "bin"])
+            battery_id = st.text_input("Battery ID", value="BAT-00001")
+            
+            if log_file is not None and st.button("⚙️ Ingest Flight Log"):
+                suffix = os.path.splitext(log_file.name)[1]
+                with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+                    tmp.write(log_file.getvalue())
+                try:
+                    stats = ingest_flight_log(
+                        tmp.name, TELEMETRY_DIR,
+                        flight_id=os.path.splitext(log_file.name)[0], battery_id=battery_id
+                    )
+                except Exception as e:
+                    st.error(f"❌ Could not ingest flight log: {str(e)}")
+                else:
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("Samples Ingested", f"{stats['rows_in']:,}", delta=f"{stats['rows_out']:,} at 1 Hz", delta_color="off")
+                    with col2:
+                        st.metric("Throughput", f"{stats['mb_per_sec']:.0f} MB/s", delta=f"{stats['input_mb']:.1f} MB log", delta_color="off")
+                    with col3:
+                        st.metric("Stored Size", f"{stats['output_mb']:.2f} MB", delta="Parquet (zstd)", delta_color="off")
+                    
+                    flight = read_flight(stats["output"], columns=["time", "voltage", "current", "battery_temp"])
+                    st.line_chart(flight.set_index("time"), height=250)
+                    
+                    # Partial update of the fleet battery model with this flight
+                    model = _battery_model()
+                    if stats["flight_id"] in model.flight_ids:
+                        st.info(f"🔋 Flight {stats['flight_id']} is already counted in the battery model")
+                    else:
+                        model.update(cycle_features_from_files([stats["output"]]))
+                        st.success(f"🔋 Battery model updated with flight {stats['flight_id']} for {battery_id}")
+                finally:
+                    os.remove(tmp.name)
+        
+        with st.expander("🔋 Battery Health Prediction (Fleet)", expanded=False):
+            fleet = _battery_model().predict()
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Batteries Tracked", f"{len(fleet):,}")
+            with col2:
+                st.metric("Replace Soon", f"{(fleet['remaining_cycles'] < 25).sum():,}", delta="< 25 cycles left", delta_color="off")
+            with col3:
+                st.metric("Median Remaining Cycles", f"{fleet['remaining_cycles'].median():.0f}")
+            
+            st.markdown("**Batteries closest to end of life**")
+            st.dataframe(
+                fleet.nsmallest(10, ["remaining_cycles"]).assign(
+                    state_of_health=lambda df: (df["state_of_health"] * 100).round(1)
+                ),
+                hide_index=True,
+                use_container_width=True
+            )
+        
+        with st.expander("🛠️ Sensor Calibration Schedule (Fleet)", expanded=False):
+            scheduler, as_of = _calibration_scheduler()
+            st.caption(f"Predicted from QC drift since each sensor's last calibration • as of {as_of:%Y-%m-%d}")
+            calibration_queue = scheduler.queue(15, as_of=as_of)
+            st.dataframe(
+                calibration_queue.assign(
+                    due_date=lambda df: df["due_date"].dt.strftime("%Y-%m-%d"),
+                    last_calibrated=lambda df: df["last_calibrated"].dt.strftime("%Y-%m-%d"),
+                    days_until_due=lambda df: df["days_until_due"].round(0),
+                    qc_drift_per_30d=lambda df: df["qc_drift_per_30d"].round(2),
+                ),
+                hide_index=True,
+                use_container_width=True
+            )
     
     with enhancement_tabs[4]:
         st.markdown("""
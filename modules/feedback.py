@@ -0,0 +1,159 @@
+# modules/feedback.py - HUMAN-FEEDBACK LEARNING LOOP FOR CONFIDENCE WEIGHTS
+import os
+import json
+import numpy as np
+import pandas as pd
+
+from modules.scoring import WEIGHTS, ASSET_ADJUSTMENTS, ASSET_TYPES, factor_scores, score_missions
+
+# Logistic link from the 0-100 confidence score to P(finding confirmed)
+LINK_CENTER = 70.0
+LINK_SCALE = 10.0
+LEARNING_RATE = 0.0005
+MIN_WEIGHT = 0.02
+MAX_ADJUSTMENT = 10.0
+
+
+class FeedbackStore:
+    """Append-only log of reviewer verdicts (one JSON line per event)"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def append(self, event):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(event) + "\n")
+
+    def read(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return pd.DataFrame()
+        return pd.read_json(self.path, lines=True)
+
+
+class OnlineWeightLearner:
+    """SGD on the log-loss of confirmed vs false-positive findings.
+
+    The confidence score is linked to P(confirmed) by a logistic curve;
+    each event moves the factor weights and its asset adjustment by one
+    gradient step, so an update costs O(factors), not a retrain. Weights
+    stay non-negative and sum to 1, keeping the score on its 0-100 scale.
+    """
+
+    def __init__(self, weights=None, asset_adjustments=None, learning_rate=LEARNING_RATE):
+        self.factors = list(WEIGHTS)
+        self.weights = np.array([(weights or WEIGHTS)[f] for f in self.factors], dtype=np.float64)
+        self.asset_adjustments = dict(asset_adjustments or ASSET_ADJUSTMENTS)
+        self.learning_rate = learning_rate
+
+    def predict(self, factors, asset_type):
+        """P(confirmed) and the confidence score for one finding's factor vector"""
+        score = float(np.clip(factors @ self.weights + self.asset_adjustments[asset_type], 0, 100))
+        return 1 / (1 + np.exp(-(score - LINK_CENTER) / LINK_SCALE)), score
+
+    def update(self, factors, asset_type, confirmed):
+        p, _ = self.predict(factors, asset_type)
+        error = (p - float(confirmed)) / LINK_SCALE
+        weights = self.weights - self.learning_rate * error * factors
+        weights = np.maximum(weights, MIN_WEIGHT)
+        self.weights = weights / weights.sum()
+        adjustment = self.asset_adjustments[asset_type] - 100 * self.learning_rate * error
+        self.asset_adjustments[asset_type] = float(np.clip(adjustment, -MAX_ADJUSTMENT, MAX_ADJUSTMENT))
+        return p
+
+    def snapshot(self):
+        return dict(zip(self.factors, self.weights.tolist())), dict(self.asset_adjustments)
+
+
+class FeedbackLoop:
+    """Feedback store + online learner + versioned weights.
+
+    Every accepted verdict appends one feedback line and one weights
+    version line, both constant-time; each event records the version
+    that produced its score so any past score can be reproduced with
+    `score(missions, version=...)`.
+    """
+
+    def __init__(self, store_dir):
+        self.store = FeedbackStore(os.path.join(store_dir, "feedback.jsonl"))
+        self.versions_path = os.path.join(store_dir, "weights.jsonl")
+        self.versions = []
+        if os.path.exists(self.versions_path):
+            with open(self.versions_path) as f:
+                self.versions = [json.loads(line) for line in f if line.strip()]
+        if not self.versions:
+            self._append_version(dict(WEIGHTS), dict(ASSET_ADJUSTMENTS), "base tables")
+        latest = self.versions[-1]
+        self.learner = OnlineWeightLearner(latest["weights"], latest["asset_adjustments"])
+
+    @property
+    def version(self):
+        return self.versions[-1]["version"]
+
+    def _append_version(self, weights, asset_adjustments, source):
+        entry = {
+            "version": len(self.versions) + 1,
+            "created_at": pd.Timestamp.now(tz="UTC").isoformat(),
+            "weights": weights,
+            "asset_adjustments": asset_adjustments,
+            "source": source,
+        }
+        self.versions.append(entry)
+        with open(self.versions_path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def weights_at(self, version=None):
+        if version is None:
+            entry = self.versions[-1]
+        elif 1 <= version <= len(self.versions):
+            entry = self.versions[version - 1]
+        else:
+            raise ValueError(f"Unknown weights version {version!r}; expected 1 to {len(self.versions)}")
+        return entry["weights"], entry["asset_adjustments"]
+
+    def score(self, missions, version=None):
+        """Batch confidence scores with the current (or a past) weights version"""
+        weights, asset_adjustments = self.weights_at(version)
+        return score_missions(missions, weights, asset_adjustments)
+
+    def record(self, finding_id, mission, confirmed, reviewer="reviewer"):
+        """Store one verdict (mission = dict of scoring inputs incl. asset_type) and learn from it"""
+        factors = factor_scores(pd.DataFrame([mission]))[0]
+        factors = np.nan_to_num(factors, nan=LINK_CENTER)  # missing historical match -> neutral
+        p, score = self.learner.predict(factors, mission["asset_type"])
+        self.store.append({
+            "finding_id": finding_id,
+            "reviewed_at": pd.Timestamp.now(tz="UTC").isoformat(),
+            "reviewer": reviewer,
+            "asset_type": mission["asset_type"],
+            "confirmed": bool(confirmed),
+            "score": round(score, 3),
+            "p_confirmed": round(float(p), 4),
+            "weights_version": self.version,
+            **{f"factor_{name}": round(float(v), 3) for name, v in zip(self.learner.factors, factors)},
+        })
+        self.learner.update(factors, mission["asset_type"], confirmed)
+        self._append_version(*self.learner.snapshot(), source=f"feedback on {finding_id}")
+        return self.version
+
+    def history(self):
+        """Weights per version, one row per version"""
+        return pd.DataFrame([{"version": v["version"], **v["weights"]} for v in self.versions]).set_index("version")
+
+# ================= SIMULATED REVIEWS =================
+def simulate_reviews(n=2_000, seed=42):
+    """Reviewer verdicts where overlap and sensor calibration matter more than the base weights assume"""
+    rng = np.random.default_rng(seed)
+    missions = pd.DataFrame({
+        "image_quality": np.clip(rng.normal(80, 10, n), 0, 100),
+        "lighting_score": np.clip(rng.normal(75, 15, n), 0, 100),
+        "overlap_consistency": np.clip(rng.normal(80, 12, n), 0, 100),
+        "wind_speed": np.clip(rng.gamma(2.5, 5, n), 0, 50),
+        "historical_match": np.clip(rng.normal(75, 12, n), 0, 100),
+        "sensor_score": rng.choice([30, 60, 85, 95], n, p=[0.1, 0.2, 0.4, 0.3]),
+        "asset_type": rng.choice(ASSET_TYPES, n),
+    })
+    truth = {"image_quality": 0.15, "lighting": 0.10, "overlap": 0.35, "wind": 0.10, "historical": 0.05, "sensor": 0.25}
+    true_score = score_missions(missions, truth)
+    confirmed = rng.random(n) < 1 / (1 + np.exp(-(true_score - LINK_CENTER) / LINK_SCALE))
+    return missions.assign(finding_id=[f"REV-{i:05d}" for i in range(n)], confirmed=confirmed)
@@ -0,0 +1,96 @@
+# modules/finding_confidence.py - PER-FINDING CONFIDENCE MODEL
+import numpy as np
+import pandas as pd
+
+from modules.scoring import factor_scores
+
+# Mission factors a finding's confidence responds to (historical match is replaced by
+# the finding type's own track record)
+FINDING_FACTORS = ["image_quality", "lighting", "overlap", "wind", "sensor"]
+
+# Finding type -> historical precision and sensitivity to each factor
+# (log-odds per 25 points of factor score away from FACTOR_BASELINE)
+FINDING_TYPES = {
+    "VOL": {"precision": 0.95, "image_quality": 0.3, "lighting": 0.2, "overlap": 1.0, "wind": 0.4, "sensor": 0.8},
+    "SLP": {"precision": 0.85, "image_quality": 0.3, "lighting": 0.3, "overlap": 0.8, "wind": 0.3, "sensor": 0.6},
+    "ERD": {"precision": 0.75, "image_quality": 0.8, "lighting": 0.6, "overlap": 0.4, "wind": 0.2, "sensor": 0.3},
+    "EQP": {"precision": 0.97, "image_quality": 0.6, "lighting": 0.4, "overlap": 0.1, "wind": 0.1, "sensor": 0.1},
+    "THM": {"precision": 0.90, "image_quality": 0.4, "lighting": 1.0, "overlap": 0.2, "wind": 0.6, "sensor": 0.9},
+    "DTR": {"precision": 0.80, "image_quality": 0.8, "lighting": 0.6, "overlap": 0.1, "wind": 0.1, "sensor": 0.3},
+    "STR": {"precision": 0.90, "image_quality": 0.7, "lighting": 0.4, "overlap": 0.3, "wind": 0.3, "sensor": 0.3},
+    "CON": {"precision": 0.93, "image_quality": 0.5, "lighting": 0.3, "overlap": 0.1, "wind": 0.1, "sensor": 0.4},
+    "CRK": {"precision": 0.85, "image_quality": 1.0, "lighting": 0.8, "overlap": 0.2, "wind": 0.4, "sensor": 0.3},
+    "WAR": {"precision": 0.88, "image_quality": 0.8, "lighting": 0.5, "overlap": 0.1, "wind": 0.2, "sensor": 0.3},
+    "ALG": {"precision": 0.90, "image_quality": 0.4, "lighting": 0.3, "overlap": 0.6, "wind": 0.3, "sensor": 0.5},
+    "CLN": {"precision": 0.92, "image_quality": 0.6, "lighting": 0.5, "overlap": 0.1, "wind": 0.1, "sensor": 0.2},
+}
+
+FACTOR_BASELINE = 85.0  # a typical good mission scores each type at its historical precision
+DETECTOR_WEIGHT = 1.0
+DEFAULT_DETECTOR_CONFIDENCE = 0.8  # assumed when a detector reports no score
+PRIOR_STRENGTH = 50                # pseudo-reviews behind each type's prior precision
+
+
+def _logit(p):
+    p = np.clip(p, 1e-4, 1 - 1e-4)
+    return np.log(p / (1 - p))
+
+
+class FindingConfidenceModel:
+    """Logistic per-finding confidence from detector, mission factors and type precision.
+
+    log-odds = logit(type precision)
+             + DETECTOR_WEIGHT * (logit(detector) - logit(default detector))
+             + sum over factors of type sensitivity * (factor - baseline) / 25
+
+    Types are looked up through categorical codes into small arrays, so
+    a batch of any size is a handful of vectorized operations.
+    Precision moves with reviewed outcomes (Beta posterior on each type).
+    """
+
+    def __init__(self, finding_types=FINDING_TYPES, prior_strength=PRIOR_STRENGTH):
+        self.types = list(finding_types)
+        self.sensitivity = np.array([[finding_types[t][f] for f in FINDING_FACTORS] for t in self.types])
+        prior = np.array([finding_types[t]["precision"] for t in self.types])
+        self.confirmed = prior * prior_strength
+        self.reviewed = np.full(len(self.types), float(prior_strength))
+
+    @property
+    def precision(self):
+        return pd.Series(self.confirmed / self.reviewed, index=self.types)
+
+    def _codes(self, finding_types):
+        # Finding ids like "CRK-001" resolve to their type prefix (parsed once per distinct value)
+        inverse, uniques = pd.factorize(np.asarray(finding_types, dtype=object))
+        prefixes = [str(u).split("-", 1)[0] for u in uniques]
+        codes = pd.Categorical(prefixes, categories=self.types).codes[inverse]
+        if (codes < 0).any() or (inverse < 0).any():
+            raise ValueError(f"Unknown finding type; expected one of {self.types}")
+        return codes
+
+    def record_outcomes(self, finding_types, confirmed):
+        """Fold reviewed findings (confirmed True/False) into each type's precision"""
+        codes = self._codes(finding_types)
+        self.confirmed += np.bincount(codes, weights=np.asarray(confirmed, dtype=np.float64),
+                                      minlength=len(self.types))
+        self.reviewed += np.bincount(codes, minlength=len(self.types))
+        return self
+
+    def score(self, findings):
+        """Confidence (0-100) per finding.
+
+        `findings` needs `finding_type` (type code or finding id), the
+        mission inputs of `scoring.factor_scores` and optionally
+        `detector_confidence` (0-1).
+        """
+        codes = self._codes(findings["finding_type"])
+        factors = factor_scores(findings, FINDING_FACTORS)  # no historical_match needed
+
+        log_odds = _logit(self.confirmed / self.reviewed)[codes]
+        log_odds += np.einsum("ij,ij->i", self.sensitivity[codes], (factors - FACTOR_BASELINE) / 25)
+        if "detector_confidence" in findings:
+            detector = np.asarray(findings["detector_confidence"], dtype=np.float64)
+            # A detector is never certain: cap its pull at 2% / 98%
+            detector = np.clip(np.where(np.isnan(detector), DEFAULT_DETECTOR_CONFIDENCE, detector), 0.02, 0.98)
+            log_odds += DETECTOR_WEIGHT * (_logit(detector) - _logit(DEFAULT_DETECTOR_CONFIDENCE))
+        return 100 / (1 + np.exp(-log_odds))
@@ -0,0 +1,129 @@
+# modules/forecast.py - PREDICTIVE PRE-FLIGHT CONFIDENCE (QUANTILE FORECASTS)
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+from modules.scoring import ASSET_TYPES, SENSOR_LEVELS, WEIGHTS, explain_missions, score_missions, wind_factor
+
+N_SAMPLES = 256            # scenarios per candidate plan
+QUANTILES = (0.1, 0.5, 0.9)
+MIN_RESIDUALS = 200        # below this an asset type uses the pooled residuals
+# Forecast wind error (km/h, one standard deviation) grows with lead time
+WIND_SD_BASE = 2.0
+WIND_SD_PER_DAY = 1.5
+DEFAULT_LEAD_HOURS = 24
+
+
+class ConfidenceForecaster:
+    """Expected confidence distribution of a planned mission, before it flies.
+
+    Two uncertainty sources are combined over a fixed set of scenarios:
+    forecast wind error (normal, widening with lead time) and what the
+    engine's inputs could not predict, taken from historical residuals
+    (realized minus planned score) per asset type. Scenario draws are
+    stratified quantiles shared by all candidates, so a batch of plans
+    is one (candidates x scenarios) array pass plus a sort.
+    """
+
+    def __init__(self, n_samples=N_SAMPLES, seed=0):
+        self.n_samples = n_samples
+        levels = (np.arange(n_samples) + 0.5) / n_samples
+        # Wind and residual draws are paired through a fixed permutation so they are independent
+        self._wind_z = norm.ppf(levels)
+        self._pairing = np.random.default_rng(seed).permutation(n_samples)
+        self._levels = levels
+        self.residual_table = np.zeros((len(ASSET_TYPES) + 1, n_samples))
+        self.residual_counts = pd.Series(0, index=ASSET_TYPES + ["pooled"])
+
+    def fit_residuals(self, history):
+        """Residual quantiles per asset type from past missions (asset_type, planned_score, realized_score)"""
+        residuals = (history["realized_score"] - history["planned_score"]).to_numpy(dtype=np.float64)
+        asset_types = history["asset_type"].to_numpy(dtype=object)
+        pooled = np.quantile(residuals, self._levels)
+        self.residual_table = np.tile(pooled, (len(ASSET_TYPES) + 1, 1))
+        self.residual_counts["pooled"] = len(residuals)
+        for row, asset_type in enumerate(ASSET_TYPES):
+            mask = asset_types == asset_type
+            self.residual_counts[asset_type] = int(mask.sum())
+            if mask.sum() >= MIN_RESIDUALS:
+                self.residual_table[row] = np.quantile(residuals[mask], self._levels)
+        return self
+
+    def scenarios(self, plans, weights=None, asset_adjustments=None):
+        """(plans x scenarios) matrix of possible confidence scores.
+
+        `plans` holds the scoring inputs as planned (wind_speed is the
+        forecast mean) plus optional lead_hours or wind_sd; weights and
+        adjustments are as in `score_missions`.
+        """
+        weights = WEIGHTS if weights is None else weights
+        explained = explain_missions(plans, weights, asset_adjustments)
+        unclipped = explained["baseline"].to_numpy() + explained.filter(like="contrib_").sum(axis=1).to_numpy()
+
+        wind = plans["wind_speed"].to_numpy(dtype=np.float64)
+        if "wind_sd" in plans:
+            wind_sd = plans["wind_sd"].to_numpy(dtype=np.float64)
+        else:
+            lead_hours = (plans["lead_hours"].to_numpy(dtype=np.float64) if "lead_hours" in plans
+                          else np.full(len(plans), DEFAULT_LEAD_HOURS, dtype=np.float64))
+            wind_sd = WIND_SD_BASE + WIND_SD_PER_DAY * lead_hours / 24
+        wind_draws = np.maximum(wind[:, None] + wind_sd[:, None] * self._wind_z[None, :], 0)
+
+        # Swap the planned wind's contribution for each scenario's
+        w_wind = weights["wind"]
+        fixed = unclipped - w_wind * wind_factor(wind)
+        codes = pd.Categorical(plans["asset_type"], categories=ASSET_TYPES).codes  # validated by explain_missions
+        residuals = self.residual_table[codes][:, self._pairing]
+        return np.clip(fixed[:, None] + w_wind * wind_factor(wind_draws) + residuals, 0, 100)
+
+    def forecast(self, plans, quantiles=QUANTILES, weights=None, asset_adjustments=None):
+        """Quantiles (q10, q50, ...) and mean of the confidence score per plan"""
+        draws = np.sort(self.scenarios(plans, weights, asset_adjustments), axis=1)
+        # Draws are stratified, so a quantile is a direct read at its rank
+        ranks = np.minimum((np.asarray(quantiles) * self.n_samples).astype(np.int64), self.n_samples - 1)
+        frame = pd.DataFrame(draws[:, ranks], index=plans.index,
+                             columns=[f"q{round(q * 100):02d}" for q in quantiles])
+        frame["expected"] = draws.mean(axis=1)
+        return frame
+
+
+def interval_coverage(forecasts, realized, low="q10", high="q90"):
+    """Share of realized scores inside the [low, high] forecast interval"""
+    realized = np.asarray(realized, dtype=np.float64)
+    return float(np.mean((realized >= forecasts[low].to_numpy()) & (realized <= forecasts[high].to_numpy())))
+
+# ================= SIMULATED HISTORY =================
+def simulate_forecast_history(n=20_000, seed=42):
+    """Past missions: inputs as planned (forecast wind, lead time) and as flown, with both scores.
+
+    Realized imagery drifts below plan (haze, vibration), more for some
+    asset types; forecast wind misses by more at longer lead times.
+    """
+    rng = np.random.default_rng(seed)
+    asset_type = rng.choice(ASSET_TYPES, n)
+    lead_hours = rng.integers(6, 14 * 24, n)
+    planned = pd.DataFrame({
+        "image_quality": np.clip(rng.normal(85, 6, n), 0, 100),
+        "lighting_conditions": rng.choice(["Fair", "Good", "Excellent"], n, p=[0.2, 0.5, 0.3]),
+        "overlap_consistency": np.clip(rng.normal(85, 5, n), 0, 100),
+        "wind_speed": np.clip(rng.gamma(2.5, 5, n), 0, 50),
+        "historical_match": np.clip(rng.normal(75, 10, n), 0, 100),
+        "sensor_calibration": rng.choice(SENSOR_LEVELS, n, p=[0.05, 0.15, 0.5, 0.3]),
+        "asset_type": asset_type,
+        "lead_hours": lead_hours,
+    })
+    drift = pd.Series(asset_type).map({
+        "Mining Stockpile": -3, "Solar Farm": -1, "Road Infrastructure": -4,
+        "Building Inspection": -2, "Agricultural Field": -5,
+    }).to_numpy()
+    wind_error = rng.normal(0, WIND_SD_BASE + WIND_SD_PER_DAY * lead_hours / 24)
+    actual_wind = np.maximum(planned["wind_speed"] + wind_error, 0)
+    flown = planned.assign(
+        image_quality=np.clip(planned["image_quality"] + drift + rng.normal(0, 6, n), 0, 100),
+        overlap_consistency=np.clip(planned["overlap_consistency"] + rng.normal(-1, 4, n), 0, 100),
+    )
+    # Residuals are what the wind forecast error does not explain
+    history = planned.assign(actual_wind_speed=actual_wind)
+    history["planned_score"] = score_missions(planned.assign(wind_speed=actual_wind))
+    history["realized_score"] = score_missions(flown.assign(wind_speed=actual_wind))
+    return history
@@ -0,0 +1,183 @@
+# modules/history_index.py - HISTORICAL MISSION PATTERN MATCHING INDEX
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+
+from modules.scoring import LIGHTING_SCORES, SENSOR_SCORES, ASSET_TYPES
+
+# Feature -> (min, max) used to scale every feature to 0-1
+MISSION_FEATURES = {
+    "image_quality": (0, 100),
+    "lighting_score": (0, 100),
+    "overlap_consistency": (0, 100),
+    "wind_speed": (0, 50),
+    "sensor_score": (0, 100),
+}
+
+# ================= FEATURE VECTORS =================
+def normalize_features(frame):
+    """Scale mission features to 0-1 and return a float32 (n, d) matrix"""
+    columns = []
+    for name, (low, high) in MISSION_FEATURES.items():
+        values = np.asarray(frame[name], dtype=np.float32)
+        columns.append(np.clip((values - low) / (high - low), 0, 1))
+    return np.ascontiguousarray(np.column_stack(columns), dtype=np.float32)
+
+
+def mission_feature_vector(image_quality, lighting_conditions, overlap_consistency,
+                           wind_speed, sensor_calibration):
+    """Feature vector for a single mission as entered on the Confidence Engine page"""
+    return normalize_features({
+        "image_quality": [image_quality],
+        "lighting_score": [LIGHTING_SCORES[lighting_conditions]],
+        "overlap_consistency": [overlap_consistency],
+        "wind_speed": [wind_speed],
+        "sensor_score": [SENSOR_SCORES[sensor_calibration]],
+    })[0]
+
+# ================= INDEX =================
+class HistoricalMissionIndex:
+    """Vector index over normalized mission features.
+
+    Exact search is a single brute-force matrix product over the whole
+    history. With `n_lists` set, an IVF layout is built instead: vectors are
+    grouped by k-means centroid and a query only scans the `n_probe`
+    closest lists.
+    """
+
+    def __init__(self, vectors, mission_ids=None, n_lists=None, n_probe=8, seed=42):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) == 0:
+            raise ValueError("Index needs a non-empty (n, d) feature matrix")
+        self.mission_ids = np.arange(len(vectors)) if mission_ids is None else np.asarray(mission_ids)
+        self.n_probe = n_probe
+        self.centroids = None
+        self.list_offsets = None
+
+        if n_lists:
+            self._build_ivf(vectors, n_lists, seed)
+        else:
+            self.vectors = vectors
+        self.sq_norms = np.einsum("nd,nd->n", self.vectors, self.vectors)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def _build_ivf(self, vectors, n_lists, seed):
+        n_lists = min(n_lists, len(vectors))
+        sample = vectors
+        if len(vectors) > 100_000:
+            sample = vectors[np.random.default_rng(seed).choice(len(vectors), 100_000, replace=False)]
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, random_state=seed, n_init=1, batch_size=4096)
+        kmeans.fit(sample)
+        self.centroids = kmeans.cluster_centers_.astype(np.float32)
+
+        # Assign in chunks to keep the (chunk, n_lists) distance matrix small
+        assignment = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), 65_536):
+            chunk = vectors[start:start + 65_536]
+            assignment[start:start + len(chunk)] = _nearest(chunk, self.centroids)
+
+        # Store each list contiguously so a probe is a plain slice
+        order = np.argsort(assignment, kind="stable")
+        self.vectors = np.ascontiguousarray(vectors[order])
+        self.mission_ids = self.mission_ids[order]
+        counts = np.bincount(assignment, minlength=n_lists)
+        self.list_offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    def search(self, query, k=10):
+        """Top-k nearest past missions: returns (mission_ids, distances)"""
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        if self.centroids is None:
+            candidates = self.vectors
+            sq_norms = self.sq_norms
+            ids = self.mission_ids
+        else:
+            probe = np.argsort(_sq_distances(self.centroids, query))[:self.n_probe]
+            slices = [slice(self.list_offsets[p], self.list_offsets[p + 1]) for p in probe]
+            candidates = np.concatenate([self.vectors[s] for s in slices])
+            sq_norms = np.concatenate([self.sq_norms[s] for s in slices])
+            ids = np.concatenate([self.mission_ids[s] for s in slices])
+
+        if len(candidates) == 0:
+            return ids[:0], np.empty(0, dtype=np.float32)
+        dist = np.maximum(sq_norms - 2 * (candidates @ query) + query @ query, 0)
+        k = min(k, len(dist))
+        top = np.argpartition(dist, k - 1)[:k]
+        top = top[np.argsort(dist[top])]
+        return ids[top], np.sqrt(dist[top])
+
+    def similarity(self, query, k=10, bandwidth=0.1):
+        """0-100 similarity of a mission to its k nearest past missions"""
+        ids, dist = self.search(query, k)
+        if len(dist) == 0:
+            return 0.0, ids
+        return float(100 * np.exp(-(dist ** 2) / (2 * bandwidth ** 2)).mean()), ids
+
+    def save(self, path):
+        np.savez(
+            path,
+            vectors=self.vectors,
+            mission_ids=self.mission_ids,
+            centroids=self.centroids if self.centroids is not None else np.empty((0, 0)),
+            list_offsets=self.list_offsets if self.list_offsets is not None else np.empty(0),
+            n_probe=self.n_probe,
+        )
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path, allow_pickle=False)
+        index = cls.__new__(cls)
+        index.vectors = data["vectors"]
+        index.mission_ids = data["mission_ids"]
+        index.n_probe = int(data["n_probe"])
+        index.centroids = data["centroids"] if data["centroids"].size else None
+        index.list_offsets = data["list_offsets"] if data["list_offsets"].size else None
+        index.sq_norms = np.einsum("nd,nd->n", index.vectors, index.vectors)
+        return index
+
+
+def _sq_distances(points, query):
+    return np.einsum("nd,nd->n", points, points) - 2 * (points @ query) + query @ query
+
+
+def _nearest(points, centroids):
+    dist = (np.einsum("kd,kd->k", centroids, centroids)[None, :]
+            - 2 * (points @ centroids.T))
+    return np.argmin(dist, axis=1)
+
+
+def build_history_indexes(history, n_lists=None):
+    """One index per asset type over successful past missions"""
+    successful = history[history["successful"]]
+    indexes = {}
+    for asset_type, group in successful.groupby("asset_type", sort=False):
+        indexes[asset_type] = HistoricalMissionIndex(
+            normalize_features(group), mission_ids=group["mission_id"].to_numpy(), n_lists=n_lists
+        )
+    return indexes
+
+# ================= SIMULATED HISTORY =================
+def simulate_mission_history(n_missions=1_000_000, seed=42):
+    """Synthetic mission history with per-mission success outcomes"""
+    rng = np.random.default_rng(seed)
+    lighting = rng.choice(list(LIGHTING_SCORES.values()), n_missions, p=[0.1, 0.25, 0.45, 0.2])
+    sensor = rng.choice(list(SENSOR_SCORES.values()), n_missions, p=[0.05, 0.15, 0.55, 0.25])
+    history = pd.DataFrame({
+        "mission_id": np.char.add("M-", np.arange(n_missions).astype(str)),
+        "asset_type": rng.choice(ASSET_TYPES, n_missions),
+        "image_quality": np.clip(rng.normal(82, 10, n_missions), 0, 100).astype(np.float32),
+        "lighting_score": lighting.astype(np.float32),
+        "overlap_consistency": np.clip(rng.normal(85, 8, n_missions), 0, 100).astype(np.float32),
+        "wind_speed": np.clip(rng.gamma(3, 5, n_missions), 0, 50).astype(np.float32),
+        "sensor_score": sensor.astype(np.float32),
+    })
+    # Success is more likely for clean captures in calm conditions
+    quality = (
+        0.3 * history["image_quality"] + 0.2 * history["lighting_score"]
+        + 0.2 * history["overlap_consistency"] + 0.2 * history["sensor_score"]
+        - 1.0 * history["wind_speed"]
+    )
+    p_success = 1 / (1 + np.exp(-(quality - 60) / 5))
+    history["successful"] = rng.random(n_missions) < p_success
+    return history
@@ -0,0 +1,340 @@
+# modules/mission_query.py - OFFLINE NATURAL-LANGUAGE QUERIES OVER THE MISSION STORE
+import re
+import json
+import time
+import numpy as np
+import pandas as pd
+
+from modules.scoring import ASSET_TYPES, SENSOR_LEVELS
+from modules.rules import load_rules
+
+# The DMO page's sample questions, also the translator stub's few-shot examples
+SAMPLE_QUESTIONS = [
+    "Which missions had the best image quality last month?",
+    "Compare solar farm inspection results from Q1 vs Q2",
+    "Generate a summary of all mining stockpile missions",
+    "What were the most common QC failures in infrastructure missions?",
+]
+OPS = ["top", "compare", "summary", "qc_failures", "list"]
+PLAN_CACHE_SIZE = 1024
+LIST_LIMIT = 50
+MAX_K = 100
+MIN_OVERLAP = 75.0  # overlap below this is counted as a QC failure cause
+
+
+def _phrases(pairs):
+    # Whole words only: "broad" is no road, "windows" no wind, "determining" no mining
+    return [(re.compile(rf"\b(?:{pattern})\b"), value) for pattern, value in pairs]
+
+# Phrase -> value tables; the first match in each table wins, so longer phrases come first
+ASSET_WORDS = _phrases([
+    ("solar", "Solar Farm"),
+    ("mining", "Mining Stockpile"), ("stockpiles?", "Mining Stockpile"),
+    ("infrastructure", "Road Infrastructure"), ("roads?", "Road Infrastructure"), ("highways?", "Road Infrastructure"),
+    ("buildings?", "Building Inspection"),
+    ("agricultur(?:e|al)", "Agricultural Field"), ("crops?", "Agricultural Field"), ("fields?", "Agricultural Field"),
+])
+COLUMN_WORDS = _phrases([
+    ("image quality", "image_quality"), ("imagery", "image_quality"), ("quality", "image_quality"),
+    ("overlap", "overlap_consistency"),
+    ("wind(?:y|ier|iest)?", "wind_speed"), ("calm(?:er|est)?", "wind_speed"),
+    ("confidence", "confidence_score"), ("scores?", "confidence_score"),
+])
+LOWER_IS_BETTER = {"wind_speed"}
+MONTHS = ["january", "february", "march", "april", "may", "june", "july", "august", "september",
+          "october", "november", "december"]
+
+_COMPARE = r"(?:vs|versus|and|to|against|compared to|compared with)"
+_QUARTERS = re.compile(rf"\bq([1-4])\s+{_COMPARE}\s+q([1-4])(?:\s+(?:of\s+)?(20\d\d))?\b")
+_YEARS = re.compile(rf"\b(20\d\d)\s+{_COMPARE}\s+(20\d\d)\b")
+_QUARTER = re.compile(r"\bq([1-4])(?:\s+(?:of\s+)?(20\d\d))?\b")
+_ROLLING = re.compile(r"\b(?:last|past|previous)\s+(\d+)\s+(day|week|month|year)s?\b")
+_CALENDAR = re.compile(r"\b(last|previous|past|this|current)\s+(week|month|quarter|year)\b")
+_MONTH = re.compile(rf"\b({'|'.join(MONTHS)})(?:\s+(20\d\d))?\b")
+_YEAR = re.compile(r"\b(20\d\d)\b")
+_SITE = re.compile(r"\bsite\s*(?:id\s*)?(?:no\s*)?(\d+)\b")
+_SCORE = re.compile(r"\b(?:score[sd]?|confidence)\s+(?:of\s+)?(below|under|less than|above|over|more than|"
+                    r"at least|at most)\s+(\d+(?:\.\d+)?)")
+_RANKED = r"(?:top|best|worst|highest|lowest|windiest|calmest)"
+_K = re.compile(rf"\b{_RANKED}\s+(\d{{1,3}})\b|\b(\d{{1,3}})\s+{_RANKED}\b")
+_HIGHEST = re.compile(r"\b(?:highest|most|windiest)\b")
+_LOWEST = re.compile(r"\b(?:lowest|least|calmest)\b")
+
+# Intent keywords, checked in order
+INTENTS = [
+    ("qc_failures", re.compile(r"\b(?:qc|fail|failed|failure|failures|rejected)\b")),
+    ("compare", re.compile(r"\b(?:compare|comparison|vs|versus)\b")),
+    ("summary", re.compile(r"\b(?:summary|summarise|summarize|overview|report on)\b")),
+    ("top", re.compile(rf"\b{_RANKED}\b")),
+    ("list", re.compile(r"\b(?:show|list|find|which|missions)\b")),
+]
+
+
+def normalize(text):
+    """Cache key for a question: lower case, punctuation dropped, whitespace collapsed"""
+    return " ".join(re.sub(r"[^a-z0-9. ]+", " ", text.lower()).replace(". ", " ").split()).rstrip(".")
+
+
+def _first(table, text):
+    return next((value for pattern, value in table if pattern.search(text)), None)
+
+# ================= GRAMMAR =================
+def _time_spec(text):
+    # Time is kept symbolic so a cached plan stays valid as the history grows
+    if match := _QUARTERS.search(text):
+        return {"kind": "quarters", "quarters": sorted({int(match[1]), int(match[2])}),
+                "year": int(match[3]) if match[3] else None}
+    if match := _YEARS.search(text):
+        return {"kind": "years", "years": sorted({int(match[1]), int(match[2])})}
+    if match := _ROLLING.search(text):
+        return {"kind": "rolling", "unit": match[2], "n": int(match[1])}
+    if match := _CALENDAR.search(text):
+        return {"kind": "calendar", "unit": match[2], "offset": -1 if match[1] in ("last", "previous", "past") else 0}
+    if match := _QUARTER.search(text):
+        return {"kind": "quarters", "quarters": [int(match[1])], "year": int(match[2]) if match[2] else None}
+    if match := _MONTH.search(text):
+        return {"kind": "month", "month": MONTHS.index(match[1]) + 1, "year": int(match[2]) if match[2] else None}
+    if match := _YEAR.search(text):
+        return {"kind": "years", "years": [int(match[1])]}
+    return None
+
+
+def parse(text):
+    """Plan for a normalized question, or None when no intent is recognised.
+
+    A plan is a plain dict: op (one of OPS), the filters the mission
+    store takes (asset_type, site_id, min_score, max_score), a symbolic
+    time spec and op arguments (column, k, ascending for `top`).
+    """
+    op = next((name for name, pattern in INTENTS if pattern.search(text)), None)
+    if op is None:
+        return None
+    plan = {"op": op, "time": _time_spec(text), "asset_type": _first(ASSET_WORDS, text)}
+    if match := _SITE.search(text):
+        plan["site_id"] = int(match[1])
+    for match in _SCORE.finditer(text):
+        bound = "max_score" if match[1] in ("below", "under", "less than", "at most") else "min_score"
+        plan[bound] = float(match[2])
+    if plan["time"] and plan["time"]["kind"] in ("quarters", "years") and op != "compare" \
+            and len(plan["time"].get("quarters", plan["time"].get("years"))) > 1:
+        plan["op"] = op = "compare"
+    if op == "top":
+        column = _first(COLUMN_WORDS, text) or "confidence_score"
+        plan["column"] = column
+        # highest / lowest are literal; best / worst depend on which way the column is good
+        if _LOWEST.search(text) or _HIGHEST.search(text):
+            plan["ascending"] = _LOWEST.search(text) is not None
+        else:
+            plan["ascending"] = (re.search(r"\bworst\b", text) is None) == (column in LOWER_IS_BETTER)
+        match = _K.search(text)
+        plan["k"] = int(match[1] or match[2]) if match else 5
+    return validate_plan(plan)
+
+
+def validate_plan(plan):
+    """Check a plan from any source before it touches the store; raises ValueError"""
+    if not isinstance(plan, dict) or plan.get("op") not in OPS:
+        raise ValueError(f"Plan op must be one of {OPS}")
+    if plan.get("asset_type") is not None and plan["asset_type"] not in ASSET_TYPES:
+        raise ValueError(f"Unknown asset type {plan['asset_type']!r}; expected one of {ASSET_TYPES}")
+    if plan["op"] == "top":
+        if plan.get("column") not in dict(COLUMN_WORDS).values():
+            raise ValueError(f"Cannot rank by {plan.get('column')!r}")
+        if not 1 <= int(plan.get("k", 5)) <= MAX_K:
+            raise ValueError(f"k must be between 1 and {MAX_K}")
+    spec = plan.get("time")
+    if spec is not None and spec.get("kind") not in ("quarters", "years", "rolling", "calendar", "month"):
+        raise ValueError(f"Unknown time spec {spec!r}")
+    return plan
+
+# ================= TRANSLATOR (LLM SLOT) =================
+class StubTranslator:
+    """Offline stand-in for an LLM translator: question in, JSON plan out.
+
+    Answers with the plan of the closest few-shot example (word overlap),
+    retargeted to any asset type and time period named in the question;
+    the example's own period is kept only when the question has none. A
+    real model plugs in as any callable with the same contract; its
+    output goes through `validate_plan` like the stub's.
+    """
+
+    def __init__(self, examples=SAMPLE_QUESTIONS):
+        self.examples = {normalize(text): parse(normalize(text)) for text in examples}
+
+    def __call__(self, text):
+        words = set(text.split())
+        overlap = lambda example: len(words & set(example.split())) / len(words | set(example.split()))
+        example = max(self.examples, key=overlap)
+        plan = dict(self.examples[example], asset_type=_first(ASSET_WORDS, text))
+        if (spec := _time_spec(text)) is not None:
+            plan["time"] = spec
+        return json.dumps(plan)
+
+# ================= EXECUTION =================
+def _period_start(year, month):
+    return pd.Timestamp(year=year, month=month, day=1)
+
+
+def _completed_year(as_of, last_month):
+    # Questions without a year mean the latest year in which the period is over
+    return as_of.year if _period_start(as_of.year, last_month) + pd.DateOffset(months=1) <= as_of else as_of.year - 1
+
+
+def resolve_time(spec, as_of):
+    """[start, end) for a time spec, relative to `as_of` (the store's latest mission)"""
+    if spec is None:
+        return None, None
+    kind = spec["kind"]
+    if kind == "quarters":
+        year = spec["year"] or _completed_year(as_of, max(spec["quarters"]) * 3)
+        return (_period_start(year, min(spec["quarters"]) * 3 - 2),
+                _period_start(year, max(spec["quarters"]) * 3 - 2) + pd.DateOffset(months=3))
+    if kind == "years":
+        return _period_start(min(spec["years"]), 1), _period_start(max(spec["years"]) + 1, 1)
+    if kind == "month":
+        year = spec["year"] or _completed_year(as_of, spec["month"])
+        return _period_start(year, spec["month"]), _period_start(year, spec["month"]) + pd.DateOffset(months=1)
+    end = as_of + pd.Timedelta(seconds=1)  # include the latest mission
+    if kind == "rolling":
+        unit = {"day": pd.DateOffset(days=1), "week": pd.DateOffset(weeks=1),
+                "month": pd.DateOffset(months=1), "year": pd.DateOffset(years=1)}[spec["unit"]]
+        return end - unit * spec["n"], end
+    period = pd.Period(as_of, {"week": "W", "month": "M", "quarter": "Q", "year": "Y"}[spec["unit"]])
+    period += spec["offset"]
+    start = period.start_time
+    return start, (period + 1).start_time if spec["offset"] else end
+
+
+class MissionQueryEngine:
+    """Answers mission-history questions from the mission store, offline.
+
+    A question is normalized and looked up in the plan cache; on a miss
+    the grammar parses it, falling back to the translator (the LLM slot,
+    `StubTranslator` by default) when no intent is recognised. Plans keep
+    time symbolic ("last month"), so one cached plan serves every day;
+    dates are resolved against the store's latest mission when run.
+    """
+
+    def __init__(self, store, translator=None, thresholds=None, cache_size=PLAN_CACHE_SIZE):
+        self.store = store
+        self.translator = translator or StubTranslator()
+        self.thresholds = {**load_rules().thresholds, **(thresholds or {})}
+        self.cache_size = cache_size
+        self._plans = {}
+        self.hits = self.misses = 0
+
+    def plan(self, question):
+        """Compiled plan for a question (cached by normalized text) and whether it was cached"""
+        key = normalize(question)
+        if key in self._plans:
+            self.hits += 1
+            self._plans[key] = self._plans.pop(key)  # most recently used last
+            return self._plans[key], True
+        self.misses += 1
+        plan = parse(key)
+        if plan is None:
+            plan = dict(validate_plan(json.loads(self.translator(key))), source="translator")
+        else:
+            plan["source"] = "grammar"
+        if len(self._plans) >= self.cache_size:
+            self._plans.pop(next(iter(self._plans)))
+        self._plans[key] = plan
+        return plan, False
+
+    def ask(self, question, as_of=None):
+        """Run a question: {"plan", "answer" (one line), "frame", "timings" in ms, "cached"}"""
+        started = time.perf_counter()
+        plan, cached = self.plan(question)
+        planned = time.perf_counter()
+        as_of = pd.Timestamp(as_of if as_of is not None else self.store.latest() or pd.Timestamp.now())
+        start, end = resolve_time(plan["time"], as_of)
+        filters = {"start": start, "end": end, "asset_type": plan.get("asset_type"),
+                   "site_id": plan.get("site_id"), "min_score": plan.get("min_score"),
+                   "max_score": plan.get("max_score")}
+        answer, frame = getattr(self, f"_{plan['op']}")(plan, filters)
+        done = time.perf_counter()
+        return {
+            "plan": plan, "answer": answer, "frame": frame, "cached": cached, "start": start, "end": end,
+            "timings": {"plan_ms": (planned - started) * 1000, "execute_ms": (done - planned) * 1000,
+                        "total_ms": (done - started) * 1000},
+        }
+
+    @staticmethod
+    def _scope(plan, start, end):
+        scope = plan.get("asset_type") or "all"
+        scope += f" site {plan['site_id']}" if plan.get("site_id") is not None else ""
+        when = f" from {start:%d %b %Y} to {end - pd.Timedelta(seconds=1):%d %b %Y}" if start is not None else ""
+        return f"{scope} missions{when}"
+
+    def _top(self, plan, filters):
+        column = plan["column"]
+        frame = self.store.top(column, plan["k"], plan["ascending"], **filters)
+        frame = frame[["mission_id", "site_id", "asset_type", "flown_at"]
+                      + list(dict.fromkeys([column, "confidence_score"]))]
+        if frame.empty:
+            return f"No {self._scope(plan, filters['start'], filters['end'])}.", frame
+        label = column.replace("_", " ")
+        first = frame.iloc[0]
+        return (f"{'Lowest' if plan['ascending'] else 'Highest'} {label} among "
+                f"{self._scope(plan, filters['start'], filters['end'])}: {first['mission_id']} "
+                f"({first['asset_type']}, {first[column]:.1f})."), frame
+
+    def _compare(self, plan, filters):
+        spec = plan["time"] or {"kind": "years", "years": []}
+        period = "Q" if spec["kind"] == "quarters" else "M" if spec["kind"] == "month" else "Y"
+        frame = self.store.aggregate(period, **filters)
+        if spec["kind"] == "quarters":
+            year = filters["start"].year
+            frame = frame[frame["period"].isin([f"{year}Q{q}" for q in spec["quarters"]])]
+        elif spec["kind"] == "years" and spec["years"]:
+            frame = frame[frame["period"].isin([str(y) for y in spec["years"]])]
+        frame = frame.reset_index(drop=True)
+        if len(frame) < 2:
+            return f"Not enough history to compare {self._scope(plan, filters['start'], filters['end'])}.", frame
+        first, last = frame.iloc[0], frame.iloc[-1]
+        change = last["mean_confidence"] - first["mean_confidence"]
+        return (f"{plan.get('asset_type') or 'All'} missions, {first['period']} vs {last['period']}: "
+                f"{first['missions']:,} vs {last['missions']:,} missions, mean confidence "
+                f"{first['mean_confidence']:.1f} → {last['mean_confidence']:.1f} ({change:+.1f}), "
+                f"QC pass rate {first['qc_pass_rate']:.0%} → {last['qc_pass_rate']:.0%}."), frame
+
+    def _summary(self, plan, filters):
+        frame = self.store.aggregate("Y", **filters)
+        if frame.empty:
+            return f"No {self._scope(plan, filters['start'], filters['end'])}.", frame
+        weights = frame["missions"] / frame["missions"].sum()
+        total = {"period": "Total", "missions": frame["missions"].sum()}
+        total.update({name: (frame[name] * weights).sum() for name in frame.columns if name not in total})
+        frame = pd.concat([frame, pd.DataFrame([total])], ignore_index=True)
+        return (f"{total['missions']:,} {self._scope(plan, filters['start'], filters['end'])}: mean confidence "
+                f"{total['mean_confidence']:.1f}, mean image quality {total['mean_image_quality']:.1f}, "
+                f"QC pass rate {total['qc_pass_rate']:.0%}."), frame
+
+    def _qc_failures(self, plan, filters):
+        rows = self.store.select(**filters)
+        rows = rows[~self.store.values("qc_passed", rows)]
+        value = lambda name: self.store.values(name, rows)
+        sensor_floor = SENSOR_LEVELS.index("Good")
+        causes = {
+            "Low image quality": value("image_quality") < self.thresholds["min_image_quality"],
+            "High wind": value("wind_speed") > self.thresholds["max_wind_speed"],
+            "Poor overlap": value("overlap_consistency") < MIN_OVERLAP,
+            "Sensor calibration expired or marginal": value("sensor_calibration") < sensor_floor,
+        }
+        counts = pd.Series({cause: int(mask.sum()) for cause, mask in causes.items()}).sort_values(ascending=False)
+        frame = pd.DataFrame({"cause": counts.index, "failed_missions": counts.to_numpy(),
+                              "share_of_failures": counts.to_numpy() / max(len(rows), 1)})
+        if not len(rows):
+            return f"No QC failures among {self._scope(plan, filters['start'], filters['end'])}.", frame
+        return (f"{len(rows):,} QC failures among {self._scope(plan, filters['start'], filters['end'])}; "
+                f"most common cause: {counts.index[0].lower()} ({counts.iloc[0] / len(rows):.0%} of failures)."), frame
+
+    def _list(self, plan, filters):
+        rows = self.store.select(**filters)
+        total = len(rows)
+        if total > LIST_LIMIT:
+            seconds = self.store.values("flown_at", rows).astype(np.int64)
+            rows = rows[np.argpartition(-seconds, LIST_LIMIT)[:LIST_LIMIT]]
+        frame = self.store.fetch(rows).sort_values("flown_at", ascending=False, ignore_index=True)
+        return (f"{total:,} {self._scope(plan, filters['start'], filters['end'])}"
+                f"{f'; latest {LIST_LIMIT} shown' if total > LIST_LIMIT else ''}."), frame
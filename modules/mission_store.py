@@ -0,0 +1,310 @@
+# modules/mission_store.py - MISSION HISTORY STORE (PARQUET SEGMENTS + SORTED INDEXES)
+import os
+import glob
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from modules.scoring import ASSET_TYPES, SENSOR_LEVELS
+
+# Stored columns and their in-memory types; categoricals are held as int8 codes
+NUMERIC_COLUMNS = {
+    "mission_no": np.int64,
+    "site_id": np.int32,
+    "image_quality": np.float32,
+    "overlap_consistency": np.float32,
+    "wind_speed": np.float32,
+    "confidence_score": np.float32,
+    "qc_passed": np.bool_,
+}
+CATEGORICAL_COLUMNS = {"asset_type": ASSET_TYPES, "sensor_calibration": SENSOR_LEVELS}
+STORE_COLUMNS = ["mission_no", "site_id", "asset_type", "flown_at", "image_quality", "overlap_consistency",
+                 "wind_speed", "sensor_calibration", "confidence_score", "qc_passed"]
+
+MISSION_SCHEMA = pa.schema(
+    [(name, pa.dictionary(pa.int8(), pa.string())) if name in CATEGORICAL_COLUMNS
+     else (name, pa.timestamp("s")) if name == "flown_at"
+     else (name, pa.from_numpy_dtype(np.dtype(NUMERIC_COLUMNS[name])))
+     for name in STORE_COLUMNS]
+)
+PERIODS = {"M": 1, "Q": 3, "Y": 12}  # period -> months
+
+
+def mission_ids(mission_no, flown_at):
+    """Display ids in the M-<year>-<number> form used across the DMO pages"""
+    years = np.asarray(flown_at, dtype="datetime64[Y]").astype(np.int64) + 1970
+    return [f"M-{year}-{no:03d}" for year, no in zip(years, np.asarray(mission_no))]
+
+
+def _codes(values, categories, name):
+    codes = pd.Categorical(values, categories=categories).codes
+    if (codes < 0).any():
+        raise ValueError(f"Unknown {name}; expected one of {categories}")
+    return codes.astype(np.int8)
+
+
+def _to_columns(missions):
+    # Validate and convert one batch to typed numpy columns
+    missing = [name for name in STORE_COLUMNS if name not in missions]
+    if missing:
+        raise KeyError(f"Missions are missing columns {missing}")
+    columns = {name: np.asarray(missions[name], dtype=dtype) for name, dtype in NUMERIC_COLUMNS.items()}
+    for name, categories in CATEGORICAL_COLUMNS.items():
+        columns[name] = _codes(missions[name], categories, name.replace("_", " "))
+    flown_at = pd.to_datetime(np.asarray(missions["flown_at"]), utc=True).tz_localize(None)
+    columns["flown_at"] = flown_at.to_numpy(dtype="datetime64[s]")
+    return columns
+
+
+def _to_arrow(columns):
+    arrays = []
+    for name in STORE_COLUMNS:
+        if name in CATEGORICAL_COLUMNS:
+            arrays.append(pa.DictionaryArray.from_arrays(columns[name], pa.array(CATEGORICAL_COLUMNS[name])))
+        else:
+            arrays.append(pa.array(columns[name], type=MISSION_SCHEMA.field(name).type))
+    return pa.Table.from_arrays(arrays, schema=MISSION_SCHEMA)
+
+
+def _read_segment(path):
+    table = pq.read_table(path)
+    columns = {}
+    for name in STORE_COLUMNS:
+        column = table.column(name)
+        if name in CATEGORICAL_COLUMNS:
+            # Segment dictionaries are remapped, so codes always follow the category lists
+            codes = []
+            for chunk in column.chunks:
+                remap = _codes(chunk.dictionary.to_numpy(zero_copy_only=False), CATEGORICAL_COLUMNS[name], name)
+                codes.append(remap[chunk.indices.to_numpy(zero_copy_only=False)])
+            columns[name] = np.concatenate(codes) if codes else np.empty(0, dtype=np.int8)
+        elif name == "flown_at":
+            columns[name] = column.to_numpy().astype("datetime64[s]")
+        else:
+            columns[name] = column.to_numpy().astype(NUMERIC_COLUMNS[name], copy=False)
+    return columns
+
+
+def _empty_dtype(name):
+    if name in CATEGORICAL_COLUMNS:
+        return np.int8
+    return "datetime64[s]" if name == "flown_at" else NUMERIC_COLUMNS[name]
+
+
+def _seconds(timestamp):
+    # Naive times are UTC
+    timestamp = pd.Timestamp(timestamp)
+    timestamp = timestamp.tz_convert(None) if timestamp.tz else timestamp
+    return int(timestamp.to_datetime64().astype("datetime64[s]").astype(np.int64))
+
+
+class MissionStore:
+    """Local mission history: append-only Parquet segments, queried from memory.
+
+    Rows are clustered by (asset_type, flown_at), so a date range, with
+    or without an asset type, is a few `searchsorted` slices. A site
+    index (row ids grouped by site) and a score index (row ids sorted by
+    confidence score) cover the other filters; each query starts from
+    whichever index gives the fewest candidate rows and masks the rest.
+    Bulk inserts only write a segment and buffer the columns; indexes
+    are rebuilt once, on the first query after a load.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._columns = {name: np.empty(0, dtype=_empty_dtype(name)) for name in STORE_COLUMNS}
+        segments = sorted(glob.glob(os.path.join(path, "part-*.parquet")))
+        self._next_segment = len(segments)
+        self._pending = [_read_segment(segment) for segment in segments]
+        self._indexed = False
+
+    def __len__(self):
+        return len(self._columns["mission_no"]) + sum(len(p["mission_no"]) for p in self._pending)
+
+    # ================= LOADING =================
+    def bulk_insert(self, missions):
+        """Append a batch (DataFrame or dict of columns) as one new Parquet segment"""
+        columns = _to_columns(missions)
+        segment = os.path.join(self.path, f"part-{self._next_segment:05d}.parquet")
+        pq.write_table(_to_arrow(columns), segment, compression="snappy")
+        self._next_segment += 1
+        self._pending.append(columns)
+        return len(columns["mission_no"])
+
+    def _ensure_indexed(self):
+        if self._indexed and not self._pending:
+            return
+        columns = {name: np.concatenate([self._columns[name]] + [p[name] for p in self._pending])
+                   for name in STORE_COLUMNS}
+        self._pending = []
+
+        # Cluster by (asset type, time): one int64 key, stable so equal times keep insert order
+        seconds = columns["flown_at"].astype(np.int64)
+        key = columns["asset_type"].astype(np.int64) << 40 | (seconds - seconds.min() if len(seconds) else seconds)
+        order = np.argsort(key, kind="stable")
+        self._columns = {name: values[order] for name, values in columns.items()}
+        self._seconds = self._columns["flown_at"].astype(np.int64)
+        self._asset_bounds = np.searchsorted(self._columns["asset_type"], np.arange(len(ASSET_TYPES) + 1))
+
+        self._site_rows = np.argsort(self._columns["site_id"], kind="stable").astype(np.int32)
+        self._site_ids, self._site_starts = np.unique(self._columns["site_id"][self._site_rows], return_index=True)
+        self._site_starts = np.append(self._site_starts, len(self._site_rows))
+
+        self._score_rows = np.argsort(self._columns["confidence_score"], kind="stable").astype(np.int32)
+        self._sorted_scores = self._columns["confidence_score"][self._score_rows]
+        self._latest = pd.Timestamp(self._columns["flown_at"].max()) if len(order) else None
+        self._indexed = True
+
+    def latest(self):
+        """Time of the most recent mission, or None for an empty store"""
+        self._ensure_indexed()
+        return self._latest
+
+    # ================= QUERIES =================
+    def _time_slices(self, asset_types, start, end):
+        low = np.iinfo(np.int64).min if start is None else _seconds(start)
+        high = np.iinfo(np.int64).max if end is None else _seconds(end)
+        slices = []
+        for code in asset_types:
+            first, last = self._asset_bounds[code], self._asset_bounds[code + 1]
+            times = self._seconds[first:last]
+            slices.append((first + np.searchsorted(times, low), first + np.searchsorted(times, high)))
+        return slices
+
+    def select(self, start=None, end=None, site_id=None, asset_type=None, min_score=None, max_score=None):
+        """Row ids matching every given filter; the time range is [start, end)"""
+        self._ensure_indexed()
+        # Score bounds in the stored dtype: a float64 probe makes searchsorted cast the whole index
+        min_score, max_score = (None if s is None else np.float32(s) for s in (min_score, max_score))
+        asset_codes = (range(len(ASSET_TYPES)) if asset_type is None
+                       else _codes([asset_type] if isinstance(asset_type, str) else asset_type,
+                                   ASSET_TYPES, "asset type"))
+        slices = self._time_slices(asset_codes, start, end)
+        candidates = {"time": sum(hi - lo for lo, hi in slices)}
+        if site_id is not None:
+            at = np.searchsorted(self._site_ids, site_id)
+            found = at < len(self._site_ids) and self._site_ids[at] == site_id
+            site_span = (self._site_starts[at], self._site_starts[at + 1]) if found else (0, 0)
+            candidates["site"] = site_span[1] - site_span[0]
+        if min_score is not None or max_score is not None:
+            score_span = (0 if min_score is None else np.searchsorted(self._sorted_scores, min_score, "left"),
+                          len(self._sorted_scores) if max_score is None
+                          else np.searchsorted(self._sorted_scores, max_score, "right"))
+            candidates["score"] = score_span[1] - score_span[0]
+
+        # Start from the most selective index, then mask the remaining filters
+        driver = min(candidates, key=candidates.get)
+        if driver == "time":
+            rows = np.concatenate([np.arange(lo, hi) for lo, hi in slices]) if slices else np.empty(0, np.int64)
+        elif driver == "site":
+            rows = self._site_rows[site_span[0]:site_span[1]]
+        else:
+            rows = self._score_rows[score_span[0]:score_span[1]]
+
+        keep = np.ones(len(rows), dtype=bool)
+        if driver != "time" and (start is not None or end is not None or asset_type is not None):
+            seconds, codes = self._seconds[rows], self._columns["asset_type"][rows]
+            if start is not None:
+                keep &= seconds >= _seconds(start)
+            if end is not None:
+                keep &= seconds < _seconds(end)
+            if asset_type is not None:
+                keep &= np.isin(codes, np.asarray(list(asset_codes)))
+        if driver != "site" and site_id is not None:
+            keep &= self._columns["site_id"][rows] == site_id
+        if driver != "score" and "score" in candidates:
+            scores = self._columns["confidence_score"][rows]
+            if min_score is not None:
+                keep &= scores >= min_score
+            if max_score is not None:
+                keep &= scores <= max_score
+        return np.sort(rows[keep]) if driver != "time" else rows[keep]
+
+    def values(self, name, rows):
+        """Raw stored values of one column for the given rows (categoricals as codes)"""
+        self._ensure_indexed()
+        return self._columns[name][rows]
+
+    def fetch(self, rows, columns=None):
+        """Frame of the given rows, with display mission ids and decoded categoricals"""
+        self._ensure_indexed()
+        columns = columns or STORE_COLUMNS
+        data = {"mission_id": mission_ids(self._columns["mission_no"][rows], self._columns["flown_at"][rows])}
+        for name in columns:
+            values = self._columns[name][rows]
+            if name in CATEGORICAL_COLUMNS:
+                values = pd.Categorical.from_codes(values, CATEGORICAL_COLUMNS[name])
+            data[name] = values
+        return pd.DataFrame(data)
+
+    def query(self, columns=None, **filters):
+        """Missions matching the filters of `select`, as a frame"""
+        return self.fetch(self.select(**filters), columns)
+
+    def top(self, column, k=5, ascending=False, **filters):
+        """k best (or worst) missions by a numeric column among those matching the filters"""
+        rows = self.select(**filters)
+        values = self._columns[column][rows].astype(np.float64)
+        values = values if ascending else -values
+        if len(rows) > k:
+            best = np.argpartition(values, k)[:k]
+            rows, values = rows[best], values[best]
+        return self.fetch(rows[np.argsort(values, kind="stable")])
+
+    def aggregate(self, period="Q", **filters):
+        """Per month / quarter / year: missions, mean confidence and image quality, QC pass rate"""
+        rows = self.select(**filters)
+        if not len(rows):
+            return pd.DataFrame(columns=["period", "missions", "mean_confidence", "mean_image_quality",
+                                         "qc_pass_rate"])
+        # Calendar conversion once per distinct day, then a gather: far cheaper than per row
+        days = self._seconds[rows] // 86_400
+        first_day = days.min()
+        day_period = (np.arange(first_day, days.max() + 1).astype("datetime64[D]").astype("datetime64[M]")
+                      .astype(np.int64) // PERIODS[period])
+        group = day_period[days - first_day]
+        group -= day_period[0]
+        count = np.bincount(group)
+        present = np.flatnonzero(count)
+        count = count[present]
+        mean = lambda name: np.bincount(group, weights=self._columns[name][rows])[present] / count
+        first_month = (present + day_period[0]) * PERIODS[period]
+        labels = [f"{m // 12 + 1970}" + ("" if period == "Y" else f"Q{m % 12 // 3 + 1}" if period == "Q"
+                                           else f"-{m % 12 + 1:02d}") for m in first_month]
+        return pd.DataFrame({
+            "period": labels,
+            "missions": count,
+            "mean_confidence": mean("confidence_score"),
+            "mean_image_quality": mean("image_quality"),
+            "qc_pass_rate": mean("qc_passed"),
+        })
+
+
+# ================= SIMULATED HISTORY =================
+def simulate_mission_batches(n=10_000_000, batch_size=1_000_000, start="2020-01-01", end="2025-01-01",
+                             n_sites=1_000, seed=42):
+    """Mission history in insert-sized batches (dicts of columns), roughly in flight order"""
+    rng = np.random.default_rng(seed)
+    site_assets = rng.choice(ASSET_TYPES, n_sites)
+    start_s, end_s = _seconds(start), _seconds(end)
+    span = (end_s - start_s) / n
+    for first in range(0, n, batch_size):
+        size = min(batch_size, n - first)
+        site_id = rng.integers(0, n_sites, size).astype(np.int32)
+        offsets = np.sort(rng.uniform((first) * span, (first + size) * span, size))
+        image_quality = np.clip(rng.normal(82, 8, size), 0, 100)
+        confidence = np.clip(0.6 * image_quality + rng.normal(30, 6, size), 0, 100)
+        yield {
+            "mission_no": np.arange(first, first + size, dtype=np.int64),
+            "site_id": site_id,
+            "asset_type": site_assets[site_id],
+            "flown_at": (start_s + offsets.astype(np.int64)).astype("datetime64[s]"),
+            "image_quality": image_quality,
+            "overlap_consistency": np.clip(rng.normal(84, 6, size), 0, 100),
+            "wind_speed": np.clip(rng.gamma(2.5, 5, size), 0, 60),
+            "sensor_calibration": rng.choice(SENSOR_LEVELS, size, p=[0.05, 0.15, 0.5, 0.3]),
+            "confidence_score": confidence,
+            "qc_passed": confidence >= 70,
+        }
@@ -0,0 +1,144 @@
+# modules/mission_timing.py - CONFIDENCE-AWARE MISSION TIMING (WATCHTOWER WINDOWS)
+import numpy as np
+import pandas as pd
+
+from modules.scoring import ASSET_TYPES, LIGHTING_LEVELS, SENSOR_LEVELS, score_missions
+from modules.context import LIGHTING_THRESHOLDS, lighting_from_elevation
+
+# Inputs that do not depend on the hour, used when a site does not give them
+DEFAULT_SITE_INPUTS = {
+    "image_quality": 85.0,
+    "overlap_consistency": 85.0,
+    "historical_match": 75.0,
+    "sensor_calibration": "Good",
+    "asset_type": "Mining Stockpile",
+}
+MIN_SUN_ELEVATION = 5.0   # degrees; no windows before sunrise or after sunset
+MIN_GAP_HOURS = 12        # recommended windows for one site start at least this far apart
+
+
+def _utc_hour(timestamp):
+    # Naive times are UTC, as in the context provider
+    timestamp = pd.Timestamp(timestamp)
+    timestamp = timestamp.tz_convert(None) if timestamp.tz else timestamp
+    return np.datetime64(timestamp.floor("h"), "h")
+
+
+def _categorical(values, categories, name):
+    values = pd.Categorical(np.asarray(values, dtype=object), categories=categories)
+    if (values.codes < 0).any():
+        raise ValueError(f"Unknown {name}; expected one of {categories}")
+    return values
+
+
+def confidence_grid(provider, sites, start, days=14, weights=None, asset_adjustments=None):
+    """Predicted confidence for every (site, hour) in [start, start + days), shape (sites, hours).
+
+    Sun position and wind come from the context provider for each
+    site's tile and hour; the other inputs are fixed per site. The grid
+    is scored in one `score_missions` call. Hours with the sun below
+    MIN_SUN_ELEVATION or no wind observation are NaN.
+    Returns (hours, scores, sun_elevation, wind_speed).
+    """
+    hours = _utc_hour(start) + np.arange(days * 24)
+    n_sites, n_hours = len(sites), len(hours)
+    site_of = np.repeat(np.arange(n_sites), n_hours)
+    lat = np.repeat(sites["lat"].to_numpy(dtype=np.float64), n_hours)
+    lon = np.repeat(sites["lon"].to_numpy(dtype=np.float64), n_hours)
+
+    # Context is computed once per distinct (tile, hour): sites sharing a tile share the work
+    elevation, wind = provider.sun_and_wind(np.tile(hours, n_sites), lat, lon)
+    elevation, wind = elevation.astype(np.float64), wind.astype(np.float64)
+
+    fixed = {name: sites[name].to_numpy() if name in sites else np.full(n_sites, value, dtype=object)
+             for name, value in DEFAULT_SITE_INPUTS.items()}
+    grid = pd.DataFrame({
+        "image_quality": fixed["image_quality"].astype(np.float64)[site_of],
+        "overlap_consistency": fixed["overlap_consistency"].astype(np.float64)[site_of],
+        "historical_match": fixed["historical_match"].astype(np.float64)[site_of],
+        "wind_speed": wind,
+        # Categoricals are gathered by code, so scoring never touches per-cell strings
+        "lighting_conditions": pd.Categorical.from_codes(
+            np.searchsorted(LIGHTING_THRESHOLDS, elevation, side="right"), LIGHTING_LEVELS),
+        "sensor_calibration": _categorical(fixed["sensor_calibration"], SENSOR_LEVELS,
+                                           "sensor calibration").take(site_of),
+        "asset_type": _categorical(fixed["asset_type"], ASSET_TYPES, "asset type").take(site_of),
+    })
+    scores = score_missions(grid, weights, asset_adjustments)
+    scores[(elevation < MIN_SUN_ELEVATION) | np.isnan(wind)] = np.nan
+    shape = (n_sites, n_hours)
+    return hours, scores.reshape(shape), elevation.reshape(shape), wind.reshape(shape)
+
+
+def recommend_windows(provider, sites, start, days=14, window_hours=2, top_k=3,
+                      weights=None, asset_adjustments=None):
+    """Best `top_k` flight windows per site over the next `days`, ranked by predicted confidence.
+
+    A window of `window_hours` consecutive hours scores its worst hour,
+    so the whole flight clears the bar. Windows for one site start at
+    least MIN_GAP_HOURS apart, which keeps alternatives on different
+    days rather than neighbouring hours. `sites` needs site_id, lat, lon
+    and may override any of DEFAULT_SITE_INPUTS per site.
+    """
+    hours, scores, elevation, wind = confidence_grid(provider, sites, start, days, weights, asset_adjustments)
+    n_sites = len(sites)
+    if window_hours > 1:
+        windows = np.lib.stride_tricks.sliding_window_view(scores, window_hours, axis=1)
+        window_scores = windows.min(axis=2)  # NaN if any hour in the window is ineligible
+        window_wind = np.lib.stride_tricks.sliding_window_view(wind, window_hours, axis=1).max(axis=2)
+    else:
+        window_scores, window_wind = scores, wind
+    window_scores = np.where(np.isnan(window_scores), -np.inf, window_scores)
+
+    # Greedy top-k with suppression, vectorized across sites
+    rows, offsets = np.arange(n_sites), np.arange(window_scores.shape[1])
+    picks, picked_scores = [], []
+    for _ in range(top_k):
+        best = window_scores.argmax(axis=1)
+        picks.append(best)
+        picked_scores.append(window_scores[rows, best])
+        window_scores[np.abs(offsets[None, :] - best[:, None]) < MIN_GAP_HOURS] = -np.inf
+
+    best, best_scores = np.column_stack(picks), np.column_stack(picked_scores)
+    site_rows = np.repeat(rows, top_k)
+    best, best_scores = best.ravel(), best_scores.ravel()
+    found = np.isfinite(best_scores)
+    site_rows, best, best_scores = site_rows[found], best[found], best_scores[found]
+    return pd.DataFrame({
+        "site_id": sites["site_id"].to_numpy()[site_rows],
+        "rank": (np.arange(len(found)) % top_k + 1)[found],
+        "window_start": hours[best],
+        "window_end": hours[best] + np.timedelta64(window_hours, "h"),
+        "predicted_confidence": best_scores,
+        "sun_elevation": elevation[site_rows, best],
+        "max_wind_speed": window_wind[site_rows, best],
+    })
+
+
+def window_plans(sites, windows, planned_at):
+    """Planned scoring inputs per recommended window, for pre-flight forecasting: the site's
+    fixed inputs, the window's worst-hour wind as the forecast and the lead time from `planned_at`"""
+    site_rows = pd.Index(sites["site_id"]).get_indexer(windows["site_id"])
+    plans = pd.DataFrame({
+        name: (sites[name].to_numpy()[site_rows] if name in sites else value)
+        for name, value in DEFAULT_SITE_INPUTS.items()
+    }, index=windows.index)
+    plans["lighting_conditions"] = lighting_from_elevation(windows["sun_elevation"].to_numpy())
+    plans["wind_speed"] = windows["max_wind_speed"].to_numpy()
+    plans["lead_hours"] = (windows["window_start"].to_numpy() - _utc_hour(planned_at)) / np.timedelta64(1, "h")
+    return plans
+
+
+def simulate_sites(n=1_000, seed=42):
+    """Survey sites inside the synthetic weather store's area"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "site_id": [f"SITE-{i:04d}" for i in range(n)],
+        "lat": rng.uniform(8.5, 29.5, n),
+        "lon": rng.uniform(68.5, 89.5, n),
+        "asset_type": rng.choice(ASSET_TYPES, n),
+        "image_quality": np.clip(rng.normal(85, 6, n), 0, 100),
+        "overlap_consistency": np.clip(rng.normal(85, 6, n), 0, 100),
+        "historical_match": np.clip(rng.normal(75, 10, n), 0, 100),
+        "sensor_calibration": rng.choice(SENSOR_LEVELS, n, p=[0.05, 0.15, 0.5, 0.3]),
+    })
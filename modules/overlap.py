@@ -0,0 +1,204 @@
+# modules/overlap.py - OVERLAP CONSISTENCY FROM IMAGE GEOTAGS
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree, Delaunay
+
+EARTH_RADIUS_M = 6371008.8
+
+# Default camera: 1" sensor, 8.8mm lens (typical mapping drone)
+DEFAULT_CAMERA = {
+    "sensor_width_mm": 13.2,
+    "sensor_height_mm": 8.8,
+    "focal_length_mm": 8.8,
+}
+
+GEOTAG_COLUMNS = ["lat", "lon", "altitude", "yaw"]
+
+# ================= GEOMETRY =================
+def geotags_to_local(lat, lon, lat0=None, lon0=None):
+    """Project lat/lon (degrees) to local east/north metres around the mission centre"""
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    lat0 = np.mean(lat) if lat0 is None else lat0
+    lon0 = np.mean(lon) if lon0 is None else lon0
+    x = np.radians(lon - lon0) * EARTH_RADIUS_M * np.cos(np.radians(lat0))
+    y = np.radians(lat - lat0) * EARTH_RADIUS_M
+    return np.column_stack([x, y])
+
+
+def image_footprints(altitude, camera=None):
+    """Ground footprint (across-track width, along-track height) in metres per image"""
+    camera = camera or DEFAULT_CAMERA
+    altitude = np.asarray(altitude, dtype=np.float64)
+    width = altitude * camera["sensor_width_mm"] / camera["focal_length_mm"]
+    height = altitude * camera["sensor_height_mm"] / camera["focal_length_mm"]
+    return width, height
+
+
+def _heading_axes(yaw_deg):
+    # Yaw is the flight heading, clockwise from north
+    theta = np.radians(yaw_deg)
+    along = np.stack([np.sin(theta), np.cos(theta)], axis=-1)
+    across = np.stack([np.cos(theta), -np.sin(theta)], axis=-1)
+    return along, across
+
+# ================= OVERLAP COMPUTATION =================
+def compute_overlap(geotags, camera=None, target_front=0.75, target_side=0.65,
+                    min_views=None, cell_size=None, neighbours=16, max_cells=250_000):
+    """Front/side overlap per image plus an under-overlap raster for the whole mission.
+
+    Neighbours come from a KD-tree over image centres, so cost grows with
+    n * neighbours rather than n². Returns a dict with per-image overlap,
+    the coverage raster and the 0-100 overlap consistency score.
+    """
+    missing = [c for c in GEOTAG_COLUMNS if c not in geotags]
+    if missing:
+        raise ValueError(f"Geotags missing columns: {', '.join(missing)}")
+
+    xy = geotags_to_local(geotags["lat"], geotags["lon"])
+    yaw = np.asarray(geotags["yaw"], dtype=np.float64)
+    width, height = image_footprints(geotags["altitude"], camera)
+    n = len(xy)
+    if n < 2:
+        raise ValueError("At least two geotagged images are required")
+
+    tree = cKDTree(xy)
+    radius = float(np.hypot(width, height).max())
+    k = min(neighbours + 1, n)
+    dist, idx = tree.query(xy, k=k, distance_upper_bound=radius)
+    dist, idx = dist[:, 1:], idx[:, 1:]
+    valid = np.isfinite(dist)
+    idx = np.where(valid, idx, 0)
+
+    # Neighbour offsets expressed in each image's own along/across frame
+    along, across = _heading_axes(yaw)
+    offset = xy[idx] - xy[:, None, :]
+    a = np.abs(np.einsum("nkd,nd->nk", offset, along))
+    c = np.abs(np.einsum("nkd,nd->nk", offset, across))
+    w = width[:, None]
+    h = height[:, None]
+
+    # A neighbour is a front neighbour when its offset is mostly along-track
+    is_front = a / h >= c / w
+    front_pairs = np.where(valid & is_front & (c < 0.5 * w), np.clip(1 - a / h, 0, 1), 0)
+    side_pairs = np.where(valid & ~is_front & (a < 0.5 * h), np.clip(1 - c / w, 0, 1), 0)
+    front = front_pairs.max(axis=1)
+    side = side_pairs.max(axis=1)
+
+    attainment = np.clip(front / target_front, 0, 1) * np.clip(side / target_side, 0, 1)
+
+    if min_views is None:
+        expected_views = 1 / ((1 - target_front) * (1 - target_side))
+        min_views = max(2, int(expected_views // 2))
+
+    raster = coverage_raster(xy, yaw, width, height, tree=tree, cell_size=cell_size,
+                             neighbours=max(2 * neighbours, min_views + 1),
+                             max_cells=max_cells)
+    under = raster["in_area"] & (raster["views"] < min_views)
+    in_area_cells = int(raster["in_area"].sum())
+    under_fraction = float(under.sum() / in_area_cells) if in_area_cells else 0.0
+
+    per_image = pd.DataFrame({
+        "front_overlap": front,
+        "side_overlap": side,
+        "attainment": attainment,
+    }, index=geotags.index)
+
+    return {
+        "per_image": per_image,
+        "front_overlap_mean": float(front.mean()),
+        "side_overlap_mean": float(side.mean()),
+        "views": raster["views"],
+        "under_overlap": under,
+        "under_fraction": under_fraction,
+        "extent": raster["extent"],
+        "cell_size": raster["cell_size"],
+        "min_views": min_views,
+        "overlap_consistency": float(100 * attainment.mean() * (1 - under_fraction)),
+    }
+
+
+def coverage_raster(xy, yaw, width, height, tree=None, cell_size=None, neighbours=32,
+                    max_cells=250_000):
+    """Count how many image footprints cover each grid cell (counts saturate at `neighbours`)"""
+    tree = tree or cKDTree(xy)
+    half_diag = 0.5 * float(np.hypot(width, height).max())
+    xmin, ymin = xy.min(axis=0) - half_diag
+    xmax, ymax = xy.max(axis=0) + half_diag
+
+    if cell_size is None:
+        cell_size = float(np.median(height)) / 4
+    # Coarsen the grid until it fits the cell budget
+    area = (xmax - xmin) * (ymax - ymin)
+    cell_size = max(cell_size, float(np.sqrt(area / max_cells)))
+
+    xs = np.arange(xmin + cell_size / 2, xmax, cell_size)
+    ys = np.arange(ymin + cell_size / 2, ymax, cell_size)
+    gx, gy = np.meshgrid(xs, ys)
+    cells = np.column_stack([gx.ravel(), gy.ravel()])
+
+    k = min(neighbours, len(xy))
+    dist, idx = tree.query(cells, k=k, distance_upper_bound=half_diag)
+    dist = dist.reshape(len(cells), -1)
+    idx = idx.reshape(len(cells), -1)
+    valid = np.isfinite(dist)
+    idx = np.where(valid, idx, 0)
+
+    along, across = _heading_axes(yaw[idx])
+    offset = cells[:, None, :] - xy[idx]
+    a = np.abs(np.einsum("nkd,nkd->nk", offset, along))
+    c = np.abs(np.einsum("nkd,nkd->nk", offset, across))
+    inside = valid & (a <= 0.5 * height[idx]) & (c <= 0.5 * width[idx])
+    views = inside.sum(axis=1).reshape(gy.shape)
+
+    # Only cells inside the flown area count towards under-overlap
+    if len(xy) >= 3:
+        try:
+            in_area = Delaunay(xy).find_simplex(cells) >= 0
+        except Exception:
+            in_area = views.ravel() > 0
+    else:
+        in_area = views.ravel() > 0
+
+    return {
+        "views": views,
+        "in_area": in_area.reshape(gy.shape),
+        "extent": (float(xmin), float(xmax), float(ymin), float(ymax)),
+        "cell_size": cell_size,
+    }
+
+# ================= SIMULATED SURVEYS =================
+def simulate_survey_geotags(n_images=20_000, lat0=19.0760, lon0=72.8777, altitude=100.0,
+                            front=0.80, side=0.70, camera=None, jitter_m=1.5,
+                            dropout=0.02, seed=42):
+    """Lawnmower survey geotags for demos and benchmarks"""
+    rng = np.random.default_rng(seed)
+    width, height = image_footprints(altitude, camera)
+    spacing_along = float(height) * (1 - front)
+    spacing_across = float(width) * (1 - side)
+
+    per_line = max(2, int(np.sqrt(n_images * spacing_across / spacing_along)))
+    lines = int(np.ceil(n_images / per_line))
+    line_idx = np.repeat(np.arange(lines), per_line)[:n_images]
+    pos_idx = np.tile(np.arange(per_line), lines)[:n_images]
+    # Alternate flight direction on every other line
+    northbound = line_idx % 2 == 0
+    pos = np.where(northbound, pos_idx, per_line - 1 - pos_idx)
+
+    x = line_idx * spacing_across + rng.normal(0, jitter_m, n_images)
+    y = pos * spacing_along + rng.normal(0, jitter_m, n_images)
+    yaw = np.where(northbound, 0.0, 180.0) + rng.normal(0, 2.0, n_images)
+
+    keep = rng.random(n_images) >= dropout
+    x, y, yaw = x[keep], y[keep], yaw[keep]
+    x -= x.mean()
+    y -= y.mean()
+
+    lat = lat0 + np.degrees(y / EARTH_RADIUS_M)
+    lon = lon0 + np.degrees(x / (EARTH_RADIUS_M * np.cos(np.radians(lat0))))
+    return pd.DataFrame({
+        "lat": lat,
+        "lon": lon,
+        "altitude": altitude + rng.normal(0, 0.5, len(lat)),
+        "yaw": np.mod(yaw, 360),
+    })
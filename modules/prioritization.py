@@ -0,0 +1,265 @@
+# modules/prioritization.py - PRIORITY INDEX FOR ACTION PRIORITIZATION
+import heapq
+import numpy as np
+import pandas as pd
+
+from modules.scoring import ASSET_TYPES, MISSION_CRITICALITIES
+from modules.finding_confidence import FindingConfidenceModel
+
+# Traffic-light action buckets on finding confidence, in display order
+ACTION_BUCKETS = [("ACT NOW", 85), ("REVIEW", 70), ("MONITOR", 0)]
+ACTIONS = [name for name, _ in ACTION_BUCKETS]
+
+# Asset importance is set as a level (what the page shows); the level's weight is what ranks
+IMPORTANCE_WEIGHTS = {"Low": 0.8, "Medium": 1.0, "High": 1.2, "Critical": 1.4}
+ASSET_IMPORTANCE_LEVELS = {
+    "Mining Stockpile": "High",
+    "Solar Farm": "Critical",
+    "Road Infrastructure": "Medium",
+    "Building Inspection": "Medium",
+    "Agricultural Field": "Medium",
+}
+ASSET_IMPORTANCE = {asset: IMPORTANCE_WEIGHTS[level] for asset, level in ASSET_IMPORTANCE_LEVELS.items()}
+CRITICALITY_WEIGHTS = {"Low": 0.5, "Medium": 1.0, "High": 1.5, "Critical": 2.0}
+
+# Default criticality per finding type (id prefix)
+FINDING_CRITICALITY = {
+    "VOL": "Medium", "SLP": "High", "ERD": "Medium", "EQP": "Low",
+    "THM": "High", "DTR": "Low", "STR": "Critical", "CON": "High",
+    "CRK": "High", "WAR": "Medium", "ALG": "Medium", "CLN": "Low",
+}
+
+# Mission criticality: ranking weight, and a shift of every action threshold
+# (emergencies act on less certainty, compliance evidence needs more)
+MISSION_CRITICALITY_WEIGHTS = dict(zip(MISSION_CRITICALITIES, [1.0, 1.0, 1.3, 2.0]))
+MISSION_THRESHOLD_SHIFTS = dict(zip(MISSION_CRITICALITIES, [0.0, 0.0, 5.0, -10.0]))
+DEFAULT_MISSION_CRITICALITY = "Routine Inspection"
+
+
+def action_for(confidence, threshold_shift=0.0):
+    """Vectorized ACT NOW / REVIEW / MONITOR bucket index for 0-100 confidences,
+    with thresholds moved by `threshold_shift` (scalar or per finding)"""
+    thresholds = np.array([t for _, t in ACTION_BUCKETS[:-1]], dtype=np.float64)
+    shifted = np.asarray(confidence, dtype=np.float64) - np.asarray(threshold_shift, dtype=np.float64)
+    return np.searchsorted(-thresholds, -shifted, side="left")  # a confidence on a threshold is in the higher bucket
+
+
+def action_thresholds(mission_criticality=DEFAULT_MISSION_CRITICALITY):
+    """(action, minimum confidence) pairs in effect for one mission criticality"""
+    shift = MISSION_THRESHOLD_SHIFTS[mission_criticality]
+    return [(name, threshold + shift if threshold else 0) for name, threshold in ACTION_BUCKETS]
+
+
+def _lookup(values, table, name):
+    codes = pd.Categorical(values, categories=list(table)).codes
+    if (codes < 0).any():
+        raise ValueError(f"Unknown {name}; expected one of {list(table)}")
+    return np.asarray(list(table.values()), dtype=np.float64)[codes]
+
+
+def _mission_lookup(mission_criticality, table):
+    # One criticality for the whole frame (scalar) or one per finding
+    if isinstance(mission_criticality, str):
+        return _lookup([mission_criticality], table, "mission criticality")[0]
+    return _lookup(mission_criticality, table, "mission criticality")
+
+
+class _MaxTree:
+    """Array-backed tournament tree: O(log n) point updates, best-first top-k"""
+
+    def __init__(self, capacity):
+        self.capacity = 1 << max(int(capacity) - 1, 1).bit_length()
+        self.tree = np.full(2 * self.capacity, -np.inf)
+
+    def build(self, values):
+        self.tree[self.capacity:self.capacity + len(values)] = values
+        level = self.capacity
+        while level > 1:
+            self.tree[level // 2:level] = np.maximum(self.tree[level:2 * level:2], self.tree[level + 1:2 * level:2])
+            level //= 2
+
+    def update(self, slot, value):
+        i = slot + self.capacity
+        self.tree[i] = value
+        i //= 2
+        while i:
+            self.tree[i] = max(self.tree[2 * i], self.tree[2 * i + 1])
+            i //= 2
+
+    def top(self, offset, k):
+        """Leaf slots ranked offset .. offset+k-1, visiting O((offset + k) log n) nodes"""
+        tree, capacity = self.tree, self.capacity
+        frontier = [(-tree[1], 1)] if tree[1] > -np.inf else []
+        slots = []
+        while frontier and len(slots) < offset + k:
+            _, node = heapq.heappop(frontier)
+            if node >= capacity:
+                slots.append(node - capacity)
+                continue
+            for child in (2 * node, 2 * node + 1):
+                if tree[child] > -np.inf:
+                    heapq.heappush(frontier, (-tree[child], child))
+        return slots[offset:]
+
+
+class FindingPriorityIndex:
+    """Open findings bucketed by action and ranked by priority within each bucket.
+
+    priority = confidence x asset importance x finding criticality weight
+    x mission criticality weight, and the mission criticality shifts the
+    bucket thresholds (see MISSION_THRESHOLD_SHIFTS). Each bucket is a
+    max-tree over a shared slot array, so an upsert or removal is
+    O(log n), a page of k findings costs O((offset + k) log n) and a bulk
+    load of millions is a few vectorized passes. Pass a client profile's
+    `asset_importance` to rank with its mapping.
+    """
+
+    def __init__(self, capacity=1024, asset_importance=None):
+        self.asset_importance = dict(asset_importance or ASSET_IMPORTANCE)
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self._trees = [_MaxTree(capacity) for _ in ACTIONS]
+        size = self._trees[0].capacity
+        self._slots = {}
+        self._free = []
+        self._used = 0  # high-water mark of slots handed out
+        self._ids = np.empty(size, dtype=object)
+        self._confidence = np.full(size, np.nan)
+        self._priority = np.full(size, np.nan)
+        self._bucket = np.full(size, -1, dtype=np.int8)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def counts(self):
+        """Open findings per action bucket"""
+        live = self._bucket[self._bucket >= 0]
+        return pd.Series(np.bincount(live, minlength=len(ACTIONS)), index=ACTIONS)
+
+    def priorities(self, confidence, asset_type, criticality, mission_criticality=DEFAULT_MISSION_CRITICALITY):
+        mission_weight = _mission_lookup(mission_criticality, MISSION_CRITICALITY_WEIGHTS)
+        return (np.asarray(confidence, dtype=np.float64)
+                * _lookup(asset_type, self.asset_importance, "asset type")
+                * _lookup(criticality, CRITICALITY_WEIGHTS, "criticality")
+                * mission_weight)
+
+    # ================= BULK LOAD =================
+    def load(self, findings):
+        """Replace the index with a frame of finding_id, confidence, asset_type, criticality
+        and optionally mission_criticality (default Routine Inspection)"""
+        n = len(findings)
+        self._allocate(max(n, 1024))
+        confidence = findings["confidence"].to_numpy(dtype=np.float64)
+        mission_criticality = findings.get("mission_criticality", DEFAULT_MISSION_CRITICALITY)
+        priority = self.priorities(confidence, findings["asset_type"], findings["criticality"], mission_criticality)
+        bucket = action_for(confidence, _mission_lookup(mission_criticality, MISSION_THRESHOLD_SHIFTS)).astype(np.int8)
+
+        self._ids[:n] = findings["finding_id"].to_numpy(dtype=object)
+        self._confidence[:n] = confidence
+        self._priority[:n] = priority
+        self._bucket[:n] = bucket
+        self._slots = dict(zip(self._ids[:n], range(n)))
+        self._used = n
+        if len(self._slots) != n:
+            raise ValueError("finding_id must be unique")
+        for b, tree in enumerate(self._trees):
+            tree.build(np.where(bucket == b, priority, -np.inf))
+        return self
+
+    # ================= INCREMENTAL UPDATES =================
+    def _grow(self):
+        capacity = 2 * self._trees[0].capacity
+        n = len(self._ids)
+        self._ids = np.concatenate([self._ids, np.empty(capacity - n, dtype=object)])
+        self._confidence = np.concatenate([self._confidence, np.full(capacity - n, np.nan)])
+        self._priority = np.concatenate([self._priority, np.full(capacity - n, np.nan)])
+        self._bucket = np.concatenate([self._bucket, np.full(capacity - n, -1, dtype=np.int8)])
+        for b in range(len(ACTIONS)):
+            tree = _MaxTree(capacity)
+            tree.build(np.where(self._bucket == b, self._priority, -np.inf))
+            self._trees[b] = tree
+
+    def upsert(self, finding_id, confidence, asset_type, criticality="Medium",
+               mission_criticality=DEFAULT_MISSION_CRITICALITY):
+        """Add or re-score one finding; it moves bucket if its confidence crossed a threshold"""
+        slot = self._slots.get(finding_id)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+            else:
+                if self._used == len(self._ids):
+                    self._grow()
+                slot, self._used = self._used, self._used + 1
+            self._slots[finding_id] = slot
+            self._ids[slot] = finding_id
+        elif self._bucket[slot] >= 0:
+            self._trees[self._bucket[slot]].update(slot, -np.inf)
+
+        # Scalar path: plain dict lookups keep a single update in microseconds
+        try:
+            priority = (confidence * self.asset_importance[asset_type] * CRITICALITY_WEIGHTS[criticality]
+                        * MISSION_CRITICALITY_WEIGHTS[mission_criticality])
+            shift = MISSION_THRESHOLD_SHIFTS[mission_criticality]
+        except KeyError as exc:
+            raise ValueError(f"Unknown asset type or criticality: {exc}") from None
+        bucket = next((b for b, (_, threshold) in enumerate(ACTION_BUCKETS[:-1]) if confidence - shift >= threshold),
+                      len(ACTION_BUCKETS) - 1)
+        self._confidence[slot], self._priority[slot], self._bucket[slot] = confidence, priority, bucket
+        self._trees[bucket].update(slot, priority)
+
+    def remove(self, finding_id):
+        """Close a finding (e.g. resolved); O(log n)"""
+        slot = self._slots.pop(finding_id, None)
+        if slot is None:
+            return
+        self._trees[self._bucket[slot]].update(slot, -np.inf)
+        self._ids[slot], self._bucket[slot] = None, -1
+        self._confidence[slot] = self._priority[slot] = np.nan
+        self._free.append(slot)
+
+    # ================= QUERIES =================
+    def page(self, action=None, offset=0, k=25):
+        """Ranked slice [offset, offset + k) of one bucket, or of all buckets in action order"""
+        if action is not None:
+            slots = self._trees[ACTIONS.index(action)].top(offset, k)
+        else:
+            slots, counts = [], self.counts().to_numpy()
+            for b, tree in enumerate(self._trees):
+                if offset >= counts[b]:
+                    offset -= counts[b]
+                    continue
+                slots += tree.top(offset, k - len(slots))
+                offset = 0
+                if len(slots) >= k:
+                    break
+        slots = np.asarray(slots, dtype=np.int64)
+        return pd.DataFrame({
+            "finding_id": self._ids[slots],
+            "action": np.asarray(ACTIONS, dtype=object)[self._bucket[slots]],
+            "confidence": self._confidence[slots],
+            "priority": self._priority[slots],
+        })
+
+# ================= SIMULATED PORTFOLIO =================
+def simulate_open_findings(n=1_000_000, seed=42):
+    """Open findings across a portfolio, with per-finding confidence from the finding model"""
+    rng = np.random.default_rng(seed)
+    types = np.array(list(FINDING_CRITICALITY), dtype=object)
+    finding_type = types[rng.integers(0, len(types), n)]
+    findings = pd.DataFrame({
+        "finding_id": [f"{t}-{i:07d}" for t, i in zip(finding_type, range(n))],
+        "finding_type": finding_type,
+        "asset_type": rng.choice(ASSET_TYPES, n),
+        "mission_criticality": rng.choice(MISSION_CRITICALITIES, n, p=[0.45, 0.3, 0.2, 0.05]),
+        "site": rng.integers(1, 401, n),
+        "image_quality": np.clip(rng.normal(82, 8, n), 0, 100),
+        "lighting_conditions": rng.choice(["Poor", "Fair", "Good", "Excellent"], n, p=[0.1, 0.25, 0.4, 0.25]),
+        "overlap_consistency": np.clip(rng.normal(85, 6, n), 0, 100),
+        "wind_speed": np.clip(rng.gamma(2.5, 5, n), 0, 60),
+        "sensor_calibration": rng.choice(["Expired", "Marginal", "Good", "Excellent"], n, p=[0.05, 0.15, 0.5, 0.3]),
+        "detector_confidence": rng.beta(6, 2, n),
+    })
+    findings["criticality"] = findings["finding_type"].map(FINDING_CRITICALITY)
+    findings["confidence"] = FindingConfidenceModel().score(findings)
+    return findings
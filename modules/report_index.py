@@ -0,0 +1,260 @@
+# modules/report_index.py - SEMANTIC SEARCH OVER MISSION REPORTS (EMBEDDED VECTOR INDEX)
+import os
+import json
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+from modules.scoring import ASSET_TYPES
+
+N_FEATURES = 2 ** 20   # hashed vocabulary (unigrams + bigrams)
+EMBEDDING_DIM = 64
+STORAGE_DTYPES = {"int8": np.int8, "float16": np.float16}
+BLOCK_ROWS = 65_536    # rows dequantized per BLAS call in a brute-force scan
+N_PROBE = 32
+KMEANS_SAMPLE = 100_000
+
+# ================= EMBEDDINGS =================
+class ReportEmbedder:
+    """Local text embeddings: hashed TF-IDF projected by a truncated SVD.
+
+    Hashing needs no vocabulary, so only the IDF weights and the SVD
+    components are learned, from a sample of reports. Embeddings are
+    L2-normalized, so the inner product is the cosine similarity.
+    """
+
+    def __init__(self, n_features=N_FEATURES, dim=EMBEDDING_DIM, seed=42):
+        self.n_features = n_features
+        self.dim = dim
+        self.seed = seed
+        self.idf = None
+        self.components = None
+        self._hasher = HashingVectorizer(n_features=n_features, ngram_range=(1, 2),
+                                         alternate_sign=False, norm=None, dtype=np.float32)
+
+    def _tfidf(self, texts):
+        counts = self._hasher.transform(texts)
+        # Sublinear term frequency times IDF, applied to the stored entries only
+        counts.data = np.log1p(counts.data) * self.idf[counts.indices]
+        return normalize(counts, copy=False)
+
+    def fit(self, texts):
+        counts = self._hasher.transform(texts)
+        document_freq = np.bincount(counts.indices, minlength=self.n_features)
+        self.idf = (np.log((1 + len(texts)) / (1 + document_freq)) + 1).astype(np.float32)
+        svd = TruncatedSVD(self.dim, algorithm="randomized", random_state=self.seed)
+        svd.fit(self._tfidf(texts))
+        self.components = np.ascontiguousarray(svd.components_.T, dtype=np.float32)  # (n_features, dim)
+        return self
+
+    def transform(self, texts):
+        """(n, dim) float32, unit length"""
+        if self.components is None:
+            raise RuntimeError("ReportEmbedder.fit must run before transform")
+        embedded = np.asarray(self._tfidf(texts) @ self.components, dtype=np.float32)
+        return normalize(embedded, copy=False)
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "idf.npy"), self.idf)
+        np.save(os.path.join(path, "components.npy"), self.components)
+        with open(os.path.join(path, "embedder.json"), "w") as f:
+            json.dump({"n_features": self.n_features, "dim": self.dim, "seed": self.seed}, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, "embedder.json")) as f:
+            embedder = cls(**json.load(f))
+        embedder.idf = np.load(os.path.join(path, "idf.npy"))
+        embedder.components = np.load(os.path.join(path, "components.npy"))
+        return embedder
+
+# ================= QUANTIZED STORAGE =================
+def quantize(vectors, dtype):
+    """(codes, scales): int8 codes carry one float32 scale per row; float16 rows have scale 1"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "float16":
+        return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+
+def _top_k(scores, ids, k):
+    # Best k per column of a (rows, queries) score block, best first; ids are per row or per cell
+    k = min(k, len(scores))
+    best = np.argpartition(-scores, k - 1, axis=0)[:k]
+    best = np.take_along_axis(best, np.argsort(-np.take_along_axis(scores, best, axis=0), axis=0, kind="stable"), axis=0)
+    best_ids = ids[best] if ids.ndim == 1 else np.take_along_axis(ids, best, axis=0)
+    return best_ids, np.take_along_axis(scores, best, axis=0)
+
+
+class ReportVectorIndex:
+    """Embedded vector index over report chunks, kept in memory-mapped .npy files.
+
+    Vectors are stored quantized (int8 with a per-row scale, or float16)
+    and scanned in blocks: each block is widened to float32 once and
+    scored against all queries in one BLAS product, so batched queries
+    share the pass over the file. With `n_lists`, rows are grouped by
+    k-means list (as in the historical mission index) and a query only
+    scans its `n_probe` closest lists.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "index.json")) as f:
+            self.meta = json.load(f)
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.scales = np.load(os.path.join(path, "scales.npy"), mmap_mode="r")
+        self.chunk_ids = np.load(os.path.join(path, "chunk_ids.npy"), mmap_mode="r")
+        self.centroids = self.list_offsets = None
+        if self.meta["n_lists"]:
+            self.centroids = np.load(os.path.join(path, "centroids.npy"))
+            self.list_offsets = np.load(os.path.join(path, "list_offsets.npy"))
+
+    def __len__(self):
+        return len(self.vectors)
+
+    @classmethod
+    def build(cls, path, batches, dtype="int8", n_lists=None, seed=42):
+        """Write an index from (chunk_ids, embeddings) batches; returns it opened.
+
+        Batches are quantized into the memory-mapped file as they arrive.
+        For IVF, centroids are fitted on a sample and the file is then
+        rewritten list by list, so each list is one contiguous slice.
+        """
+        if dtype not in STORAGE_DTYPES:
+            raise ValueError(f"Unknown storage dtype {dtype!r}; expected one of {list(STORAGE_DTYPES)}")
+        os.makedirs(path, exist_ok=True)
+        # Quantize into a raw file first, since the total row count is not known up front
+        raw_path = os.path.join(path, "vectors.tmp")
+        scale_parts, id_parts, dim = [], [], None
+        with open(raw_path, "wb") as raw:
+            for ids, vectors in batches:
+                codes, scales = quantize(vectors, dtype)
+                raw.write(codes.tobytes())
+                scale_parts.append(scales)
+                id_parts.append(np.asarray(ids, dtype=np.int64))
+                dim = codes.shape[1]
+        if dim is None:
+            raise ValueError("Index needs at least one batch of embeddings")
+        scales, chunk_ids = np.concatenate(scale_parts), np.concatenate(id_parts)
+        flat = np.memmap(raw_path, dtype=STORAGE_DTYPES[dtype], mode="r", shape=(len(chunk_ids), dim))
+
+        order = np.arange(len(chunk_ids))
+        meta = {"dim": dim, "dtype": dtype, "count": len(chunk_ids), "n_lists": 0, "n_probe": N_PROBE}
+        if n_lists:
+            rng = np.random.default_rng(seed)
+            sample = np.sort(rng.choice(len(flat), min(KMEANS_SAMPLE, len(flat)), replace=False))
+            kmeans = MiniBatchKMeans(n_clusters=min(n_lists, len(sample)), random_state=seed, n_init=1,
+                                     batch_size=4096)
+            kmeans.fit(flat[sample].astype(np.float32) * scales[sample, None])
+            centroids = normalize(kmeans.cluster_centers_).astype(np.float32)
+            assignment = np.empty(len(flat), dtype=np.int32)
+            for start in range(0, len(flat), BLOCK_ROWS):
+                block = flat[start:start + BLOCK_ROWS].astype(np.float32)
+                assignment[start:start + len(block)] = (block @ centroids.T).argmax(axis=1)
+            order = np.argsort(assignment, kind="stable")
+            counts = np.bincount(assignment, minlength=len(centroids))
+            np.save(os.path.join(path, "centroids.npy"), centroids)
+            np.save(os.path.join(path, "list_offsets.npy"), np.concatenate([[0], np.cumsum(counts)]))
+            meta["n_lists"] = len(centroids)
+
+        vectors_out = np.lib.format.open_memmap(os.path.join(path, "vectors.npy"), mode="w+",
+                                                dtype=STORAGE_DTYPES[dtype], shape=(len(flat), dim))
+        for start in range(0, len(flat), BLOCK_ROWS):
+            vectors_out[start:start + BLOCK_ROWS] = flat[order[start:start + BLOCK_ROWS]]
+        vectors_out.flush()
+        del vectors_out, flat
+        os.remove(raw_path)
+        np.save(os.path.join(path, "scales.npy"), scales[order])
+        np.save(os.path.join(path, "chunk_ids.npy"), chunk_ids[order])
+        with open(os.path.join(path, "index.json"), "w") as f:
+            json.dump(meta, f)
+        return cls(path)
+
+    # ================= SEARCH =================
+    def _scan(self, queries, start, stop, k):
+        # Top-k over rows [start, stop) for every query: (k, q) ids and scores
+        found_ids, found_scores = [], []
+        for first in range(start, stop, BLOCK_ROWS):
+            last = min(first + BLOCK_ROWS, stop)
+            scores = self.vectors[first:last].astype(np.float32) @ queries.T
+            scores *= self.scales[first:last, None]
+            ids, best = _top_k(scores, self.chunk_ids[first:last], k)
+            found_ids.append(ids)
+            found_scores.append(best)
+        if not found_ids:
+            return np.empty((0, len(queries)), dtype=np.int64), np.empty((0, len(queries)), dtype=np.float32)
+        return _top_k(np.concatenate(found_scores), np.concatenate(found_ids), k)
+
+    def search(self, queries, k=10, exact=False, n_probe=None):
+        """Top-k chunks per query by cosine similarity: (chunk_ids, scores), each (queries, k).
+
+        `queries` are embeddings, one row per query. Exact search scans the
+        whole file once for the batch; otherwise an IVF index scans only
+        each query's closest lists.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if exact or self.centroids is None:
+            ids, scores = self._scan(queries, 0, len(self), k)
+            return ids.T, scores.T
+
+        n_probe = min(n_probe or self.meta["n_probe"], len(self.centroids))
+        probes = np.argpartition(-(queries @ self.centroids.T), n_probe - 1, axis=1)[:, :n_probe]
+        results_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        results_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for row, (query, lists) in enumerate(zip(queries, probes)):
+            rows = np.concatenate([np.arange(self.list_offsets[p], self.list_offsets[p + 1]) for p in lists])
+            if not len(rows):
+                continue
+            # One gather and one BLAS call per query over all of its probed lists
+            scores = (self.vectors[rows].astype(np.float32) @ query) * self.scales[rows]
+            ids, best = _top_k(scores[:, None], self.chunk_ids[rows], k)
+            results_ids[row, :len(ids)], results_scores[row, :len(ids)] = ids[:, 0], best[:, 0]
+        return results_ids, results_scores
+
+
+def recall_at_k(approximate_ids, exact_ids):
+    """Share of the exact top-k also returned by the approximate search, averaged over queries"""
+    return float(np.mean([len(np.intersect1d(a, e)) / len(e) for a, e in zip(approximate_ids, exact_ids)]))
+
+# ================= SIMULATED REPORTS =================
+FINDINGS = {
+    "Mining Stockpile": ["stockpile volume drift", "toe erosion on the north face", "material spillage near the conveyor",
+                         "slope instability at the crest", "haul road dust"],
+    "Solar Farm": ["thermal hotspot on a panel string", "cracked module glass", "soiling across row",
+                   "inverter fault", "vegetation shading the array"],
+    "Road Infrastructure": ["longitudinal crack", "pothole cluster", "rutting in the wheel path",
+                            "worn lane markings", "drainage blockage"],
+    "Building Inspection": ["roof membrane leak", "facade crack", "missing roof tiles", "blocked gutter",
+                            "corroded balcony rail"],
+    "Agricultural Field": ["crop stress in the NDVI map", "irrigation gap", "waterlogging", "weed patch",
+                           "pest damage along the edge"],
+}
+SEVERITIES = ["minor", "moderate", "severe", "critical"]
+CONDITIONS = ["calm clear conditions", "gusty wind and image blur", "low sun and long shadows",
+              "overcast diffuse light", "haze reducing contrast", "light rain during the second pass"]
+ACTIONS = ["monitor at the next routine flight", "schedule a ground inspection", "repair within 30 days",
+           "escalate to the client immediately", "re-fly with higher overlap"]
+
+
+def simulate_report_chunks(n=5_000_000, batch_size=100_000, seed=42):
+    """Mission report chunks in batches of (chunk_ids, texts); a chunk covers one finding"""
+    rng = np.random.default_rng(seed)
+    findings = [(asset, finding) for asset in ASSET_TYPES for finding in FINDINGS[asset]]
+    for first in range(0, n, batch_size):
+        size = min(batch_size, n - first)
+        finding = rng.integers(0, len(findings), size)
+        severity = rng.integers(0, len(SEVERITIES), size)
+        condition = rng.integers(0, len(CONDITIONS), size)
+        action = rng.integers(0, len(ACTIONS), size)
+        site = rng.integers(0, 1_000, size)
+        texts = [
+            f"{findings[f][0]} site {s}: {SEVERITIES[v]} {findings[f][1]} found during {CONDITIONS[c]}; "
+            f"recommend to {ACTIONS[a]}."
+            for f, v, c, a, s in zip(finding, severity, condition, action, site)
+        ]
+        yield np.arange(first, first + size, dtype=np.int64), texts
@@ -0,0 +1,228 @@
+# modules/rules.py - DECLARATIVE INSIGHT RULES COMPILED TO VECTORIZED MASKS
+import os
+import json
+import numpy as np
+import pandas as pd
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "insight_rules.json")
+
+LEVELS = ["green", "yellow", "red"]
+COMPARISONS = {
+    "<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal,
+    "==": np.equal, "!=": np.not_equal,
+}
+MEMBERSHIP = ["in", "not_in"]
+
+# ================= RULE FILES =================
+def load_rules(path=RULES_PATH):
+    """Read a rule file: {"thresholds": {...}, "rules": [...]}"""
+    with open(path) as f:
+        spec = json.load(f)
+    return RuleSet(spec)
+
+
+class RuleSet:
+    """Parsed rule file; `compile` resolves thresholds and builds the evaluator.
+
+    Conditions are leaves {"field", "op", "value"} combined with
+    {"all": [...]}, {"any": [...]} and {"not": ...}. A leaf value may be
+    {"threshold": name}, resolved from the file's defaults unless
+    overridden at compile time (client profiles do this). Rules sharing
+    an "exclusive" group behave like if/elif: only the first match in
+    file order fires.
+    """
+
+    def __init__(self, spec):
+        self.thresholds = dict(spec.get("thresholds", {}))
+        self.rules = list(spec["rules"])
+        ids = [rule["id"] for rule in self.rules]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Rule ids must be unique")
+        for rule in self.rules:
+            if rule.get("level") not in LEVELS:
+                raise ValueError(f"Rule {rule['id']}: level must be one of {LEVELS}")
+
+    def compile(self, thresholds=None):
+        return CompiledRules(self.rules, {**self.thresholds, **(thresholds or {})})
+
+# ================= COMPILER =================
+class _FieldCells:
+    """Discretises one field so every leaf on it becomes a truth table over cells.
+
+    Numeric fields: cells are (< t1), (== t1), (t1, t2), (== t2), ...,
+    (> tm), NaN, found with two searchsorted calls per row. Categorical
+    fields: one cell per referenced value, "other" (any value no rule
+    mentions) and missing.
+    """
+
+    def __init__(self):
+        self.numeric, self.categories = set(), set()
+
+    def add(self, op, value):
+        values = value if op in MEMBERSHIP else [value]
+        for v in values:
+            if isinstance(v, str):
+                self.categories.add(v)
+            else:
+                self.numeric.add(float(v))
+
+    def freeze(self):
+        if self.numeric and self.categories:
+            raise ValueError("A field cannot mix numeric and categorical comparisons")
+        self.is_numeric = not self.categories
+        if self.is_numeric:
+            self.cuts = np.array(sorted(self.numeric))
+            # Representative value of each cell: midpoints between cuts, and the cuts themselves
+            edges = np.concatenate([[self.cuts[0] - 1], self.cuts, [self.cuts[-1] + 1]])
+            between = (edges[:-1] + edges[1:]) / 2
+            reps = np.empty(2 * len(self.cuts) + 1)
+            reps[0::2], reps[1::2] = between, self.cuts
+            self.representatives = np.concatenate([reps, [np.nan]])
+        else:
+            self.values = sorted(self.categories)
+            self.representatives = np.array(self.values, dtype=object)  # "other" and missing follow
+
+    def cells(self, column):
+        if self.is_numeric:
+            x = np.asarray(column, dtype=np.float64)
+            left = np.searchsorted(self.cuts, x, side="left")
+            cells = left + np.searchsorted(self.cuts, x, side="right")
+            return np.where(np.isnan(x), len(self.representatives) - 1, cells)
+        column = np.asarray(column, dtype=object)
+        codes = pd.Categorical(column, categories=self.values).codes
+        return np.where(codes >= 0, codes, np.where(pd.isna(column), len(self.values) + 1, len(self.values)))
+
+    def truth_table(self, op, value):
+        reps = self.representatives
+        if op in MEMBERSHIP:
+            table = np.isin(reps, np.array(list(value), dtype=reps.dtype))
+            if op == "not_in":
+                table = ~table
+        else:
+            with np.errstate(invalid="ignore"):
+                table = COMPARISONS[op](reps, value)
+            table = np.asarray(table, dtype=bool)
+        if self.is_numeric:
+            # Missing values never satisfy a leaf (a "not" around it can still fire)
+            table[-1] = False
+            return table
+        # An unmentioned value equals none of the referenced ones; missing satisfies nothing
+        return np.concatenate([table, [op in ("!=", "not_in"), False]])
+
+
+class CompiledRules:
+    """Rules compiled for one threshold set.
+
+    Evaluation discretises each referenced field once, reads every
+    distinct leaf from a (cells x leaves) truth table with one gather
+    per field, then combines leaves with numpy boolean ops. Cost grows
+    with rows x distinct leaves, not with the Python-level rule count.
+    """
+
+    def __init__(self, rules, thresholds):
+        self.rules = rules
+        self.thresholds = thresholds
+        self.ids = [rule["id"] for rule in rules]
+        self.levels = np.array([rule["level"] for rule in rules], dtype=object)
+
+        self.fields = {}
+        self._leaf_index = {}  # (field, op, value key) -> column in the leaf matrix
+        self._programs = [self._compile_condition(rule["when"]) for rule in rules]
+        for cells in self.fields.values():
+            cells.freeze()
+
+        # Per-field truth tables, columns in leaf order
+        self._field_leaves = {}
+        for (field, op, key), column in self._leaf_index.items():
+            self._field_leaves.setdefault(field, []).append((column, op, json.loads(key)))
+        self._tables = {
+            field: (np.array([c for c, _, _ in leaves]),
+                    np.column_stack([self.fields[field].truth_table(op, value) for _, op, value in leaves]))
+            for field, leaves in self._field_leaves.items()
+        }
+
+        groups = {}
+        for i, rule in enumerate(rules):
+            if rule.get("exclusive"):
+                groups.setdefault(rule["exclusive"], []).append(i)
+        self._exclusive = [np.array(members) for members in groups.values() if len(members) > 1]
+
+    def _resolve(self, value):
+        if isinstance(value, dict) and "threshold" in value:
+            if value["threshold"] not in self.thresholds:
+                raise ValueError(f"Unknown threshold {value['threshold']!r}")
+            return self.thresholds[value["threshold"]]
+        return value
+
+    def _compile_condition(self, condition):
+        if "all" in condition:
+            return ("all", [self._compile_condition(c) for c in condition["all"]])
+        if "any" in condition:
+            return ("any", [self._compile_condition(c) for c in condition["any"]])
+        if "not" in condition:
+            return ("not", self._compile_condition(condition["not"]))
+        field, op, value = condition["field"], condition["op"], self._resolve(condition["value"])
+        if op not in COMPARISONS and op not in MEMBERSHIP:
+            raise ValueError(f"Unknown operator {op!r}")
+        if op in MEMBERSHIP:
+            value = sorted(value)
+        self.fields.setdefault(field, _FieldCells()).add(op, value)
+        key = (field, op, json.dumps(value))
+        return ("leaf", self._leaf_index.setdefault(key, len(self._leaf_index)))
+
+    def _run(self, program, leaves):
+        kind, arg = program
+        if kind == "leaf":
+            return leaves[arg]
+        if kind == "not":
+            return ~self._run(arg, leaves)
+        masks = [self._run(p, leaves) for p in arg]
+        return np.logical_and.reduce(masks) if kind == "all" else np.logical_or.reduce(masks)
+
+    def _fired_by_rule(self, frame):
+        # Rule-major (rules x missions) so every per-rule write and read is contiguous
+        n = len(frame)
+        leaves = np.empty((len(self._leaf_index), n), dtype=bool)
+        for field, (rows, table) in self._tables.items():
+            if field not in frame:
+                raise KeyError(f"Rules reference missing field {field!r}")
+            leaves[rows] = table.T[:, self.fields[field].cells(frame[field])]
+
+        fired = np.empty((len(self.rules), n), dtype=bool)
+        for i, program in enumerate(self._programs):
+            fired[i] = self._run(program, leaves)
+        for members in self._exclusive:
+            block = fired[members]
+            first = block.argmax(axis=0)
+            hit = block.any(axis=0)
+            fired[members] = False
+            fired[members[first[hit]], np.flatnonzero(hit)] = True
+        return fired
+
+    def evaluate(self, frame):
+        """Boolean (missions x rules) matrix of fired rules"""
+        return self._fired_by_rule(frame).T
+
+    def summarise(self, frame, chunk_size=100_000):
+        """Per-rule hit counts and per-mission insight counts by level, chunk by chunk"""
+        hits = np.zeros(len(self.rules), dtype=np.int64)
+        per_level = np.zeros((len(frame), len(LEVELS)), dtype=np.int32)
+        level_rows = [np.flatnonzero(self.levels == level) for level in LEVELS]
+        for start in range(0, len(frame), chunk_size):
+            fired = self._fired_by_rule(frame.iloc[start:start + chunk_size])
+            hits += fired.sum(axis=1)
+            for j, rows in enumerate(level_rows):
+                per_level[start:start + fired.shape[1], j] = fired[rows].sum(axis=0)
+        return (pd.Series(hits, index=self.ids, name="missions"),
+                pd.DataFrame(per_level, columns=LEVELS, index=frame.index))
+
+    def insights(self, mission):
+        """Fired insights for one mission (dict), messages filled from its values"""
+        fired = self.evaluate(pd.DataFrame([mission]))[0]
+        values = {**self.thresholds, **mission}
+        return [{
+            "id": rule["id"],
+            "level": rule["level"],
+            "message": rule["message"].format(**values),
+            "details": rule.get("details", "").format(**values),
+        } for rule, hit in zip(self.rules, fired) if hit]
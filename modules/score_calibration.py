@@ -0,0 +1,202 @@
+# modules/score_calibration.py - CALIBRATED CONFIDENCE (ISOTONIC / PLATT) AND RELIABILITY REPORTS
+import threading
+import numpy as np
+import pandas as pd
+from sklearn.isotonic import IsotonicRegression
+from sklearn.linear_model import LogisticRegression
+
+from modules.scoring import ASSET_TYPES, score_missions
+
+GRID_STEP = 0.1      # lookup resolution in score points
+MIN_OUTCOMES = 200   # below this an asset type falls back to the pooled mapping
+CALIBRATION_METHODS = ["isotonic", "platt"]
+
+
+def _fit_curve(scores, labels, method, grid):
+    if method == "isotonic":
+        model = IsotonicRegression(y_min=0, y_max=1, out_of_bounds="clip").fit(scores, labels)
+        return model.predict(grid)
+    if method == "platt":
+        model = LogisticRegression().fit(scores.reshape(-1, 1) / 100, labels)
+        return model.predict_proba(grid.reshape(-1, 1) / 100)[:, 1]
+    raise ValueError(f"Unknown calibration method {method!r}; expected one of {CALIBRATION_METHODS}")
+
+
+class ScoreCalibrator:
+    """Per-asset-type mapping from the 0-100 confidence score to P(finding confirmed).
+
+    Mappings are fitted offline (isotonic or Platt) and stored as lookup
+    tables on a fixed score grid, one row per asset type plus a pooled
+    row, so calibrating any batch is one gather-and-interpolate.
+    """
+
+    def __init__(self, method="isotonic", grid_step=GRID_STEP):
+        self.method = method
+        self.grid = np.arange(0, 100 + grid_step / 2, grid_step)
+        self.asset_types = list(ASSET_TYPES)
+        self.tables = None
+        self.outcomes = pd.Series(0, index=self.asset_types + ["pooled"])
+
+    def fit(self, scores, labels, asset_types):
+        scores = np.asarray(scores, dtype=np.float64)
+        labels = np.asarray(labels, dtype=np.float64)
+        asset_types = np.asarray(asset_types, dtype=object)
+
+        pooled = _fit_curve(scores, labels, self.method, self.grid)
+        self.tables = np.tile(pooled, (len(self.asset_types) + 1, 1))
+        self.outcomes["pooled"] = len(scores)
+        for row, asset_type in enumerate(self.asset_types):
+            mask = asset_types == asset_type
+            self.outcomes[asset_type] = int(mask.sum())
+            if mask.sum() >= MIN_OUTCOMES and 0 < labels[mask].mean() < 1:
+                self.tables[row] = _fit_curve(scores[mask], labels[mask], self.method, self.grid)
+        return self
+
+    def transform(self, scores, asset_types=None):
+        """Calibrated probabilities (0-1); unknown or missing asset types use the pooled table,
+        missing (NaN) scores give NaN"""
+        if self.tables is None:
+            raise RuntimeError("ScoreCalibrator is not fitted")
+        scores = np.asarray(scores, dtype=np.float64)
+        finite = np.isfinite(scores)
+        scores = np.clip(np.where(finite, scores, 0), 0, 100)
+        rows = np.full(len(scores), len(self.asset_types))
+        if asset_types is not None:
+            codes = pd.Categorical(np.asarray(asset_types, dtype=object), categories=self.asset_types).codes
+            rows = np.where(codes >= 0, codes, rows)
+
+        # Linear interpolation on the fixed grid
+        position = scores / (self.grid[1] - self.grid[0])
+        left = np.minimum(position.astype(np.int64), len(self.grid) - 2)
+        frac = position - left
+        calibrated = self.tables[rows, left] * (1 - frac) + self.tables[rows, left + 1] * frac
+        return np.where(finite, calibrated, np.nan)
+
+    def save(self, path):
+        np.savez(path, method=self.method, grid=self.grid, tables=self.tables,
+                 asset_types=np.array(self.asset_types), outcomes=self.outcomes.to_numpy())
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path, allow_pickle=False)
+        calibrator = cls(str(data["method"]), float(data["grid"][1] - data["grid"][0]))
+        calibrator.asset_types = data["asset_types"].tolist()
+        calibrator.tables = data["tables"]
+        calibrator.outcomes = pd.Series(data["outcomes"], index=calibrator.asset_types + ["pooled"])
+        return calibrator
+
+
+class CalibrationCache:
+    """Latest fitted calibrator per method, refitted as the feedback weights version moves.
+
+    `fit_fn(method)` returns (calibrator, held_out outcomes). A request
+    for a newer weights version (new reviewer verdicts) starts one
+    background refit per method and keeps getting the previous fit until
+    the new one is ready, so scoring never waits on a fit; only the very
+    first fit of a method runs in the caller. Safe to share between the
+    page and the scoring service's worker threads.
+    """
+
+    def __init__(self, fit_fn):
+        self.fit_fn = fit_fn
+        self._fits = {}  # method -> (weights version, (calibrator, held_out))
+        self._refitting = set()
+        self._lock = threading.Lock()  # guards the two maps; never held during a fit
+
+    def get(self, method, version):
+        if method not in CALIBRATION_METHODS:
+            raise ValueError(f"Unknown calibration method {method!r}; expected one of {CALIBRATION_METHODS}")
+        with self._lock:
+            current = self._fits.get(method)
+            if current is not None and current[0] < version and method not in self._refitting:
+                self._refitting.add(method)
+                threading.Thread(target=self._refit, args=(method, version), daemon=True).start()
+        if current is None:
+            fit = self.fit_fn(method)
+            with self._lock:
+                current = self._fits.setdefault(method, (version, fit))
+        return current[1]
+
+    def _refit(self, method, version):
+        try:
+            fit = self.fit_fn(method)
+            with self._lock:
+                if self._fits[method][0] < version:
+                    self._fits[method] = (version, fit)
+        finally:
+            with self._lock:
+                self._refitting.discard(method)
+
+    def transform(self, scores, asset_types, methods, version):
+        """Calibrated probabilities for a batch; `methods` is one method or one per row"""
+        scores = np.asarray(scores, dtype=np.float64)
+        asset_types = np.asarray(asset_types, dtype=object)
+        methods = np.broadcast_to(np.asarray(methods, dtype=object), scores.shape)
+        probabilities = np.empty(len(scores))
+        for method in pd.unique(methods):
+            mask = methods == method
+            probabilities[mask] = self.get(method, version)[0].transform(scores[mask], asset_types[mask])
+        return probabilities
+
+# ================= RELIABILITY REPORTS =================
+def brier_score(probabilities, labels):
+    """Mean squared error of probabilities against 0/1 outcomes (lower is better)"""
+    return float(np.mean((np.asarray(probabilities, dtype=np.float64) - np.asarray(labels, dtype=np.float64)) ** 2))
+
+
+def reliability_table(probabilities, labels, bins=10):
+    """Mean predicted vs observed rate per probability bin (the reliability diagram data)"""
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    labels = np.asarray(labels, dtype=np.float64)
+    which = np.minimum((probabilities * bins).astype(np.int64), bins - 1)
+    count = np.bincount(which, minlength=bins)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        table = pd.DataFrame({
+            "bin_low": np.arange(bins) / bins,
+            "mean_predicted": np.bincount(which, weights=probabilities, minlength=bins) / count,
+            "observed_rate": np.bincount(which, weights=labels, minlength=bins) / count,
+            "count": count,
+        })
+    return table[table["count"] > 0].reset_index(drop=True)
+
+
+def calibration_report(scores, labels, asset_types, calibrator):
+    """Brier score of the raw score (read as a probability) vs the calibrated one, per asset type"""
+    scores = np.asarray(scores, dtype=np.float64)
+    labels = np.asarray(labels, dtype=np.float64)
+    asset_types = np.asarray(asset_types, dtype=object)
+    calibrated = calibrator.transform(scores, asset_types)
+    rows = []
+    for asset_type in list(ASSET_TYPES) + ["All"]:
+        mask = np.ones(len(scores), dtype=bool) if asset_type == "All" else asset_types == asset_type
+        if mask.any():
+            rows.append({
+                "asset_type": asset_type,
+                "outcomes": int(mask.sum()),
+                "confirmed_rate": labels[mask].mean(),
+                "brier_raw": brier_score(scores[mask] / 100, labels[mask]),
+                "brier_calibrated": brier_score(calibrated[mask], labels[mask]),
+            })
+    return pd.DataFrame(rows)
+
+# ================= SIMULATED OUTCOMES =================
+def simulate_labeled_outcomes(n=200_000, seed=42):
+    """Scored missions with confirmed / false-positive outcomes; the score overstates reliability,
+    more so for some asset types"""
+    rng = np.random.default_rng(seed)
+    missions = pd.DataFrame({
+        "image_quality": np.clip(rng.normal(80, 10, n), 0, 100),
+        "lighting_score": np.clip(rng.normal(75, 15, n), 0, 100),
+        "overlap_consistency": np.clip(rng.normal(80, 12, n), 0, 100),
+        "wind_speed": np.clip(rng.gamma(2.5, 5, n), 0, 50),
+        "historical_match": np.clip(rng.normal(75, 12, n), 0, 100),
+        "sensor_score": rng.choice([30, 60, 85, 95], n, p=[0.1, 0.2, 0.4, 0.3]),
+        "asset_type": rng.choice(ASSET_TYPES, n),
+    })
+    scores = score_missions(missions)
+    center = missions["asset_type"].map({
+        "Mining Stockpile": 72, "Solar Farm": 80, "Road Infrastructure": 70,
+        "Building Inspection": 76, "Agricultural Field": 66,
+    }).to_numpy()
+    confirmed = rng.random(n) < 1 / (1 + np.exp(-(scores - center) / 6))
+    return pd.DataFrame({"asset_type": missions["asset_type"], "score": scores, "confirmed": confirmed})
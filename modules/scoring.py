@@ -0,0 +1,131 @@
+# modules/scoring.py - CONFIDENCE ENGINE SCORING
+import numpy as np
+import pandas as pd
+
+# Base weights
+WEIGHTS = {
+    "image_quality": 0.25,
+    "lighting": 0.20,
+    "overlap": 0.20,
+    "wind": 0.15,
+    "historical": 0.10,
+    "sensor": 0.10
+}
+
+# Categorical values to numeric
+LIGHTING_LEVELS = ["Poor", "Fair", "Good", "Excellent"]
+LIGHTING_SCORES = {
+    "Poor": 40, "Fair": 65, "Good": 85, "Excellent": 95
+}
+
+SENSOR_LEVELS = ["Expired", "Marginal", "Good", "Excellent"]
+SENSOR_SCORES = {
+    "Expired": 30, "Marginal": 60, "Good": 85, "Excellent": 95
+}
+
+ASSET_TYPES = ["Mining Stockpile", "Solar Farm", "Road Infrastructure", "Building Inspection", "Agricultural Field"]
+
+MISSION_CRITICALITIES = ["Routine Inspection", "Progress Monitoring", "Compliance Check", "Emergency Assessment"]
+
+# Asset type adjustment
+ASSET_ADJUSTMENTS = {
+    "Mining Stockpile": 0,  # No adjustment
+    "Solar Farm": 5,        # Slightly more critical
+    "Road Infrastructure": -2,
+    "Building Inspection": 0,
+    "Agricultural Field": -3
+}
+
+# ================= BATCH SCORING =================
+def _level_scores(values, scores):
+    # Vectorized category -> score lookup (pandas categoricals keep this O(n) in C)
+    codes = pd.Categorical(values, categories=list(scores)).codes
+    if (codes < 0).any():
+        raise ValueError(f"Unknown category; expected one of {list(scores)}")
+    return np.asarray(list(scores.values()), dtype=np.float64)[codes]
+
+
+def wind_factor(wind_speed):
+    """Wind factor score: 100 in calm air, 2 points off per km/h (higher wind = lower score)"""
+    return np.maximum(0, 100 - np.asarray(wind_speed, dtype=np.float64) * 2)
+
+
+def factor_scores(missions, factors=None):
+    """Per-factor 0-100 scores for a frame of missions, columns in `factors` order
+    (default: every factor, in WEIGHTS order).
+
+    Numeric inputs: image_quality, overlap_consistency, wind_speed,
+    historical_match. Lighting and sensor may be given as categories
+    (lighting_conditions, sensor_calibration) or as numeric
+    lighting_score / sensor_score columns. Only the requested factors'
+    inputs are read; a missing one raises KeyError.
+    """
+    def lighting():
+        if "lighting_score" in missions:
+            return np.asarray(missions["lighting_score"], dtype=np.float64)
+        return _level_scores(missions["lighting_conditions"], LIGHTING_SCORES)
+
+    def sensor():
+        if "sensor_score" in missions:
+            return np.asarray(missions["sensor_score"], dtype=np.float64)
+        return _level_scores(missions["sensor_calibration"], SENSOR_SCORES)
+
+    inputs = {
+        "image_quality": lambda: np.asarray(missions["image_quality"], dtype=np.float64),
+        "lighting": lighting,
+        "overlap": lambda: np.asarray(missions["overlap_consistency"], dtype=np.float64),
+        "wind": lambda: wind_factor(missions["wind_speed"]),
+        "historical": lambda: np.asarray(missions["historical_match"], dtype=np.float64),
+        "sensor": sensor,
+    }
+    return np.column_stack([inputs[name]() for name in (WEIGHTS if factors is None else factors)])
+
+
+def _weighted_factors(missions, weights, asset_adjustments):
+    weights = WEIGHTS if weights is None else weights
+    asset_adjustments = ASSET_ADJUSTMENTS if asset_adjustments is None else asset_adjustments
+    w = np.array([weights[name] for name in WEIGHTS])
+    return factor_scores(missions) * w, w, _level_scores(missions["asset_type"], asset_adjustments)
+
+
+def score_missions(missions, weights=None, asset_adjustments=None, offsets=None):
+    """Vectorized confidence score (0-100) for a frame of missions (inputs as in `factor_scores`).
+
+    `weights` / `asset_adjustments` default to the base tables; pass a
+    learned version to reproduce scores made with it. `offsets` are
+    per-mission points added before clipping (e.g. client profile offsets).
+    """
+    weighted, _, asset_adjustment = _weighted_factors(missions, weights, asset_adjustments)
+    if offsets is not None:
+        asset_adjustment = asset_adjustment + np.asarray(offsets, dtype=np.float64)
+    return np.clip(weighted.sum(axis=1) + asset_adjustment, 0, 100)
+
+
+# Reference mission for explanations: every factor exactly at the green threshold
+BASELINE_FACTOR_SCORE = 75.0
+
+
+def explain_missions(missions, weights=None, asset_adjustments=None, baseline=BASELINE_FACTOR_SCORE):
+    """Scores plus per-factor contributions, from the same weighted matrix as `score_missions`.
+
+    contribution = weight x (factor score - baseline); the asset
+    adjustment is its own column, so baseline score + contributions
+    equals the score (before clipping to 0-100).
+    """
+    weighted, w, asset_adjustment = _weighted_factors(missions, weights, asset_adjustments)
+    contributions = weighted - w * baseline
+    frame = pd.DataFrame(contributions, columns=[f"contrib_{name}" for name in WEIGHTS], index=missions.index)
+    frame["contrib_asset"] = asset_adjustment
+    frame.insert(0, "baseline", w.sum() * baseline)
+    frame.insert(0, "confidence_score", np.clip(weighted.sum(axis=1) + asset_adjustment, 0, 100))
+    return frame
+
+# ================= TRAFFIC LIGHT =================
+# Score interpretation bands used by the gauge: >= 75 green, >= 50 yellow, else red
+SCORE_BANDS = (75, 50)
+
+
+def traffic_light(scores, bands=SCORE_BANDS):
+    """Vectorized green/yellow/red level for 0-100 confidence scores"""
+    scores = np.asarray(scores, dtype=np.float64)
+    return np.select([scores >= bands[0], scores >= bands[1]], ["green", "yellow"], default="red")
@@ -0,0 +1,130 @@
+# modules/scoring_service.py - CRITICALITY-ROUTED SCORING SERVICE (FAST LANE + SLO METRICS)
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future
+import numpy as np
+import pandas as pd
+
+from modules.scoring import MISSION_CRITICALITIES, score_missions
+
+# Lanes and the mission criticalities routed to them. Emergencies get their own
+# queue and worker, score as soon as they arrive and never wait behind a batch.
+LANES = {
+    "fast": {"criticalities": ["Emergency Assessment"], "slo_ms": 50, "max_batch": 32, "batch_wait_ms": 0},
+    "standard": {"criticalities": [c for c in MISSION_CRITICALITIES if c != "Emergency Assessment"],
+                 "slo_ms": 1000, "max_batch": 512, "batch_wait_ms": 5},
+}
+LATENCY_WINDOW = 10_000  # recent requests per lane kept for the latency percentiles
+_STOP = object()
+
+
+class ScoringService:
+    """Scores single missions on per-criticality lanes, micro-batching within a lane.
+
+    `submit` routes a mission to its lane's queue and returns a Future.
+    Each lane has one worker thread that drains up to `max_batch`
+    requests (waiting at most `batch_wait_ms` for more) and scores them
+    in one vectorized `score_fn` call. With a `calibrate_fn(batch,
+    scores)` the same batch is calibrated in one more call and each
+    Future resolves to a dict with `confidence_score` and
+    `confirmed_probability` instead of the bare score. `metrics` reports
+    queue depth, latency percentiles and SLO breaches per lane.
+    """
+
+    def __init__(self, score_fn=score_missions, lanes=LANES, calibrate_fn=None):
+        self.score_fn = score_fn
+        self.calibrate_fn = calibrate_fn
+        self.lanes = {name: dict(spec) for name, spec in lanes.items()}
+        self._route = {c: name for name, spec in self.lanes.items() for c in spec["criticalities"]}
+        self._queues = {name: queue.Queue() for name in self.lanes}
+        self._latency_ms = {name: deque(maxlen=LATENCY_WINDOW) for name in self.lanes}
+        self._completed = dict.fromkeys(self.lanes, 0)
+        self._breaches = dict.fromkeys(self.lanes, 0)
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._serve, args=(name,), daemon=True) for name in self.lanes]
+        for thread in self._threads:
+            thread.start()
+
+    def lane_for(self, mission_criticality):
+        if mission_criticality not in self._route:
+            raise ValueError(f"Unknown mission criticality {mission_criticality!r}; expected one of {list(self._route)}")
+        return self._route[mission_criticality]
+
+    def submit(self, mission, mission_criticality="Routine Inspection"):
+        """Queue one mission (dict of scoring inputs); the Future resolves to its score
+        (or score and calibrated probability, see the class docstring)"""
+        future = Future()
+        self._queues[self.lane_for(mission_criticality)].put((time.perf_counter(), mission, future))
+        return future
+
+    def score(self, mission, mission_criticality="Routine Inspection", timeout=None):
+        return self.submit(mission, mission_criticality).result(timeout)
+
+    def _serve(self, lane):
+        spec, requests = self.lanes[lane], self._queues[lane]
+        stopping = False
+        while not stopping:
+            item = requests.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = time.perf_counter() + spec["batch_wait_ms"] / 1000
+            while len(batch) < spec["max_batch"]:
+                try:
+                    item = requests.get(timeout=max(deadline - time.perf_counter(), 0)) \
+                        if spec["batch_wait_ms"] else requests.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._run(lane, batch)
+
+    def _run(self, lane, batch):
+        try:
+            missions = pd.DataFrame([mission for _, mission, _ in batch])
+            scores = np.asarray(self.score_fn(missions), dtype=np.float64)
+            if self.calibrate_fn is not None:
+                probabilities = np.asarray(self.calibrate_fn(missions, scores), dtype=np.float64)
+        except Exception as exc:
+            for _, _, future in batch:
+                future.set_exception(exc)
+            return
+        done = time.perf_counter()
+        for i, (_, _, future) in enumerate(batch):
+            if self.calibrate_fn is None:
+                future.set_result(float(scores[i]))
+            else:
+                future.set_result({"confidence_score": float(scores[i]), "confirmed_probability": float(probabilities[i])})
+        latencies = [(done - submitted) * 1000 for submitted, _, _ in batch]
+        with self._lock:
+            self._latency_ms[lane].extend(latencies)
+            self._completed[lane] += len(batch)
+            self._breaches[lane] += sum(latency > self.lanes[lane]["slo_ms"] for latency in latencies)
+
+    # ================= METRICS =================
+    def metrics(self):
+        """One row per lane: queue depth, completed requests, latency percentiles and SLO breaches"""
+        rows = []
+        with self._lock:
+            for lane, spec in self.lanes.items():
+                latencies = np.array(self._latency_ms[lane]) if self._latency_ms[lane] else np.array([np.nan])
+                p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+                rows.append({
+                    "lane": lane,
+                    "queue_depth": self._queues[lane].qsize(),
+                    "completed": self._completed[lane],
+                    "p50_ms": p50, "p95_ms": p95, "p99_ms": p99,
+                    "slo_ms": spec["slo_ms"],
+                    "slo_breaches": self._breaches[lane],
+                })
+        return pd.DataFrame(rows).set_index("lane")
+
+    def close(self):
+        for requests in self._queues.values():
+            requests.put(_STOP)
+        for thread in self._threads:
+            thread.join()
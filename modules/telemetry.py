@@ -0,0 +1,196 @@
+# modules/telemetry.py - STREAMING TELEMETRY INGESTION FOR FLIGHT LOGS
+import os
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+# Columns kept from every flight log and their compact storage types
+TELEMETRY_COLUMNS = {
+    "time": np.float64,        # seconds since flight start
+    "lat": np.float64,
+    "lon": np.float64,
+    "altitude": np.float32,    # metres AGL
+    "voltage": np.float32,     # pack voltage (V)
+    "current": np.float32,     # discharge current (A)
+    "battery_temp": np.float32,  # °C
+    "battery_pct": np.float32,   # state of charge (%)
+}
+
+# Fixed-width record layout for binary logs
+BINARY_RECORD = np.dtype([(name, dtype) for name, dtype in TELEMETRY_COLUMNS.items()])
+
+# Extra per-window aggregates written next to the window means
+EXTREMES = {"voltage_min": ("voltage", np.minimum), "current_max": ("current", np.maximum)}
+
+OUTPUT_SCHEMA = pa.schema(
+    [(name, pa.from_numpy_dtype(np.dtype(dtype))) for name, dtype in TELEMETRY_COLUMNS.items()]
+    + [("voltage_min", pa.float32()), ("current_max", pa.float32()), ("samples", pa.int32())]
+)
+
+# ================= LOG READERS =================
+def _iter_csv_chunks(path, block_size):
+    convert = pacsv.ConvertOptions(
+        include_columns=list(TELEMETRY_COLUMNS),
+        column_types={name: pa.from_numpy_dtype(np.dtype(dtype)) for name, dtype in TELEMETRY_COLUMNS.items()},
+    )
+    reader = pacsv.open_csv(path, read_options=pacsv.ReadOptions(block_size=block_size),
+                            convert_options=convert)
+    for batch in reader:
+        yield {name: batch.column(name).to_numpy(zero_copy_only=False) for name in TELEMETRY_COLUMNS}
+
+
+def _iter_binary_chunks(path, block_size):
+    rows = max(1, block_size // BINARY_RECORD.itemsize)
+    with open(path, "rb") as f:
+        while True:
+            records = np.fromfile(f, dtype=BINARY_RECORD, count=rows)
+            if len(records) == 0:
+                break
+            yield {name: records[name] for name in TELEMETRY_COLUMNS}
+
+# ================= DOWNSAMPLING =================
+class _WindowDownsampler:
+    """Averages samples into fixed time windows across chunk boundaries.
+
+    The last (possibly incomplete) window of each chunk is carried over, so
+    memory stays bounded by one chunk regardless of flight length.
+    """
+
+    def __init__(self, hz):
+        self.hz = hz
+        self.carry = None
+
+    def push(self, chunk):
+        if len(chunk["time"]) == 0:  # e.g. a header-only CSV block; keep the carry as is
+            return None
+        if self.carry is not None:
+            chunk = {k: np.concatenate([self.carry[k], chunk[k]]) for k in chunk}
+        window = np.floor(chunk["time"] * self.hz).astype(np.int64)
+        # Hold back the trailing window; it may continue in the next chunk
+        cut = np.searchsorted(window, window[-1], side="left")
+        self.carry = {k: v[cut:] for k, v in chunk.items()}
+        if cut == 0:
+            return None
+        return self._aggregate({k: v[:cut] for k, v in chunk.items()}, window[:cut])
+
+    def flush(self):
+        if self.carry is None or len(self.carry["time"]) == 0:
+            return None
+        window = np.floor(self.carry["time"] * self.hz).astype(np.int64)
+        out = self._aggregate(self.carry, window)
+        self.carry = None
+        return out
+
+    @staticmethod
+    def _aggregate(chunk, window):
+        starts = np.flatnonzero(np.r_[True, window[1:] != window[:-1]])
+        counts = np.diff(np.r_[starts, len(window)])
+        columns = {}
+        for name, dtype in TELEMETRY_COLUMNS.items():
+            sums = np.add.reduceat(chunk[name].astype(np.float64), starts)
+            columns[name] = (sums / counts).astype(dtype)
+        for name, (source, ufunc) in EXTREMES.items():
+            columns[name] = ufunc.reduceat(chunk[source], starts).astype(np.float32)
+        columns["samples"] = counts.astype(np.int32)
+        return pa.table(columns, schema=OUTPUT_SCHEMA)
+
+# ================= INGESTION =================
+def ingest_flight_log(path, out_dir, flight_id=None, battery_id=None, drone_id=None,
+                      start_time=None, downsample_hz=1.0, block_size=8 << 20):
+    """Stream a CSV or binary (.bin) flight log into a per-flight Parquet file.
+
+    Samples are parsed chunk by chunk into typed columns, averaged into
+    `downsample_hz` windows on the fly and appended to the output, so
+    memory is bounded by `block_size` rather than the log size. Returns
+    ingest stats including MB/sec.
+    """
+    flight_id = flight_id or os.path.splitext(os.path.basename(path))[0]
+    os.makedirs(out_dir, exist_ok=True)
+    out_path = os.path.join(out_dir, f"{flight_id}.parquet")
+
+    is_binary = path.endswith(".bin")
+    chunks = _iter_binary_chunks(path, block_size) if is_binary else _iter_csv_chunks(path, block_size)
+    metadata = {
+        "flight_id": flight_id,
+        "battery_id": battery_id or "",
+        "drone_id": drone_id or "",
+        "start_time": "" if start_time is None else pd.Timestamp(start_time).isoformat(),
+        "downsample_hz": str(downsample_hz),
+    }
+    schema = OUTPUT_SCHEMA.with_metadata({k: str(v) for k, v in metadata.items()})
+
+    started = time.perf_counter()
+    rows_in = rows_out = 0
+    downsampler = _WindowDownsampler(downsample_hz)
+    with pq.ParquetWriter(out_path, schema, compression="zstd") as writer:
+        for chunk in chunks:
+            rows_in += len(chunk["time"])
+            table = downsampler.push(chunk)
+            if table is not None:
+                writer.write_table(table.replace_schema_metadata(schema.metadata))
+                rows_out += table.num_rows
+        table = downsampler.flush()
+        if table is not None:
+            writer.write_table(table.replace_schema_metadata(schema.metadata))
+            rows_out += table.num_rows
+
+    elapsed = time.perf_counter() - started
+    size_mb = os.path.getsize(path) / 1e6
+    return {
+        "flight_id": flight_id,
+        "output": out_path,
+        "rows_in": rows_in,
+        "rows_out": rows_out,
+        "input_mb": size_mb,
+        "output_mb": os.path.getsize(out_path) / 1e6,
+        "seconds": elapsed,
+        "mb_per_sec": size_mb / elapsed if elapsed > 0 else float("inf"),
+    }
+
+
+def read_flight(path, columns=None):
+    """Load an ingested flight as a DataFrame with its metadata in `.attrs`"""
+    table = pq.read_table(path, columns=columns)
+    frame = table.to_pandas()
+    frame.attrs = {k.decode(): v.decode() for k, v in (table.schema.metadata or {}).items()
+                   if not k.startswith(b"pandas")}
+    return frame
+
+# ================= SIMULATED LOGS =================
+def write_simulated_flight_log(path, duration_s=1800, hz=50, capacity_fade=0.0, seed=42,
+                               chunk_s=600):
+    """High-rate synthetic flight log (CSV, or binary when `path` ends in .bin)"""
+    rng = np.random.default_rng(seed)
+    is_binary = path.endswith(".bin")
+    total = int(duration_s * hz)
+    rows_per_chunk = int(chunk_s * hz)
+    mode = "wb" if is_binary else "w"
+
+    with open(path, mode) as f:
+        if not is_binary:
+            f.write(",".join(TELEMETRY_COLUMNS) + "\n")
+        for start in range(0, total, rows_per_chunk):
+            n = min(rows_per_chunk, total - start)
+            t = (start + np.arange(n)) / hz
+            progress = t / duration_s
+            current = np.clip(rng.normal(18, 4, n) + 6 * np.sin(t / 40), 2, 45)
+            # Faded packs drain faster and sag more under load
+            soc = np.clip(100 - progress * 75 * (1 + capacity_fade), 0, 100)
+            voltage = 16.8 - 3.4 * (1 - soc / 100) - current * (0.012 + 0.03 * capacity_fade)
+            records = np.empty(n, dtype=BINARY_RECORD)
+            records["time"] = t
+            records["lat"] = 19.076 + 0.002 * np.sin(t / 120)
+            records["lon"] = 72.878 + 0.002 * np.cos(t / 120)
+            records["altitude"] = 100 + rng.normal(0, 0.3, n)
+            records["voltage"] = voltage + rng.normal(0, 0.02, n)
+            records["current"] = current
+            records["battery_temp"] = 28 + 12 * progress + 0.1 * current + rng.normal(0, 0.2, n)
+            records["battery_pct"] = soc
+            if is_binary:
+                records.tofile(f)
+            else:
+                pd.DataFrame(records).to_csv(f, header=False, index=False, float_format="%.6f")
+    return path
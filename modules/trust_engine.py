@@ -6,6 +6,162 @@ import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime, timedelta
 import random
+import io
+import os
+import time
+import tempfile
+from modules.overlap import compute_overlap, simulate_survey_geotags, GEOTAG_COLUMNS
+from modules.history_index import build_history_indexes, simulate_mission_history, mission_feature_vector
+from modules.context import ContextProvider, WeatherStore, write_synthetic_weather_store
+from modules.calibration import CalibrationRegistry, simulate_calibration_events
+from modules.volumes import compute_volumes, volume_confidence_interval, simulate_stockpile_surveys
+from modules.thermal import process_thermal_tiles, simulate_thermal_tiles
+from modules.cracks import run_crack_pipeline, simulate_road_tiles, summarise_road_findings
+from modules.scoring import (LIGHTING_LEVELS, SENSOR_LEVELS, ASSET_TYPES, MISSION_CRITICALITIES, WEIGHTS,
+                             score_missions, explain_missions)
+from modules.finding_confidence import FindingConfidenceModel
+from modules.feedback import FeedbackLoop, simulate_reviews
+from modules.score_calibration import (CALIBRATION_METHODS, ScoreCalibrator, CalibrationCache, calibration_report,
+                                      reliability_table, simulate_labeled_outcomes)
+from modules.client_profiles import ProfileRegistry
+from modules.prioritization import FindingPriorityIndex, FINDING_CRITICALITY, ACTIONS, action_thresholds, simulate_open_findings
+from modules.scoring_service import ScoringService
+from modules.mission_timing import (DEFAULT_SITE_INPUTS, confidence_grid, recommend_windows, window_plans,
+                                    simulate_sites)
+from modules.forecast import ConfidenceForecaster, simulate_forecast_history
+
+# Local weather files (a synthetic stand-in is generated when the folder is empty)
+WEATHER_STORE_DIR = os.environ.get("SKYLARK_WEATHER_DIR", os.path.join(tempfile.gettempdir(), "skylark_weather"))
+# Reviewer verdicts and learned weight versions
+FEEDBACK_DIR = os.environ.get("SKYLARK_FEEDBACK_DIR", os.path.join(tempfile.gettempdir(), "skylark_feedback"))
+
+@st.cache_data(show_spinner="Computing overlap from geotags...")
+def _overlap_from_csv(csv_bytes):
+    geotags = pd.read_csv(io.BytesIO(csv_bytes))
+    return compute_overlap(geotags)
+
+@st.cache_data(show_spinner="Computing overlap for simulated survey...")
+def _overlap_from_simulation():
+    return compute_overlap(simulate_survey_geotags(20_000))
+
+@st.cache_resource(show_spinner="Indexing historical missions...")
+def _history_indexes():
+    return build_history_indexes(simulate_mission_history(1_000_000))
+
+@st.cache_resource(show_spinner="Loading local weather store...")
+def _context_provider():
+    try:
+        store = WeatherStore(WEATHER_STORE_DIR)
+    except FileNotFoundError:
+        store = WeatherStore(write_synthetic_weather_store(WEATHER_STORE_DIR))
+    return ContextProvider(store)
+
+@st.cache_resource(show_spinner="Loading sensor calibration registry...")
+def _calibration_registry():
+    return CalibrationRegistry(simulate_calibration_events())
+
+@st.cache_resource
+def _feedback_loop():
+    return FeedbackLoop(FEEDBACK_DIR)
+
+@st.cache_resource(show_spinner="Fitting score calibration from labeled outcomes...")
+def _score_calibrations():
+    # Fits shared by the page and the scoring service workers; refitted in the background on new verdicts
+    loop = _feedback_loop()
+
+    def fit(method):
+        # Simulated outcome history plus the reviewer verdicts so far; the last 20% is held out for the report
+        outcomes = simulate_labeled_outcomes(200_000)
+        reviewed = loop.store.read()
+        if len(reviewed):
+            outcomes = pd.concat([reviewed[["asset_type", "score", "confirmed"]], outcomes], ignore_index=True)
+        split = int(len(outcomes) * 0.8)
+        train, held_out = outcomes.iloc[:split], outcomes.iloc[split:]
+        calibrator = ScoreCalibrator(method).fit(train["score"], train["confirmed"], train["asset_type"])
+        return calibrator, held_out
+
+    calibrations = CalibrationCache(fit)
+    for method in CALIBRATION_METHODS:
+        calibrations.get(method, loop.version)  # first fits here, not in a scoring worker
+    return calibrations
+
+@st.cache_resource
+def _profile_registry():
+    # Watches the profile folder; edits are picked up on the next rerun without a restart
+    return ProfileRegistry()
+
+@st.cache_resource
+def _scoring_service():
+    # Workers hold the loop itself: going through the Streamlit cache from worker threads is slow
+    loop = _feedback_loop()
+    calibrations = _score_calibrations()
+
+    def score_requests(batch):
+        # Latest learned weights at batch time; client offsets ride along with each request (none = 0)
+        weights, adjustments = loop.weights_at()
+        offsets = batch["client_offset"].fillna(0.0) if "client_offset" in batch else None
+        return score_missions(batch, weights, adjustments, offsets=offsets)
+
+    def calibrate_requests(batch, scores):
+        # Each request names its calibration method; fits follow the latest weights version
+        methods = batch.get("calibration_method", pd.Series("isotonic", index=batch.index)).fillna("isotonic")
+        return calibrations.transform(scores, batch["asset_type"], methods.to_numpy(dtype=object), loop.version)
+
+    return ScoringService(score_requests, calibrate_fn=calibrate_requests)
+
+@st.cache_resource
+def _finding_confidence_model():
+    return FindingConfidenceModel()
+
+@st.cache_resource(show_spinner="Indexing open findings across the portfolio...")
+def _portfolio_findings():
+    findings = simulate_open_findings(500_000)
+    return FindingPriorityIndex().load(findings), findings.set_index("finding_id")
+
+@st.cache_resource(show_spinner="Fitting pre-flight forecast residuals...")
+def _confidence_forecaster():
+    return ConfidenceForecaster().fit_residuals(simulate_forecast_history(20_000))
+
+@st.cache_data
+def _watchtower_sites():
+    return simulate_sites(1_000)
+
+@st.cache_data(show_spinner="Computing stockpile volumes from repeat surveys...")
+def _stockpile_volumes():
+    survey_dir = os.path.join(tempfile.gettempdir(), "skylark_surveys", "stockpile_demo")
+    before, after, polygons = simulate_stockpile_surveys(survey_dir, size=3000)
+    return compute_volumes(before, after, polygons)
+
+@st.cache_data(show_spinner="Scanning thermal tiles for hotspots...")
+def _thermal_hotspots():
+    tile_dir = os.path.join(tempfile.gettempdir(), "skylark_surveys", "thermal_demo")
+    panels, _ = process_thermal_tiles(simulate_thermal_tiles(tile_dir, n_tiles=40))
+    return panels[panels["hotspot"]].sort_values("delta_t", ascending=False)
+
+@st.cache_data(show_spinner="Scanning corridor imagery for cracks and wear...")
+def _road_findings():
+    corridor_dir = os.path.join(tempfile.gettempdir(), "skylark_surveys", "corridor_demo")
+    cracks, tiles, _ = run_crack_pipeline(simulate_road_tiles(os.path.join(corridor_dir, "tiles")),
+                                          os.path.join(corridor_dir, "cracks.parquet"))
+    return summarise_road_findings(cracks, tiles)
+
+# Findings table: traffic-light status plus a confidence bar, shared by the mission and portfolio views
+ACTION_ICONS = {"ACT NOW": "🟢", "REVIEW": "🟡", "MONITOR": "🔴"}
+FINDINGS_COLUMN_CONFIG = {
+    "status": st.column_config.TextColumn("", width="small"),
+    "action": st.column_config.TextColumn("Action", width="small"),
+    "type": st.column_config.TextColumn("Finding", width="medium"),
+    "finding_type": st.column_config.TextColumn("Type", width="small"),
+    "finding_id": st.column_config.TextColumn("ID", width="small"),
+    "value": st.column_config.TextColumn("Value", width="large"),
+    "confidence": st.column_config.ProgressColumn("Confidence", min_value=0, max_value=100, format="%.0f%%"),
+    "priority": st.column_config.NumberColumn("Priority", format="%.1f"),
+}
+
+def _render_findings_table(rows):
+    rows = rows.assign(status=rows["action"].map(ACTION_ICONS))
+    st.dataframe(rows[["status"] + [c for c in rows.columns if c != "status"]],
+                 column_config=FINDINGS_COLUMN_CONFIG, hide_index=True, use_container_width=True)
 
 def show_trust_engine_page():
     st.title("🚀 Contextual Confidence Engine")
@@ -135,6 +291,85 @@ def show_trust_engine_page():
     evaluates data quality and provides actionable insights.
     """)
     
+    # ================= FLIGHT DATA (OPTIONAL) =================
+    overlap_result = None
+    with st.expander("🛰️ Compute from Flight Data (Image Geotags)", expanded=False):
+        st.markdown(f"""
+        Upload per-image geotags (CSV with columns `{', '.join(GEOTAG_COLUMNS)}`) to compute
+        **actual front/side overlap** instead of using the slider.
+        """)
+        geotag_file = st.file_uploader("Image geotags CSV", type=["csv"])
+        use_simulated = st.checkbox("Use simulated 20,000-image survey", value=False)
+        
+        if geotag_file is not None:
+            try:
+                overlap_result = _overlap_from_csv(geotag_file.getvalue())
+            except ValueError as e:
+                st.error(f"❌ Could not compute overlap: {e}")
+        elif use_simulated:
+            overlap_result = _overlap_from_simulation()
+        
+        if overlap_result is not None:
+            ocol1, ocol2, ocol3 = st.columns(3)
+            with ocol1:
+                st.metric("Mean Front Overlap", f"{overlap_result['front_overlap_mean'] * 100:.0f}%")
+            with ocol2:
+                st.metric("Mean Side Overlap", f"{overlap_result['side_overlap_mean'] * 100:.0f}%")
+            with ocol3:
+                st.metric("Under-overlapped Area", f"{overlap_result['under_fraction'] * 100:.1f}%")
+            
+            xmin, xmax, ymin, ymax = overlap_result["extent"]
+            raster_fig = px.imshow(
+                np.where(overlap_result["under_overlap"], 1, 0),
+                origin="lower",
+                x=np.linspace(xmin, xmax, overlap_result["views"].shape[1]),
+                y=np.linspace(ymin, ymax, overlap_result["views"].shape[0]),
+                color_continuous_scale=[[0, "#DCFCE7"], [1, "#DC2626"]],
+                labels={"x": "East (m)", "y": "North (m)", "color": "Under-overlap"},
+                title=f"Under-overlapped Regions (< {overlap_result['min_views']} views per cell)"
+            )
+            raster_fig.update_layout(height=350, coloraxis_showscale=False, margin=dict(l=10, r=10, t=50, b=10))
+            st.plotly_chart(raster_fig, use_container_width=True)
+    
+    # ================= MISSION CONTEXT (OPTIONAL) =================
+    mission_context = None
+    calibration_status = None
+    with st.expander("🌤️ Mission Context (Time, Location & Sensor)", expanded=False):
+        use_context = st.checkbox("Use context provider instead of manual lighting/wind", value=False)
+        ccol1, ccol2, ccol3, ccol4 = st.columns(4)
+        with ccol1:
+            mission_date = st.date_input("Mission Date", value=datetime(2024, 1, 15))
+        with ccol2:
+            mission_time = st.time_input("Mission Time (UTC)", value=datetime(2024, 1, 15, 5, 30).time())
+        with ccol3:
+            mission_lat = st.number_input("Latitude", min_value=-90.0, max_value=90.0, value=19.076, format="%.3f")
+        with ccol4:
+            mission_lon = st.number_input("Longitude", min_value=-180.0, max_value=180.0, value=72.878, format="%.3f")
+        
+        if use_context:
+            mission_context = _context_provider().context(
+                [datetime.combine(mission_date, mission_time)], [mission_lat], [mission_lon]
+            ).iloc[0]
+            if np.isnan(mission_context["wind_speed"]):
+                st.warning("⚠️ No wind observation for this tile/hour in the local weather store; using manual wind.")
+            st.caption(f"☀️ Sun elevation: {mission_context['sun_elevation']:.1f}°")
+        
+        use_registry = st.checkbox("Resolve sensor calibration from the calibration registry", value=False)
+        registry = _calibration_registry()
+        sensor_id = st.selectbox("Sensor ID", registry.sensors, index=0)
+        
+        if use_registry:
+            calibration_status = registry.resolve(
+                [sensor_id], [datetime.combine(mission_date, mission_time)]
+            ).iloc[0]
+            if pd.isna(calibration_status["last_calibrated"]):
+                st.caption("⚙️ No calibration on record before this mission")
+            else:
+                st.caption(
+                    f"⚙️ Last calibrated {calibration_status['last_calibrated']:%Y-%m-%d} "
+                    f"({calibration_status['days_since_calibration']:.0f} days before mission)"
+                )
+    
     # Mission Parameters Sliders
     st.markdown("### 📋 Mission Parameters")
     
@@ -146,35 +381,48 @@ def show_trust_engine_page():
             min_value=0, max_value=100, value=85,
             help="Overall clarity and sharpness of captured images"
         )
-        lighting_conditions = st.select_slider(
-            "🌤️ Lighting Conditions", 
-            options=["Poor", "Fair", "Good", "Excellent"],
-            value="Good"
-        )
+        if mission_context is not None:
+            lighting_conditions = mission_context["lighting_conditions"]
+            st.metric("🌤️ Lighting Conditions", lighting_conditions, delta="from sun elevation", delta_color="off")
+        else:
+            lighting_conditions = st.select_slider(
+                "🌤️ Lighting Conditions", 
+                options=LIGHTING_LEVELS,
+                value="Good"
+            )
         
     with col2:
-        overlap_consistency = st.slider(
-            "📐 Overlap Consistency", 
-            min_value=0, max_value=100, value=90,
-            help="Consistency of image overlap across the mission"
-        )
-        wind_speed = st.slider(
-            "💨 Wind Speed (km/h)", 
-            min_value=0, max_value=50, value=15,
-            help="Wind conditions during flight"
-        )
+        if overlap_result is not None:
+            overlap_consistency = round(overlap_result["overlap_consistency"])
+            st.metric("📐 Overlap Consistency", f"{overlap_consistency}%", delta="from flight data", delta_color="off")
+        else:
+            overlap_consistency = st.slider(
+                "📐 Overlap Consistency", 
+                min_value=0, max_value=100, value=90,
+                help="Consistency of image overlap across the mission"
+            )
+        if mission_context is not None and not np.isnan(mission_context["wind_speed"]):
+            wind_speed = round(float(mission_context["wind_speed"]))
+            st.metric("💨 Wind Speed (km/h)", wind_speed, delta="from weather store", delta_color="off")
+        else:
+            wind_speed = st.slider(
+                "💨 Wind Speed (km/h)", 
+                min_value=0, max_value=50, value=15,
+                help="Wind conditions during flight"
+            )
         
     with col3:
-        historical_match = st.slider(
-            "📊 Historical Pattern Match", 
-            min_value=0, max_value=100, value=75,
-            help="Similarity to past successful missions"
-        )
-        sensor_calibration = st.select_slider(
-            "⚙️ Sensor Calibration", 
-            options=["Expired", "Marginal", "Good", "Excellent"],
-            value="Good"
-        )
+        # Filled in once the asset type is known
+        historical_slot = st.empty()
+        if calibration_status is not None:
+            sensor_calibration = calibration_status["sensor_calibration"]
+            st.metric("⚙️ Sensor Calibration", sensor_calibration, delta="from registry", delta_color="off")
+        else:
+            sensor_calibration = st.select_slider(
+                "⚙️ Sensor Calibration", 
+                options=SENSOR_LEVELS,
+                value="Good"
+            )
     
     # Asset Type Selection
     st.markdown("### 🏭 Asset Configuration")
@@ -182,155 +430,89 @@ def show_trust_engine_page():
     asset_col1, asset_col2 = st.columns(2)
     
     with asset_col1:
+        profiles = _profile_registry()
+        client_profile = st.selectbox(
+            "Client Profile",
+            profiles.names,
+            format_func=lambda name: profiles.get(name).label,
+            help="Client settings from config/clients/*.json, reloaded when the files change"
+        )
+        profile = profiles.get(client_profile)
+        if profiles.error:
+            st.warning(f"Client profile reload failed, still using the last good version: {profiles.error}")
+        
         asset_type = st.selectbox(
             "Select Asset Type",
-            ["Mining Stockpile", "Solar Farm", "Road Infrastructure", "Building Inspection", "Agricultural Field"],
+            ASSET_TYPES,
             index=0
         )
-        
-        # Asset-specific parameters
-        if asset_type == "Mining Stockpile":
-            asset_importance = "High"
-            measurement_impact = "Volume calculation accuracy critical"
-            historical_data_points = "45+ past surveys"
-        elif asset_type == "Solar Farm":
-            asset_importance = "Critical"
-            measurement_impact = "Fault detection affects energy output"
-            historical_data_points = "120+ past inspections"
-        elif asset_type == "Road Infrastructure":
-            asset_importance = "Medium"
-            measurement_impact = "Safety compliance monitoring"
-            historical_data_points = "30+ past surveys"
-        else:
-            asset_importance = "Medium"
-            measurement_impact = "General inspection"
-            historical_data_points = "20+ past surveys"
     
     with asset_col2:
         mission_criticality = st.selectbox(
             "Mission Criticality",
-            ["Routine Inspection", "Progress Monitoring", "Compliance Check", "Emergency Assessment"],
-            index=1
+            MISSION_CRITICALITIES,
+            index=1,
+            help="Emergency missions are scored on the fast lane; criticality shifts action thresholds and ranking"
         )
         
+        # Asset-specific parameters from the client profile
+        details = profile.asset_details.get(asset_type, {})
         st.markdown(f"""
         **Asset Details:**
-        - **Importance:** {asset_importance}
-        - **Measurement Impact:** {measurement_impact}
-        - **Historical Data:** {historical_data_points}
+        - **Importance:** {profile.importance_levels[asset_type]}
+        - **Measurement Impact:** {details.get("measurement_impact", "General inspection")}
+        - **Historical Data:** {details.get("historical_data", "n/a")}
         """)
     
+    # Historical pattern match from the mission history index
+    history_index = _history_indexes()[asset_type]
+    historical_match, similar_missions = history_index.similarity(
+        mission_feature_vector(image_quality, lighting_conditions, overlap_consistency,
+                               wind_speed, sensor_calibration)
+    )
+    historical_match = round(historical_match)
+    historical_slot.metric(
+        "📊 Historical Pattern Match", f"{historical_match}%",
+        delta=f"top {len(similar_missions)} of {len(history_index):,} past missions", delta_color="off",
+        help="Similarity to past successful missions"
+    )
+    
     # ================= CONFIDENCE CALCULATION =================
     st.markdown("### ⚡ Confidence Engine Analysis")
     
+    mission_inputs = {
+        "image_quality": image_quality,
+        "lighting_conditions": lighting_conditions,
+        "overlap_consistency": overlap_consistency,
+        "wind_speed": wind_speed,
+        "historical_match": historical_match,
+        "sensor_calibration": sensor_calibration,
+        "asset_type": asset_type,
+        "mission_criticality": mission_criticality,
+    }
+    
+    # Latest learned weights; asset adjustments shifted by the client's offsets
+    weights_now, adjustments_now = _feedback_loop().weights_at()
+    # Chosen in the calibration expander below; the headline probability follows it
+    calibration_method = st.session_state.get("calibration_method", "isotonic")
+    adjustments_now = profile.asset_adjustments(adjustments_now)
+    
     # Calculate confidence score based on inputs
     def calculate_confidence_score():
-        # Base weights
-        weights = {
-            "image_quality": 0.25,
-            "lighting": 0.20,
-            "overlap": 0.20,
-            "wind": 0.15,
-            "historical": 0.10,
-            "sensor": 0.10
-        }
-        
-        # Convert categorical values to numeric
-        lighting_score = {
-            "Poor": 40, "Fair": 65, "Good": 85, "Excellent": 95
-        }[lighting_conditions]
-        
-        sensor_score = {
-            "Expired": 30, "Marginal": 60, "Good": 85, "Excellent": 95
-        }[sensor_calibration]
-        
-        # Wind penalty (higher wind = lower score)
-        wind_penalty = max(0, 100 - (wind_speed * 2))
-        
-        # Calculate weighted score
-        score = (
-            image_quality * weights["image_quality"] +
-            lighting_score * weights["lighting"] +
-            overlap_consistency * weights["overlap"] +
-            wind_penalty * weights["wind"] +
-            historical_match * weights["historical"] +
-            sensor_score * weights["sensor"]
-        )
-        
-        # Asset type adjustment
-        asset_adjustment = {
-            "Mining Stockpile": 0,  # No adjustment
-            "Solar Farm": 5,        # Slightly more critical
-            "Road Infrastructure": -2,
-            "Building Inspection": 0,
-            "Agricultural Field": -3
-        }[asset_type]
-        
-        return min(100, max(0, score + asset_adjustment))
+        # Routed by criticality through the scoring service (same vectorized scorer as batch re-scoring)
+        request = {**mission_inputs, "client_offset": float(profile.offsets([asset_type])[0]),
+                   "calibration_method": calibration_method}
+        return _scoring_service().score(request, mission_criticality, timeout=10)
     
     # Generate insights
     def generate_insights(confidence_score):
-        insights = []
-        
-        # Main insight
-        if confidence_score >= 90:
-            insights.append({
-                "level": "green",
-                "message": f"✅ **Excellent Data Quality** ({confidence_score:.1f}%)",
-                "details": "Data is highly reliable for decision-making. Automated actions recommended."
-            })
-        elif confidence_score >= 75:
-            insights.append({
-                "level": "yellow",
-                "message": f"⚠️ **Good Data with Minor Concerns** ({confidence_score:.1f}%)",
-                "details": "Data is reliable for most decisions. Review recommended for critical measurements."
-            })
-        else:
-            insights.append({
-                "level": "red",
-                "message": f"❌ **Data Quality Concerns** ({confidence_score:.1f}%)",
-                "details": "Significant uncertainties detected. Manual verification recommended before action."
-            })
-        
-        # Specific insights based on parameters
-        if image_quality < 70:
-            insights.append({
-                "level": "red",
-                "message": "📸 **Image Quality Issue**",
-                "details": f"Image quality ({image_quality}%) may affect measurement accuracy."
-            })
-        elif image_quality > 90:
-            insights.append({
-                "level": "green",
-                "message": "📸 **Excellent Image Quality**",
-                "details": "Clear, sharp imagery supports high-confidence analysis."
-            })
-            
-        if wind_speed > 25:
-            insights.append({
-                "level": "red",
-                "message": "💨 **High Wind Impact**",
-                "details": f"Wind speed ({wind_speed} km/h) may cause image blur and position errors."
-            })
-            
-        if historical_match < 60:
-            insights.append({
-                "level": "yellow",
-                "message": "📊 **Historical Pattern Deviation**",
-                "details": "Significant deviation from historical patterns. May indicate real change or anomaly."
-            })
-            
-        if sensor_calibration == "Expired":
-            insights.append({
-                "level": "red",
-                "message": "⚙️ **Sensor Calibration Expired**",
-                "details": "Sensor calibration is expired. Measurements may have systematic errors."
-            })
-        
-        return insights
+        # Declarative rules (config/insight_rules.json), precompiled with the client's thresholds
+        return profile.insight_rules.insights({**mission_inputs, "confidence_score": confidence_score})
     
     # Calculate and display confidence
-    confidence_score = calculate_confidence_score()
+    scored_request = calculate_confidence_score()
+    confidence_score = scored_request["confidence_score"]
+    confirmed_probability = scored_request["confirmed_probability"]
     insights = generate_insights(confidence_score)
     
     # Display confidence with gauge chart
@@ -387,9 +569,56 @@ def show_trust_engine_page():
             <p style="color: #4B5563; font-size: 0.9rem;">
             {'High reliability for business decisions' if confidence_score >= 75 else 'Moderate reliability, review recommended' if confidence_score >= 50 else 'Significant concerns, verification needed'}
             </p>
+            <p style="color: #4B5563; font-size: 0.9rem; margin-bottom: 0;">
+            Calibrated: <strong>{confirmed_probability:.0%}</strong> of past {asset_type.lower()} findings at this score were confirmed
+            </p>
         </div>
         """, unsafe_allow_html=True)
     
+    # ================= EXPLAINABILITY =================
+    st.markdown("#### 🔎 Why This Score?")
+    explanation = explain_missions(pd.DataFrame([mission_inputs]), weights_now, adjustments_now).iloc[0]
+    factor_labels = {
+        "image_quality": "Image Quality", "lighting": "Lighting", "overlap": "Overlap", "wind": "Wind",
+        "historical": "Historical Match", "sensor": "Sensor Calibration",
+    }
+    waterfall_labels = ["Baseline (all factors at 75)"] + [factor_labels[f] for f in WEIGHTS] + ["Asset Adjustment", "Confidence Score"]
+    waterfall_values = ([explanation["baseline"]] + [explanation[f"contrib_{f}"] for f in WEIGHTS]
+                        + [explanation["contrib_asset"], explanation["confidence_score"]])
+    fig = go.Figure(go.Waterfall(
+        orientation="v",
+        measure=["absolute"] + ["relative"] * (len(WEIGHTS) + 1) + ["total"],
+        x=waterfall_labels,
+        y=waterfall_values,
+        text=[f"{v:+.1f}" if 0 < i < len(waterfall_values) - 1 else f"{v:.1f}" for i, v in enumerate(waterfall_values)],
+        textposition="outside",
+        increasing={"marker": {"color": "#16A34A"}},
+        decreasing={"marker": {"color": "#DC2626"}},
+        totals={"marker": {"color": "#1E3A8A"}},
+    ))
+    fig.update_layout(height=350, margin=dict(l=10, r=10, t=30, b=10), yaxis_title="Score points", showlegend=False)
+    st.plotly_chart(fig, use_container_width=True)
+    
+    with st.expander("📏 Score Calibration & Reliability", expanded=False):
+        method = st.radio("Calibration method", ["isotonic", "platt"], horizontal=True, key="calibration_method")
+        calibrator, held_out = _score_calibrations().get(method, _feedback_loop().version)
+        report = calibration_report(held_out["score"], held_out["confirmed"], held_out["asset_type"], calibrator)
+        st.dataframe(report.rename(columns={
+            "asset_type": "Asset Type", "outcomes": "Held-out Outcomes", "confirmed_rate": "Confirmed Rate",
+            "brier_raw": "Brier (raw score)", "brier_calibrated": "Brier (calibrated)",
+        }).style.format({"Confirmed Rate": "{:.1%}", "Brier (raw score)": "{:.4f}", "Brier (calibrated)": "{:.4f}"}),
+            hide_index=True, use_container_width=True)
+        
+        raw = reliability_table(held_out["score"] / 100, held_out["confirmed"])
+        calibrated = reliability_table(calibrator.transform(held_out["score"], held_out["asset_type"]), held_out["confirmed"])
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=[0, 1], y=[0, 1], mode="lines", name="Perfect", line=dict(dash="dash", color="gray")))
+        fig.add_trace(go.Scatter(x=raw["mean_predicted"], y=raw["observed_rate"], mode="lines+markers", name="Raw score / 100"))
+        fig.add_trace(go.Scatter(x=calibrated["mean_predicted"], y=calibrated["observed_rate"], mode="lines+markers", name="Calibrated"))
+        fig.update_layout(title="Reliability Diagram (held-out outcomes)", xaxis_title="Predicted probability",
+                          yaxis_title="Observed confirmed rate", height=350, margin=dict(l=10, r=10, t=50, b=10))
+        st.plotly_chart(fig, use_container_width=True)
+    
     # ================= INSIGHTS & RECOMMENDATIONS =================
     st.markdown("### 🔍 Detailed Insights & Recommendations")
     
@@ -402,82 +631,214 @@ def show_trust_engine_page():
         else:
             st.error(f"**{insight['message']}**\n\n{insight['details']}")
     
+    # ================= WATCHTOWER MISSION TIMING =================
+    with st.expander("📡 Watchtower: Recommended Flight Windows & Pre-flight Forecast", expanded=False):
+        st.caption("Predicted confidence for every daylight hour at the mission location (see Mission Context), "
+                   "from the sun position and wind in the weather store plus this mission's other inputs.")
+        tcol1, tcol2 = st.columns(2)
+        with tcol1:
+            plan_days = st.slider("Days ahead", min_value=1, max_value=14, value=7, key="timing_days")
+        with tcol2:
+            window_hours = st.slider("Flight window (hours)", min_value=1, max_value=4, value=2, key="timing_window")
+        
+        site = pd.DataFrame([{"site_id": "This mission", "lat": mission_lat, "lon": mission_lon,
+                              **{name: mission_inputs[name] for name in DEFAULT_SITE_INPUTS}}])
+        plan_hours, hourly_scores, _, _ = confidence_grid(_context_provider(), site, mission_date, plan_days,
+                                                          weights_now, adjustments_now)
+        windows = recommend_windows(_context_provider(), site, mission_date, plan_days, window_hours, top_k=5,
+                                    weights=weights_now, asset_adjustments=adjustments_now)
+        if windows.empty:
+            st.info("No daylight hours with weather data in this range; the local weather store may not cover it.")
+        else:
+            # Pre-flight forecast per candidate window: forecast wind error grows with lead time
+            windows = windows.join(_confidence_forecaster().forecast(
+                window_plans(site, windows, mission_date), weights=weights_now, asset_adjustments=adjustments_now))
+            st.line_chart(pd.Series(hourly_scores[0], index=plan_hours, name="Predicted confidence"), height=220)
+            st.dataframe(windows.drop(columns="site_id"), hide_index=True, use_container_width=True)
+            st.caption("q10 / q50 / q90: forecast confidence range once forecast wind error and historical "
+                       "plan-vs-flown residuals are accounted for.")
+        
+        if st.checkbox("Plan windows for 1,000 portfolio sites (14 days)", value=False, key="timing_portfolio"):
+            sites = _watchtower_sites()
+            started = time.perf_counter()
+            portfolio_windows = recommend_windows(_context_provider(), sites, mission_date, 14, window_hours,
+                                                  weights=weights_now, asset_adjustments=adjustments_now)
+            planned = time.perf_counter()
+            portfolio_windows = portfolio_windows.join(_confidence_forecaster().forecast(
+                window_plans(sites, portfolio_windows, mission_date), weights=weights_now,
+                asset_adjustments=adjustments_now))
+            forecast_s = time.perf_counter() - planned
+            st.caption(f"{len(sites):,} sites × {14 * 24} hours evaluated in {planned - started:.2f} s · "
+                       f"{len(portfolio_windows):,} candidate windows forecast in {forecast_s:.2f} s "
+                       f"({forecast_s / max(len(portfolio_windows), 1) * 1e6:.0f} µs each)")
+            st.dataframe(portfolio_windows.head(300), hide_index=True, use_container_width=True)
+    
     # ================= ACTION PRIORITIZATION =================
     st.subheader("🚦 Action Prioritization (Traffic Light System)")
     
     # Generate sample findings based on asset type
     def generate_sample_findings(asset_type, confidence_score):
         if asset_type == "Mining Stockpile":
+            # Largest stockpile's volume change between the last two surveys
+            pile = volume_confidence_interval(_stockpile_volumes(), confidence_score).iloc[0]
             return [
-                {"id": "VOL-001", "type": "Volume Measurement", "value": "52,430 m³", "confidence": confidence_score},
-                {"id": "SLP-001", "type": "Slope Stability", "value": "32°", "confidence": max(0, confidence_score - 15)},
-                {"id": "ERD-001", "type": "Erosion Detection", "value": "Minor", "confidence": max(0, confidence_score - 25)},
-                {"id": "EQP-001", "type": "Equipment Presence", "value": "Detected", "confidence": min(100, confidence_score + 10)},
+                {"id": "VOL-001", "type": "Volume Measurement", "value": f"{pile['net_m3']:,.0f} ± {pile['ci_half_width_m3']:,.0f} m³"},
+                {"id": "SLP-001", "type": "Slope Stability", "value": "32°"},
+                {"id": "ERD-001", "type": "Erosion Detection", "value": "Minor"},
+                {"id": "EQP-001", "type": "Equipment Presence", "value": "Detected"},
             ]
         elif asset_type == "Solar Farm":
+            # Hottest panel relative to its string in the latest thermal flight
+            hotspots = _thermal_hotspots()
+            if len(hotspots):
+                top = hotspots.iloc[0]
+                thermal_value = f"Panel {top['panel_id']} (ΔT +{top['delta_t']:.0f}°C, {top['severity']})"
+            else:
+                thermal_value = "No hotspots"
             return [
-                {"id": "THM-001", "type": "Thermal Anomaly", "value": "Panel A7", "confidence": max(0, confidence_score - 10)},
-                {"id": "DTR-001", "type": "Dirt Accumulation", "value": "Low", "confidence": confidence_score},
-                {"id": "STR-001", "type": "Structural Integrity", "value": "Normal", "confidence": min(100, confidence_score + 5)},
-                {"id": "CON-001", "type": "Connection Check", "value": "All OK", "confidence": min(100, confidence_score + 15)},
+                {"id": "THM-001", "type": "Thermal Anomaly", "value": thermal_value},
+                {"id": "DTR-001", "type": "Dirt Accumulation", "value": "Low"},
+                {"id": "STR-001", "type": "Structural Integrity", "value": "Normal"},
+                {"id": "CON-001", "type": "Connection Check", "value": "All OK"},
             ]
         else:
+            road = _road_findings()
             return [
-                {"id": "CRK-001", "type": "Crack Detection", "value": "Minor", "confidence": confidence_score},
-                {"id": "WAR-001", "type": "Wear Analysis", "value": "Normal", "confidence": min(100, confidence_score + 5)},
-                {"id": "ALG-001", "type": "Alignment Check", "value": "Within Spec", "confidence": max(0, confidence_score - 5)},
-                {"id": "CLN-001", "type": "Cleanliness", "value": "Good", "confidence": min(100, confidence_score + 10)},
+                {"id": "CRK-001", "type": "Crack Detection", "value": road["CRK"]["value"], "detector_confidence": road["CRK"]["confidence"]},
+                {"id": "WAR-001", "type": "Wear Analysis", "value": road["WAR"]["value"], "detector_confidence": road["WAR"]["confidence"]},
+                {"id": "ALG-001", "type": "Alignment Check", "value": road["ALG"]["value"], "detector_confidence": road["ALG"]["confidence"]},
+                {"id": "CLN-001", "type": "Cleanliness", "value": "Good"},
             ]
     
     findings = generate_sample_findings(asset_type, confidence_score)
-    
-    # Display findings in prioritized order
+    # Per-finding confidence: type precision, detector score and this mission's factors, in one batch
+    finding_frame = pd.DataFrame(findings).assign(
+        finding_type=lambda f: f["id"],
+        image_quality=image_quality,
+        lighting_conditions=lighting_conditions,
+        overlap_consistency=overlap_consistency,
+        wind_speed=wind_speed,
+        sensor_calibration=sensor_calibration,
+    )
+    for finding, finding_confidence in zip(findings, _finding_confidence_model().score(finding_frame)):
+        finding["confidence"] = finding_confidence
+    
+    # Display findings in prioritized order (bucket, then confidence x asset importance x criticality)
     st.markdown("#### 📋 Prioritized Findings")
     
+    st.caption("Action thresholds for " + mission_criticality + ": " + " · ".join(
+        f"{name} ≥ {threshold:.0f}%" for name, threshold in action_thresholds(mission_criticality)[:-1]))
+    mission_index = FindingPriorityIndex(asset_importance=profile.asset_importance)
     for finding in findings:
-        col1, col2, col3, col4 = st.columns([1, 2, 1, 2])
-        
-        with col1:
-            # Color code based on confidence
-            if finding["confidence"] >= 85:
-                color = "🟢"
-                action = "ACT NOW"
-            elif finding["confidence"] >= 70:
-                color = "🟡"
-                action = "REVIEW"
+        mission_index.upsert(finding["id"], finding["confidence"], asset_type,
+                             FINDING_CRITICALITY[finding["id"].split("-")[0]], mission_criticality)
+    by_id = {finding["id"]: finding for finding in findings}
+    ranked = mission_index.page(k=len(findings))
+    findings = [by_id[finding_id] for finding_id in ranked["finding_id"]]
+    
+    # One table for the visible page only: render cost follows the page, not the finding count
+    findings_frame = pd.DataFrame({
+        "action": ranked["action"].to_numpy(),
+        "type": [finding["type"] for finding in findings],
+        "finding_id": [finding["id"] for finding in findings],
+        "value": [str(finding["value"]) for finding in findings],
+        "confidence": [finding["confidence"] for finding in findings],
+    })
+    filter_col, size_col, page_col = st.columns([2, 1, 1])
+    with filter_col:
+        shown_actions = st.multiselect("Show", ACTIONS, default=ACTIONS, key="findings_actions")
+    with size_col:
+        findings_page_size = st.selectbox("Rows per page", [25, 50, 100], key="findings_page_size")
+    visible = findings_frame[findings_frame["action"].isin(shown_actions)]
+    with page_col:
+        findings_page = st.number_input("Page", min_value=1, max_value=max(1, -(-len(visible) // findings_page_size)),
+                                        value=1, key="findings_page")
+    start = (findings_page - 1) * findings_page_size
+    _render_findings_table(visible.iloc[start:start + findings_page_size])
+    st.caption(f"Showing {min(start + 1, len(visible))}-{min(start + findings_page_size, len(visible))} "
+               f"of {len(visible):,} findings")
+    
+    with st.expander("🧠 Reviewer Feedback (Continuous Learning)", expanded=False):
+        loop = _feedback_loop()
+        st.caption(f"Scores use weights version {loop.version} · {len(loop.versions) - 1:,} verdicts learned so far")
+        fb_col1, fb_col2, fb_col3 = st.columns([2, 2, 1])
+        with fb_col1:
+            reviewed_id = st.selectbox("Finding", findings_frame["finding_id"], key="feedback_finding")
+        with fb_col2:
+            verdict = st.radio("Verdict", ["Confirmed", "False positive"], horizontal=True, key="feedback_verdict")
+        with fb_col3:
+            if st.button("Submit", key="feedback_submit"):
+                version = loop.record(reviewed_id, mission_inputs, verdict == "Confirmed")
+                st.success(f"Learned → v{version}")
+        if st.button("Replay 2,000 simulated reviews", key="feedback_replay"):
+            reviews = simulate_reviews(2_000)
+            inputs = reviews.drop(columns=["finding_id", "confirmed"]).to_dict("records")
+            for finding_id, review, confirmed in zip(reviews["finding_id"], inputs, reviews["confirmed"]):
+                loop.record(finding_id, review, confirmed, reviewer="simulation")
+            st.success(f"Replayed {len(reviews):,} reviews → v{loop.version}")
+        st.line_chart(loop.history(), height=220)
+    
+    with st.expander("📦 Batch Scoring & Export", expanded=False):
+        st.caption("CSV columns: image_quality, lighting_conditions or lighting_score, overlap_consistency, "
+                   "wind_speed, historical_match, sensor_calibration or sensor_score, asset_type")
+        batch_file = st.file_uploader("Missions CSV", type="csv", key="batch_missions")
+        use_sample_batch = st.checkbox("Use simulated batch (10,000 missions)", value=False, key="batch_sample")
+        batch = None
+        if batch_file is not None:
+            batch = pd.read_csv(batch_file)
+        elif use_sample_batch:
+            batch = simulate_reviews(10_000).drop(columns=["confirmed"])
+        if batch is not None:
+            try:
+                # Scores and contributions come out of the same pass over the batch
+                scored = batch.join(explain_missions(batch, weights_now, adjustments_now))
+                weights_version = _feedback_loop().version
+                scored = scored.assign(
+                    confirmed_probability=_score_calibrations().transform(
+                        scored["confidence_score"], scored["asset_type"], calibration_method, weights_version),
+                    calibration_method=calibration_method, weights_version=weights_version,
+                    client_profile=client_profile)
+            except (KeyError, ValueError) as exc:
+                st.error(f"Could not score batch: {exc}")
             else:
-                color = "🔴"
-                action = "MONITOR"
-            st.markdown(f"### {color}")
-            
-        with col2:
-            st.markdown(f"**{finding['type']}**")
-            st.markdown(f"*{finding['id']}*")
+                st.dataframe(scored.head(100), hide_index=True, use_container_width=True)
+                st.download_button("⬇️ Download scores + contributions (CSV)", scored.to_csv(index=False),
+                                   file_name="confidence_scores.csv", mime="text/csv")
+    
+    with st.expander("🗂️ Portfolio Action Queue (All Open Findings)", expanded=False):
+        if st.checkbox("Load portfolio findings", value=False):
+            portfolio_index, portfolio = _portfolio_findings()
+            counts = portfolio_index.counts()
+            count_cols = st.columns(len(ACTIONS))
+            for col, action in zip(count_cols, ACTIONS):
+                col.metric(action, f"{counts[action]:,}")
             
-        with col3:
-            st.markdown(f"**{finding['value']}**")
+            queue_col1, queue_col2 = st.columns(2)
+            with queue_col1:
+                queue_action = st.selectbox("Bucket", ["All"] + ACTIONS)
+            total = counts.sum() if queue_action == "All" else counts[queue_action]
+            page_size = 25
+            with queue_col2:
+                page_no = st.number_input("Page", min_value=1, max_value=max(1, -(-int(total) // page_size)), value=1)
             
-        with col4:
-            confidence_color = (
-                "green" if finding["confidence"] >= 85 else 
-                "orange" if finding["confidence"] >= 70 else 
-                "red"
-            )
-            st.markdown(f"""
-            <div style="
-                display: inline-block;
-                padding: 0.25rem 0.75rem;
-                background-color: {confidence_color}20;
-                color: {confidence_color};
-                border-radius: 20px;
-                font-weight: bold;
-                border: 1px solid {confidence_color}40;
-            ">
-            {finding['confidence']:.0f}% • {action}
-            </div>
-            """, unsafe_allow_html=True)
-        
-        st.divider()
+            # Only the visible slice is pulled from the index
+            queue_page = portfolio_index.page(None if queue_action == "All" else queue_action,
+                                              offset=(page_no - 1) * page_size, k=page_size)
+            details = portfolio.loc[queue_page["finding_id"],
+                                    ["finding_type", "asset_type", "mission_criticality", "site", "criticality"]]
+            _render_findings_table(queue_page.join(details.reset_index(drop=True)))
+    
+    with st.expander("⏱️ Scoring Service Lanes (Latency SLOs)", expanded=False):
+        service = _scoring_service()
+        st.caption("Emergency Assessment missions go to the fast lane with its own queue and worker; "
+                   "all other criticalities share the batched standard lane.")
+        if st.button("Send 5,000 simulated requests", key="service_load"):
+            requests = simulate_reviews(5_000).drop(columns=["finding_id", "confirmed"]).to_dict("records")
+            criticalities = np.random.default_rng(7).choice(MISSION_CRITICALITIES, len(requests), p=[0.45, 0.3, 0.2, 0.05])
+            futures = [service.submit(request, criticality) for request, criticality in zip(requests, criticalities)]
+            for future in futures:
+                future.result(timeout=30)
+        st.dataframe(service.metrics().style.format(precision=1), use_container_width=True)
     
     # ================= BUSINESS IMPACT CALCULATOR =================
     st.subheader("💰 Business Impact Analysis")
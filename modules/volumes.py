@@ -0,0 +1,187 @@
+# modules/volumes.py - STOCKPILE VOLUME CHANGE DETECTION BETWEEN REPEAT SURVEYS
+import os
+import json
+import numpy as np
+import pandas as pd
+
+DEFAULT_TILE = 2048
+DEFAULT_NODATA = -9999.0
+
+# Vertical accuracy model: per-cell DEM error grows as mission confidence drops
+BASE_SIGMA_Z = 0.03        # metres, at 100% confidence
+SIGMA_Z_PER_POINT = 0.002  # extra metres per confidence point below 100
+SYSTEMATIC_SHARE = 0.5     # share of the error that is a site-wide bias
+
+# ================= DEM I/O =================
+def write_dem(path, shape, origin, cell_size, nodata=DEFAULT_NODATA, fill_fn=None, tile=DEFAULT_TILE):
+    """Create a float32 DEM on disk (raw .dem + .json sidecar), filled tile by tile.
+
+    `origin` is the (x, y) of the top-left corner; rows run south. `fill_fn(row0, col0, rows, cols)`
+    returns the elevations of one window, so DEMs larger than RAM can be produced.
+    """
+    height, width = shape
+    meta = {"width": width, "height": height, "origin_x": origin[0], "origin_y": origin[1],
+            "cell_size": cell_size, "nodata": nodata, "dtype": "float32"}
+    with open(path + ".json", "w") as f:
+        json.dump(meta, f)
+    dem = np.memmap(path, dtype=np.float32, mode="w+", shape=(height, width))
+    if fill_fn is not None:
+        for r0 in range(0, height, tile):
+            for c0 in range(0, width, tile):
+                rows, cols = min(tile, height - r0), min(tile, width - c0)
+                dem[r0:r0 + rows, c0:c0 + cols] = fill_fn(r0, c0, rows, cols)
+    dem.flush()
+    del dem
+    return path
+
+
+def open_dem(path):
+    """Memory-map a DEM written by `write_dem` (nothing is read until a window is sliced)"""
+    with open(path + ".json") as f:
+        meta = json.load(f)
+    data = np.memmap(path, dtype=meta["dtype"], mode="r", shape=(meta["height"], meta["width"]))
+    return data, meta
+
+
+def _same_grid(a, b):
+    keys = ["width", "height", "origin_x", "origin_y", "cell_size"]
+    return all(np.isclose(a[k], b[k]) for k in keys)
+
+# ================= POLYGON MASKING =================
+def _points_in_polygon(x, y, coords):
+    """Even-odd rule over a grid of points, vectorized across all points per edge"""
+    inside = np.zeros(np.broadcast(x, y).shape, dtype=bool)
+    xs, ys = coords[:, 0], coords[:, 1]
+    xj, yj = np.roll(xs, 1), np.roll(ys, 1)
+    for xi, yi, xk, yk in zip(xs, ys, xj, yj):
+        crosses = (yi > y) != (yk > y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_cross = (xk - xi) * (y - yi) / (yk - yi) + xi
+        inside ^= crosses & (x < x_cross)
+    return inside
+
+
+def _polygon_window(coords, meta):
+    # Pixel window (row0, row1, col0, col1) covering the polygon's bounding box
+    cs = meta["cell_size"]
+    col0 = int(np.floor((coords[:, 0].min() - meta["origin_x"]) / cs))
+    col1 = int(np.ceil((coords[:, 0].max() - meta["origin_x"]) / cs))
+    row0 = int(np.floor((meta["origin_y"] - coords[:, 1].max()) / cs))
+    row1 = int(np.ceil((meta["origin_y"] - coords[:, 1].min()) / cs))
+    return (max(row0, 0), min(row1, meta["height"]), max(col0, 0), min(col1, meta["width"]))
+
+# ================= VOLUME ENGINE =================
+def compute_volumes(before_path, after_path, polygons, tile=DEFAULT_TILE):
+    """Cut/fill volume per polygon between two co-registered DEMs.
+
+    Both DEMs are memory-mapped and processed in `tile` x `tile` windows
+    restricted to each polygon's bounding box, so only the pages that
+    matter are read and memory stays bounded by the tile size.
+    `polygons` is a list of {"id": ..., "coords": [(x, y), ...]} in map units.
+    """
+    before, meta = open_dem(before_path)
+    after, meta_after = open_dem(after_path)
+    if not _same_grid(meta, meta_after):
+        raise ValueError("DEMs must share the same grid (resample before comparing)")
+    cs = meta["cell_size"]
+    cell_area = cs * cs
+    nodata = meta["nodata"]
+
+    rows = []
+    for polygon in polygons:
+        coords = np.asarray(polygon["coords"], dtype=np.float64)
+        r0, r1, c0, c1 = _polygon_window(coords, meta)
+        cells = cut = fill = 0.0
+        for tr in range(r0, r1, tile):
+            for tc in range(c0, c1, tile):
+                tr1, tc1 = min(tr + tile, r1), min(tc + tile, c1)
+                y = meta["origin_y"] - (np.arange(tr, tr1) + 0.5) * cs
+                x = meta["origin_x"] + (np.arange(tc, tc1) + 0.5) * cs
+                mask = _points_in_polygon(x[None, :], y[:, None], coords)
+
+                z0 = np.asarray(before[tr:tr1, tc:tc1])
+                z1 = np.asarray(after[tr:tr1, tc:tc1])
+                mask &= (z0 != nodata) & (z1 != nodata)
+                diff = (z1 - z0)[mask].astype(np.float64)
+                cells += mask.sum()
+                fill += diff[diff > 0].sum() * cell_area
+                cut += -diff[diff < 0].sum() * cell_area
+        rows.append({
+            "id": polygon["id"],
+            "cells": int(cells),
+            "area_m2": cells * cell_area,
+            "fill_m3": fill,
+            "cut_m3": cut,
+            "net_m3": fill - cut,
+        })
+    return pd.DataFrame(rows)
+
+
+def volume_confidence_interval(volumes, confidence_score, z=1.96):
+    """Add a CI to `compute_volumes` output, widened as mission confidence drops.
+
+    The per-cell vertical error of each DEM is split into a site-wide bias
+    (scales with area) and independent noise (scales with sqrt(cells)).
+    """
+    sigma_z = BASE_SIGMA_Z + SIGMA_Z_PER_POINT * (100 - np.clip(confidence_score, 0, 100))
+    # Difference of two surveys with the same error model
+    sigma_diff = np.sqrt(2) * sigma_z
+    systematic = SYSTEMATIC_SHARE * sigma_diff * volumes["area_m2"]
+    cell_area = volumes["area_m2"] / volumes["cells"].clip(lower=1)
+    random = (1 - SYSTEMATIC_SHARE) * sigma_diff * cell_area * np.sqrt(volumes["cells"])
+    half_width = z * np.sqrt(systematic ** 2 + random ** 2)
+    return volumes.assign(
+        sigma_z_m=sigma_z,
+        ci_low_m3=volumes["net_m3"] - half_width,
+        ci_high_m3=volumes["net_m3"] + half_width,
+        ci_half_width_m3=half_width,
+    )
+
+# ================= SIMULATED SURVEYS =================
+def simulate_stockpile_surveys(out_dir, size=4000, cell_size=0.1, seed=42):
+    """Write a before/after DEM pair with stockpiles added between surveys, plus their polygons"""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    origin = (500_000.0, 2_100_000.0)
+    extent = size * cell_size
+
+    # Conical piles: (centre x, centre y, radius, height)
+    piles = [
+        (0.30 * extent, 0.35 * extent, 70.0, 10.0),
+        (0.70 * extent, 0.60 * extent, 45.0, 6.0),
+        (0.40 * extent, 0.78 * extent, 30.0, 4.0),
+    ]
+
+    def ground(r0, c0, rows, cols):
+        y = (np.arange(r0, r0 + rows) + 0.5)[:, None] * cell_size
+        x = (np.arange(c0, c0 + cols) + 0.5)[None, :] * cell_size
+        return (100 + 0.002 * x + 0.001 * y).astype(np.float32)
+
+    def noise(rows, cols):
+        return rng.normal(0, 0.02, (rows, cols)).astype(np.float32)
+
+    def before_fn(r0, c0, rows, cols):
+        return ground(r0, c0, rows, cols) + noise(rows, cols)
+
+    def after_fn(r0, c0, rows, cols):
+        z = ground(r0, c0, rows, cols) + noise(rows, cols)
+        y = (np.arange(r0, r0 + rows) + 0.5)[:, None] * cell_size
+        x = (np.arange(c0, c0 + cols) + 0.5)[None, :] * cell_size
+        for px, py, radius, height in piles:
+            dist = np.hypot(x - px, y - py)
+            z += np.clip(height * (1 - dist / radius), 0, None).astype(np.float32)
+        return z
+
+    before = write_dem(os.path.join(out_dir, "before.dem"), (size, size), origin, cell_size, fill_fn=before_fn)
+    after = write_dem(os.path.join(out_dir, "after.dem"), (size, size), origin, cell_size, fill_fn=after_fn)
+
+    polygons = []
+    for i, (px, py, radius, _) in enumerate(piles, start=1):
+        angles = np.linspace(0, 2 * np.pi, 24, endpoint=False)
+        r = radius * 1.1
+        polygons.append({
+            "id": f"PILE-{i:02d}",
+            # Local x/y -> map coordinates (rows run south from the origin)
+            "coords": list(zip(origin[0] + px + r * np.cos(angles), origin[1] - py + r * np.sin(angles))),
+        })
+    return before, after, polygons